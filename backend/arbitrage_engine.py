@@ -0,0 +1,374 @@
+"""
+Arbitrage Detection Engine for Crypto Arbitrage Bot
+Incremental cross-venue spread tracking, vectorized spread matrices and order-book depth analysis
+"""
+
+import bisect
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalDetector:
+    """
+    Keeps, per token, exchange asks and bids in sorted order so a ticker update only
+    re-evaluates that token's best cross-venue spread.
+    Venues are ranked on fee-adjusted prices (ask plus taker fee, bid minus taker fee), so the best pair is the
+    one with the widest net spread as in SpreadMatrix.compute; min_spread applies to that pair's gross spread,
+    as the min_spread_threshold setting always has.
+    Events are emitted only when the gross spread crosses min_spread, the best pair changes or the net spread
+    moves by at least change_threshold.
+    """
+
+    def __init__(self, min_spread: float = 0.5, change_threshold: float = 0.1, taker_fees: Optional[Dict[str, float]] = None, default_fee: float = 0.001):
+        self.min_spread = min_spread
+        self.change_threshold = change_threshold  # Percentage points
+        self.taker_fees: Dict[str, float] = dict(taker_fees or {})
+        self.default_fee = default_fee
+        self._quotes: Dict[str, Dict[str, Tuple[float, float, float, float]]] = {}  # (bid, ask, net bid, net ask)
+        self._asks: Dict[str, List[Tuple[float, str]]] = {}
+        self._bids: Dict[str, List[Tuple[float, str]]] = {}
+        self._best: Dict[str, Optional[dict]] = {}
+        self._emitted: Dict[str, dict] = {}
+        self.updates = 0
+        self.evaluations = 0
+
+    def _fee(self, exchange_name: str) -> float:
+        return self.taker_fees.get(exchange_name, self.default_fee)
+
+    def set_taker_fees(self, taker_fees: Dict[str, float]) -> List[dict]:
+        """Replace the per-exchange taker fees; re-ranks every token only when a fee actually changed"""
+        merged = {**self.taker_fees, **taker_fees}
+        if merged == self.taker_fees:
+            return []
+        self.taker_fees = merged
+        events = []
+        for token, quotes in self._quotes.items():
+            raw = {exchange_name: quote[:2] for exchange_name, quote in quotes.items()}
+            quotes.clear()
+            self._asks[token] = []
+            self._bids[token] = []
+            for exchange_name, (bid, ask) in raw.items():
+                self._insert(token, exchange_name, bid, ask)
+            event = self._evaluate(token)
+            if event:
+                events.append(event)
+        return events
+
+    def _insert(self, token: str, exchange_name: str, bid: float, ask: float):
+        fee = self._fee(exchange_name)
+        net_bid, net_ask = bid * (1 - fee), ask * (1 + fee)
+        self._quotes[token][exchange_name] = (bid, ask, net_bid, net_ask)
+        bisect.insort(self._asks[token], (net_ask, exchange_name))
+        bisect.insort(self._bids[token], (-net_bid, exchange_name))
+
+    def _discard(self, token: str, exchange_name: str):
+        """Remove an exchange's current quote from the token's sorted books"""
+        old = self._quotes[token].pop(exchange_name, None)
+        if old is None:
+            return
+        _, _, net_bid, net_ask = old
+        asks = self._asks[token]
+        del asks[bisect.bisect_left(asks, (net_ask, exchange_name))]
+        bids = self._bids[token]
+        del bids[bisect.bisect_left(bids, (-net_bid, exchange_name))]
+
+    def update(self, token_symbol: str, exchange_name: str, bid: Optional[float], ask: Optional[float]) -> Optional[dict]:
+        """
+        Apply one ticker update. Unchanged quotes cost a dict lookup.
+        Returns an opened/changed/closed event for the token, or None.
+        """
+        token = token_symbol.upper()
+        quotes = self._quotes.setdefault(token, {})
+        self._asks.setdefault(token, [])
+        self._bids.setdefault(token, [])
+
+        if not bid or not ask:
+            if exchange_name not in quotes:
+                return None
+            self._discard(token, exchange_name)
+        else:
+            current = quotes.get(exchange_name)
+            if current and current[:2] == (bid, ask):
+                return None
+            self._discard(token, exchange_name)
+            self._insert(token, exchange_name, bid, ask)
+
+        self.updates += 1
+        return self._evaluate(token)
+
+    def remove(self, token_symbol: str, exchange_name: str) -> Optional[dict]:
+        """Drop an exchange's quote for a token (e.g. venue disabled)"""
+        return self.update(token_symbol, exchange_name, None, None)
+
+    def _best_pair(self, token: str) -> Optional[dict]:
+        asks = self._asks[token]
+        bids = self._bids[token]
+        if len(self._quotes[token]) < 2:
+            return None
+
+        net_ask, buy_exchange = asks[0]
+        neg_net_bid, sell_exchange = bids[0]
+        if buy_exchange == sell_exchange:
+            # Same venue is best on both sides: take the better of the runner-up on either side
+            alt_ask, alt_buy = asks[1]
+            alt_neg_bid, alt_sell = bids[1]
+            if (-neg_net_bid) / alt_ask >= (-alt_neg_bid) / net_ask:
+                net_ask, buy_exchange = alt_ask, alt_buy
+            else:
+                neg_net_bid, sell_exchange = alt_neg_bid, alt_sell
+
+        net_bid = -neg_net_bid
+        ask = self._quotes[token][buy_exchange][1]
+        bid = self._quotes[token][sell_exchange][0]
+        return {
+            'token_symbol': token,
+            'buy_exchange': buy_exchange,
+            'sell_exchange': sell_exchange,
+            'buy_price': ask,
+            'sell_price': bid,
+            'spread_percent': (bid - ask) / ask * 100,
+            'net_spread_percent': (net_bid - net_ask) / net_ask * 100
+        }
+
+    def _evaluate(self, token: str) -> Optional[dict]:
+        self.evaluations += 1
+        best = self._best_pair(token)
+        self._best[token] = best
+
+        previous = self._emitted.get(token)
+        above = best is not None and best['spread_percent'] > self.min_spread
+
+        if not above:
+            if previous is None:
+                return None
+            del self._emitted[token]
+            return {'event': 'closed', 'token_symbol': token, 'previous': previous, 'current': best}
+
+        if previous is None:
+            event = 'opened'
+        elif (
+            (best['buy_exchange'], best['sell_exchange']) != (previous['buy_exchange'], previous['sell_exchange'])
+            or abs(best['net_spread_percent'] - previous['net_spread_percent']) >= self.change_threshold
+        ):
+            event = 'changed'
+        else:
+            return None
+
+        self._emitted[token] = best
+        return {'event': event, **best}
+
+    def exchanges(self, token_symbol: str) -> List[str]:
+        """Exchanges currently quoting a token"""
+        return list(self._quotes.get(token_symbol.upper(), {}))
+
+    def best(self, token_symbol: str) -> Optional[dict]:
+        """Current best cross-venue pair for a token, regardless of threshold"""
+        return self._best.get(token_symbol.upper())
+
+    def opportunities(self) -> List[dict]:
+        """All tokens whose best pair's gross spread is above min_spread, widest net spread first"""
+        current = [
+            best for best in self._best.values()
+            if best is not None and best['spread_percent'] > self.min_spread
+        ]
+        return sorted(current, key=lambda best: best['net_spread_percent'], reverse=True)
+
+    def stats(self) -> dict:
+        return {
+            'tokens': len(self._quotes),
+            'quotes': sum(len(quotes) for quotes in self._quotes.values()),
+            'updates': self.updates,
+            'evaluations': self.evaluations,
+            'open_opportunities': len(self._emitted)
+        }
+
+
+class SpreadMatrix:
+    """
+    Bids and asks held as (tokens x exchanges) arrays.
+    One vectorized pass yields the fee-adjusted spread for every (token, buy venue, sell venue) combination.
+    """
+
+    def __init__(self, tokens: List[str], exchanges: List[str], taker_fees: Optional[Dict[str, float]] = None, default_fee: float = 0.001):
+        self.tokens = list(tokens)
+        self.exchanges = list(exchanges)
+        self.bids = np.full((len(self.tokens), len(self.exchanges)), np.nan)
+        self.asks = np.full((len(self.tokens), len(self.exchanges)), np.nan)
+        self.taker_fees = np.array([
+            (taker_fees or {}).get(exchange_name, default_fee) for exchange_name in self.exchanges
+        ], dtype=float)
+
+    @classmethod
+    def from_tickers(
+        cls,
+        token_tickers: Dict[str, Dict[str, dict]],
+        exchanges: List[str],
+        taker_fees: Optional[Dict[str, float]] = None,
+        default_fee: float = 0.001
+    ) -> 'SpreadMatrix':
+        """Build from {token_symbol: {exchange_name: ticker}}; missing or zero quotes stay NaN"""
+        matrix = cls(list(token_tickers), exchanges, taker_fees, default_fee)
+        columns = {exchange_name: column for column, exchange_name in enumerate(matrix.exchanges)}
+        for row, token_symbol in enumerate(matrix.tokens):
+            for exchange_name, ticker in token_tickers[token_symbol].items():
+                column = columns.get(exchange_name)
+                if column is not None and ticker.get('bid') and ticker.get('ask'):
+                    matrix.bids[row, column] = ticker['bid']
+                    matrix.asks[row, column] = ticker['ask']
+        return matrix
+
+    def compute(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (gross, net) spread percent arrays shaped (token, buy venue, sell venue).
+        Net spread pays the taker fee on both legs; same-venue and unquoted cells are -inf.
+        """
+        buy_cost = self.asks * (1 + self.taker_fees)[None, :]
+        sell_proceeds = self.bids * (1 - self.taker_fees)[None, :]
+
+        with np.errstate(invalid='ignore'):
+            gross = (self.bids[:, None, :] - self.asks[:, :, None]) / self.asks[:, :, None] * 100
+            net = (sell_proceeds[:, None, :] - buy_cost[:, :, None]) / buy_cost[:, :, None] * 100
+
+        same_venue = np.eye(len(self.exchanges), dtype=bool)[None, :, :]
+        gross = np.where(np.isnan(gross) | same_venue, -np.inf, gross)
+        net = np.where(np.isnan(net) | same_venue, -np.inf, net)
+        return gross, net
+
+    def opportunities(self, min_spread: float) -> List[dict]:
+        """Every (token, buy venue, sell venue) whose gross spread exceeds min_spread, widest net spread first"""
+        if not self.tokens or len(self.exchanges) < 2:
+            return []
+
+        gross, net = self.compute()
+        hits = np.argwhere(gross > min_spread)
+        if hits.size == 0:
+            return []
+
+        order = np.argsort(-net[hits[:, 0], hits[:, 1], hits[:, 2]], kind='stable')
+        return [
+            {
+                'token_symbol': self.tokens[row],
+                'buy_exchange': self.exchanges[buy],
+                'sell_exchange': self.exchanges[sell],
+                'buy_price': float(self.asks[row, buy]),
+                'sell_price': float(self.bids[row, sell]),
+                'spread_percent': float(gross[row, buy, sell]),
+                'net_spread_percent': float(net[row, buy, sell])
+            }
+            for row, buy, sell in hits[order]
+        ]
+
+
+def book_side(levels: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Split ccxt order-book levels [[price, amount, ...], ...] into price and amount arrays"""
+    if not levels:
+        return np.empty(0), np.empty(0)
+    array = np.asarray([level[:2] for level in levels], dtype=float)
+    return array[:, 0], array[:, 1]
+
+
+def simulate_fills(
+    ask_prices: np.ndarray,
+    ask_amounts: np.ndarray,
+    bid_prices: np.ndarray,
+    bid_amounts: np.ndarray,
+    sizes,
+    buy_fee: float = 0.0,
+    sell_fee: float = 0.0
+) -> Dict[str, np.ndarray]:
+    """
+    Walk both books for every USDT size at once: spend size on the asks, sell the tokens received into the bids.
+    Returns arrays aligned with sizes; sizes deeper than either book are marked not fillable and profit is NaN.
+    """
+    sizes = np.atleast_1d(np.asarray(sizes, dtype=float))
+    if ask_prices.size == 0 or bid_prices.size == 0:
+        nan = np.full(sizes.shape, np.nan)
+        return {'sizes': sizes, 'tokens': nan, 'proceeds': nan, 'profit': nan,
+                'buy_vwap': nan, 'sell_vwap': nan, 'fillable': np.zeros(sizes.shape, dtype=bool)}
+
+    # Buy leg: how many tokens does each USDT size buy?
+    ask_cost = np.cumsum(ask_prices * ask_amounts)
+    ask_qty = np.cumsum(ask_amounts)
+    level = np.searchsorted(ask_cost, sizes)
+    buy_fillable = level < ask_prices.size
+    level = np.minimum(level, ask_prices.size - 1)
+    spent_before = np.where(level > 0, ask_cost[level - 1], 0.0)
+    bought_before = np.where(level > 0, ask_qty[level - 1], 0.0)
+    tokens = bought_before + (sizes - spent_before) / ask_prices[level]
+    tokens_net = tokens * (1 - buy_fee)
+
+    # Sell leg: what do those tokens fetch on the bids?
+    bid_qty = np.cumsum(bid_amounts)
+    bid_value = np.cumsum(bid_prices * bid_amounts)
+    level = np.searchsorted(bid_qty, tokens_net)
+    sell_fillable = level < bid_prices.size
+    level = np.minimum(level, bid_prices.size - 1)
+    sold_before = np.where(level > 0, bid_qty[level - 1], 0.0)
+    value_before = np.where(level > 0, bid_value[level - 1], 0.0)
+    proceeds = value_before + (tokens_net - sold_before) * bid_prices[level]
+
+    fillable = buy_fillable & sell_fillable
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'sizes': sizes,
+            'tokens': tokens_net,
+            'proceeds': proceeds * (1 - sell_fee),
+            'profit': np.where(fillable, proceeds * (1 - sell_fee) - sizes, np.nan),
+            'buy_vwap': sizes / tokens,
+            'sell_vwap': proceeds / tokens_net,
+            'fillable': fillable
+        }
+
+
+def optimize_trade_size(
+    order_book_buy: dict,
+    order_book_sell: dict,
+    buy_fee: float = 0.001,
+    sell_fee: float = 0.001,
+    fixed_cost: float = 0.0,
+    min_size: float = 10.0,
+    max_size: float = 1000.0,
+    steps: int = 200
+) -> Optional[dict]:
+    """
+    Find the USDT size in [min_size, max_size] that maximizes net profit after slippage, fees and fixed costs.
+    Returns None when no size is both fillable and profitable.
+    """
+    ask_prices, ask_amounts = book_side(order_book_buy.get('asks') or [])
+    bid_prices, bid_amounts = book_side(order_book_sell.get('bids') or [])
+    if ask_prices.size == 0 or bid_prices.size == 0 or max_size < min_size:
+        return None
+
+    fills = simulate_fills(ask_prices, ask_amounts, bid_prices, bid_amounts,
+                           np.linspace(min_size, max_size, steps), buy_fee, sell_fee)
+    profit = fills['profit'] - fixed_cost
+    if not np.any(fills['fillable']) or np.nanmax(profit) <= 0:
+        return None
+
+    best = int(np.nanargmax(profit))
+    size = float(fills['sizes'][best])
+    buy_vwap = float(fills['buy_vwap'][best])
+    sell_vwap = float(fills['sell_vwap'][best])
+    top_ask = float(ask_prices[0])
+    top_bid = float(bid_prices[0])
+    return {
+        'size': size,
+        'net_profit': float(profit[best]),
+        'profit_percent': float(profit[best] / size * 100),
+        'buy_vwap': buy_vwap,
+        'sell_vwap': sell_vwap,
+        'buy_slippage_percent': (buy_vwap - top_ask) / top_ask * 100,
+        'sell_slippage_percent': (top_bid - sell_vwap) / top_bid * 100,
+        'ask_depth_usdt': float(np.sum(ask_prices * ask_amounts)),
+        'bid_depth_usdt': float(np.sum(bid_prices * bid_amounts))
+    }
+
+
+def depth_confidence(analysis: dict) -> float:
+    """Confidence from executable profit, discounted when the optimal size uses a large share of visible depth"""
+    coverage = min(1.0, min(analysis['ask_depth_usdt'], analysis['bid_depth_usdt']) / (analysis['size'] * 3))
+    return min(95.0, 50 + analysis['profit_percent'] * 5) * (0.5 + 0.5 * coverage)
@@ -0,0 +1,109 @@
+"""
+Batched On-Chain Balance Reads for Crypto Arbitrage Bot
+BNB and BEP20 balances for many addresses in one eth_call via Multicall3
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eth_abi import decode, encode
+from web3 import AsyncWeb3, Web3
+
+logger = logging.getLogger(__name__)
+
+# Multicall3 is deployed at the same address on BSC mainnet and testnet
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")  # aggregate3((address,bool,bytes)[])
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")  # getEthBalance(address)
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")  # balanceOf(address)
+DECIMALS_SELECTOR = bytes.fromhex("313ce567")  # decimals()
+
+NATIVE = 'BNB'
+
+
+class BalanceReader:
+    """
+    Reads native and token balances for any number of (address, token) pairs in a single round trip.
+    Token decimals never change, so they are fetched once per contract and cached.
+    Falls back to concurrent individual calls if the Multicall3 call itself fails.
+    """
+
+    def __init__(self, w3: AsyncWeb3, multicall_address: str = MULTICALL3_ADDRESS):
+        self.w3 = w3
+        self.multicall_address = Web3.to_checksum_address(multicall_address)
+        self._decimals: Dict[str, int] = {}
+        self.round_trips = 0
+
+    def cached_decimals(self, token_address: str) -> Optional[int]:
+        return self._decimals.get(Web3.to_checksum_address(token_address))
+
+    async def read(self, addresses: Iterable[str], token_addresses: Iterable[str] = ()) -> Dict[str, Dict[str, float]]:
+        """
+        Returns {address: {'BNB': balance, token_address: balance}} with checksummed keys.
+        Tokens whose balance could not be read are omitted for that address.
+        """
+        addresses = [Web3.to_checksum_address(address) for address in addresses]
+        tokens = list(dict.fromkeys(Web3.to_checksum_address(token) for token in token_addresses))
+        missing_decimals = [token for token in tokens if token not in self._decimals]
+
+        # Call layout: decimals for uncached tokens, then per address BNB + each token balance
+        calls: List[Tuple[str, bytes]] = [(token, DECIMALS_SELECTOR) for token in missing_decimals]
+        for address in addresses:
+            encoded_address = encode(['address'], [address])
+            calls.append((self.multicall_address, GET_ETH_BALANCE_SELECTOR + encoded_address))
+            calls.extend((token, BALANCE_OF_SELECTOR + encoded_address) for token in tokens)
+
+        try:
+            results = await self._aggregate(calls)
+        except Exception as e:
+            logger.warning(f"Multicall3 balance read failed, falling back to individual calls: {e}")
+            results = await self._individual(calls)
+
+        for token, (success, data) in zip(missing_decimals, results):
+            if success and len(data) >= 32:
+                self._decimals[token] = decode(['uint256'], data[:32])[0]
+        results = results[len(missing_decimals):]
+
+        balances: Dict[str, Dict[str, float]] = {}
+        index = 0
+        for address in addresses:
+            entry: Dict[str, float] = {}
+            success, data = results[index]
+            if success and len(data) >= 32:
+                entry[NATIVE] = decode(['uint256'], data[:32])[0] / 10 ** 18
+            index += 1
+            for token in tokens:
+                success, data = results[index]
+                decimals = self._decimals.get(token)
+                if success and len(data) >= 32 and decimals is not None:
+                    entry[token] = decode(['uint256'], data[:32])[0] / 10 ** decimals
+                index += 1
+            balances[address] = entry
+        return balances
+
+    async def _aggregate(self, calls: List[Tuple[str, bytes]]) -> List[Tuple[bool, bytes]]:
+        """One eth_call to Multicall3.aggregate3 with allowFailure set on every call"""
+        payload = AGGREGATE3_SELECTOR + encode(
+            ['(address,bool,bytes)[]'],
+            [[(target, True, data) for target, data in calls]]
+        )
+        self.round_trips += 1
+        raw = await self.w3.eth.call({'to': self.multicall_address, 'data': payload})
+        return list(decode(['(bool,bytes)[]'], bytes(raw))[0])
+
+    async def _individual(self, calls: List[Tuple[str, bytes]]) -> List[Tuple[bool, bytes]]:
+        async def call(target: str, data: bytes) -> Tuple[bool, bytes]:
+            try:
+                if target == self.multicall_address and data[:4] == GET_ETH_BALANCE_SELECTOR:
+                    address = decode(['address'], data[4:])[0]
+                    balance = await self.w3.eth.get_balance(Web3.to_checksum_address(address))
+                    return True, encode(['uint256'], [balance])
+                return True, bytes(await self.w3.eth.call({'to': target, 'data': data}))
+            except Exception as e:
+                logger.warning(f"Balance call to {target} failed: {e}")
+                return False, b''
+
+        self.round_trips += len(calls)
+        return list(await asyncio.gather(*[call(target, data) for target, data in calls]))
@@ -0,0 +1,222 @@
+"""
+Exchange Balance Tracker for Crypto Arbitrage Bot
+One balance refresh loop per exchange shared by every waiter and listener
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def parse_balances(balance: dict) -> Dict[str, dict]:
+    """ccxt balance structure -> {asset: {'free', 'used', 'total'}}"""
+    free = balance.get('free') or {}
+    used = balance.get('used') or {}
+    total = balance.get('total') or {}
+    return {
+        asset: {
+            'free': float(free.get(asset) or 0),
+            'used': float(used.get(asset) or 0),
+            'total': float(total.get(asset) or 0)
+        }
+        for asset in set(free) | set(used) | set(total)
+    }
+
+
+class _Venue:
+    def __init__(self, instance: Any):
+        self.instance = instance
+        self.balances: Dict[str, dict] = {}
+        self.updated_at: Optional[float] = None
+        self.inflight: Optional[asyncio.Future] = None
+        self.waiters: List[Tuple[str, float, asyncio.Future]] = []
+        self.task: Optional[asyncio.Task] = None
+        self.stream_client: Any = None
+        self.stream_checked = False
+        self.fetches = 0
+
+
+class BalanceTracker:
+    """
+    Keeps the latest balances per exchange. While anyone is waiting on a venue a single loop refreshes it
+    (private watch_balance if a stream client is available, else fetch_balance every interval seconds);
+    every change is published per asset to listeners and checked against all waiters at once.
+    """
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        stream_client_factory: Optional[Callable[[str], Awaitable[Optional[Any]]]] = None
+    ):
+        self.interval = interval
+        self.stream_client_factory = stream_client_factory
+        self._venues: Dict[str, _Venue] = {}
+        self._listeners: List[Callable[[str, str, dict, dict], None]] = []
+
+    def add_listener(self, callback: Callable[[str, str, dict, dict], None]):
+        """Register a callback(exchange_name, asset, previous, current) for every per-asset change"""
+        self._listeners.append(callback)
+
+    def _venue(self, exchange_name: str, instance: Any) -> _Venue:
+        key = exchange_name.lower()
+        venue = self._venues.get(key)
+        if venue is None:
+            venue = self._venues[key] = _Venue(instance)
+        elif instance is not None and venue.instance is not instance:
+            venue.instance = instance  # Exchange instance was recreated
+        return venue
+
+    # ---------- updates ----------
+
+    def _apply(self, exchange_name: str, venue: _Venue, balances: Dict[str, dict]):
+        previous = venue.balances
+        venue.balances = balances
+        venue.updated_at = time.monotonic()
+
+        empty = {'free': 0.0, 'used': 0.0, 'total': 0.0}
+        for asset in set(previous) | set(balances):
+            before, after = previous.get(asset, empty), balances.get(asset, empty)
+            if before != after and previous:
+                for callback in self._listeners:
+                    try:
+                        callback(exchange_name, asset, before, after)
+                    except Exception as e:
+                        logger.warning(f"Balance listener failed: {e}")
+
+        for asset, target, future in venue.waiters:
+            free = balances.get(asset, empty)['free']
+            if free >= target and not future.done():
+                future.set_result(free)
+
+    async def refresh(self, exchange_name: str, instance: Any = None) -> Dict[str, dict]:
+        """Fetch balances now; concurrent callers share one fetch_balance call"""
+        venue = self._venue(exchange_name, instance)
+        if venue.inflight is not None:
+            return await asyncio.shield(venue.inflight)
+
+        venue.inflight = asyncio.get_running_loop().create_future()
+        try:
+            venue.fetches += 1
+            balances = parse_balances(await venue.instance.fetch_balance())
+            self._apply(exchange_name.lower(), venue, balances)
+            venue.inflight.set_result(balances)
+            return balances
+        except Exception as e:
+            venue.inflight.set_exception(e)
+            venue.inflight.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            venue.inflight = None
+
+    async def get_balances(self, exchange_name: str, instance: Any, max_age: Optional[float] = None) -> Dict[str, dict]:
+        """Latest balances, refetched if older than max_age seconds (None = any age)"""
+        venue = self._venue(exchange_name, instance)
+        if venue.updated_at is None or (max_age is not None and time.monotonic() - venue.updated_at > max_age):
+            return await self.refresh(exchange_name, instance)
+        return venue.balances
+
+    async def free_balance(self, exchange_name: str, instance: Any, asset: str, max_age: Optional[float] = None) -> float:
+        balances = await self.get_balances(exchange_name, instance, max_age)
+        return balances.get(asset, {}).get('free', 0.0)
+
+    # ---------- waiting ----------
+
+    async def wait_for_increase(
+        self,
+        exchange_name: str,
+        instance: Any,
+        asset: str,
+        min_increase: float,
+        baseline: Optional[float] = None,
+        timeout: Optional[float] = None
+    ) -> float:
+        """
+        Wait until the free balance of asset is at least baseline + min_increase and return the increase.
+        baseline defaults to the current free balance.
+        """
+        if baseline is None:
+            baseline = await self.free_balance(exchange_name, instance, asset, max_age=0)
+        venue = self._venue(exchange_name, instance)
+        future = asyncio.get_running_loop().create_future()
+        waiter = (asset, baseline + min_increase, future)
+        venue.waiters.append(waiter)
+
+        current = venue.balances.get(asset, {}).get('free', 0.0)
+        if current >= baseline + min_increase:
+            future.set_result(current)
+        if venue.task is None or venue.task.done():
+            venue.task = asyncio.create_task(self._run(exchange_name.lower(), venue))
+
+        try:
+            return await asyncio.wait_for(future, timeout) - baseline
+        finally:
+            venue.waiters.remove(waiter)
+
+    async def _run(self, exchange_name: str, venue: _Venue):
+        """Refresh one venue for as long as it has waiters"""
+        while venue.waiters:
+            try:
+                client = await self._stream_client(exchange_name, venue)
+                if client is not None:
+                    self._apply(exchange_name, venue, parse_balances(await client.watch_balance()))
+                    continue
+                if venue.updated_at is None or time.monotonic() - venue.updated_at >= self.interval:
+                    await self.refresh(exchange_name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Balance refresh failed for {exchange_name}: {e}")
+                if venue.stream_client is not None:
+                    logger.info(f"Falling back to REST balance polling for {exchange_name}")
+                    await self._close_stream(venue)
+            await asyncio.sleep(self.interval)
+
+    async def _stream_client(self, exchange_name: str, venue: _Venue) -> Optional[Any]:
+        if venue.stream_checked or self.stream_client_factory is None:
+            return venue.stream_client
+        venue.stream_checked = True
+        try:
+            client = await self.stream_client_factory(exchange_name)
+        except Exception as e:
+            logger.warning(f"Could not create balance stream for {exchange_name}: {e}")
+            return None
+        if client is not None and (getattr(client, 'has', None) or {}).get('watchBalance'):
+            venue.stream_client = client
+        elif client is not None:
+            await client.close()
+        return venue.stream_client
+
+    async def _close_stream(self, venue: _Venue):
+        client, venue.stream_client = venue.stream_client, None
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing balance stream: {e}")
+
+    async def stop(self):
+        for venue in self._venues.values():
+            if venue.task:
+                venue.task.cancel()
+                try:
+                    await venue.task
+                except asyncio.CancelledError:
+                    pass
+                venue.task = None
+            if venue.stream_client is not None:
+                await self._close_stream(venue)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            exchange_name: {
+                'assets': len(venue.balances),
+                'age_seconds': round(now - venue.updated_at, 1) if venue.updated_at is not None else None,
+                'waiters': len(venue.waiters),
+                'streaming': venue.stream_client is not None,
+                'fetches': venue.fetches
+            }
+            for exchange_name, venue in self._venues.items()
+        }
@@ -0,0 +1,131 @@
+"""
+Shared Block Watcher for Crypto Arbitrage Bot
+One polling loop per chain resolves receipts for every pending transaction in batch
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from web3 import AsyncWeb3
+
+logger = logging.getLogger(__name__)
+
+
+def _to_int(value) -> Optional[int]:
+    if value is None:
+        return None
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+class BlockWatcher:
+    """
+    Follows the chain head with a single loop that only runs while someone is waiting.
+    On each new block the receipts of all unconfirmed hashes are fetched in one JSON-RPC batch,
+    and waiters are woken through futures once their confirmation count is reached.
+    """
+
+    def __init__(self, w3: AsyncWeb3, poll_interval: float = 1.0):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.block_number: Optional[int] = None
+        self._waiters: Dict[str, List[Tuple[int, asyncio.Future]]] = {}
+        self._receipts: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.errors = 0
+
+    async def wait_for_receipt(self, tx_hash: str, confirmations: int = 1, timeout: float = 600) -> dict:
+        """Wait until tx_hash has `confirmations` blocks on top of (and including) its own; returns the receipt"""
+        tx_hash = tx_hash.lower()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(tx_hash, []).append((confirmations, future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            waiters = [waiter for waiter in self._waiters.get(tx_hash, []) if waiter[1] is not future]
+            if waiters:
+                self._waiters[tx_hash] = waiters
+            else:
+                self._waiters.pop(tx_hash, None)
+                self._receipts.pop(tx_hash, None)
+
+    async def _run(self):
+        while self._waiters:
+            try:
+                block_number = await self.w3.eth.block_number
+                if block_number != self.block_number:
+                    await self._on_block(block_number)
+                    self.block_number = block_number  # Only once handled, so a failed receipt batch is retried
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Block watcher poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _on_block(self, block_number: int):
+        unresolved = [tx_hash for tx_hash in self._waiters if tx_hash not in self._receipts]
+        if unresolved:
+            for tx_hash, receipt in zip(unresolved, await self._fetch_receipts(unresolved)):
+                if receipt:
+                    self._receipts[tx_hash] = receipt
+
+        for tx_hash, waiters in list(self._waiters.items()):
+            receipt = self._receipts.get(tx_hash)
+            if not receipt:
+                continue
+            confirmations = block_number - receipt['blockNumber'] + 1
+            for required, future in waiters:
+                if confirmations >= required and not future.done():
+                    future.set_result({**receipt, 'confirmations': confirmations})
+
+    async def _fetch_receipts(self, tx_hashes: List[str]) -> List[Optional[dict]]:
+        """eth_getTransactionReceipt for every hash in one batch (individual calls if batching is unsupported)"""
+        self.batches += 1
+        provider = self.w3.provider
+        try:
+            responses = await provider.make_batch_request([('eth_getTransactionReceipt', [tx_hash]) for tx_hash in tx_hashes])
+            if not isinstance(responses, list):
+                raise ValueError(responses.get('error'))
+            by_id = sorted(responses, key=lambda response: response.get('id', 0))
+            raw_receipts = [response.get('result') for response in by_id]
+        except NotImplementedError:
+            raw_receipts = await asyncio.gather(*[
+                provider.make_request('eth_getTransactionReceipt', [tx_hash]) for tx_hash in tx_hashes
+            ])
+            raw_receipts = [response.get('result') for response in raw_receipts]
+
+        return [
+            {
+                **receipt,
+                'blockNumber': _to_int(receipt.get('blockNumber')),
+                'status': _to_int(receipt.get('status'))
+            } if receipt and receipt.get('blockNumber') is not None else None
+            for receipt in raw_receipts
+        ]
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for waiters in self._waiters.values():
+            for _, future in waiters:
+                if not future.done():
+                    future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            'block_number': self.block_number,
+            'pending_transactions': len(self._waiters),
+            'running': self._task is not None and not self._task.done(),
+            'receipt_batches': self.batches,
+            'errors': self.errors
+        }
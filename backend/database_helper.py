@@ -130,13 +130,13 @@ class MongoCollection:
         result = await self._collection.insert_one(document)
         return type('InsertResult', (), {'inserted_id': document['id']})()
     
-    async def insert_many(self, documents: List[Dict]):
-        """Insert multiple documents"""
+    async def insert_many(self, documents: List[Dict], ordered: bool = True):
+        """Insert multiple documents (ordered=False keeps inserting past a failed document)"""
         for doc in documents:
             if 'id' not in doc:
                 doc['id'] = str(uuid.uuid4())
         if documents:
-            await self._collection.insert_many(documents)
+            await self._collection.insert_many(documents, ordered=ordered)
         return type('InsertManyResult', (), {'inserted_ids': [d['id'] for d in documents]})()
     
     async def find_one(self, filter_dict: Dict = None, projection: Dict = None):
@@ -0,0 +1,206 @@
+"""
+Execution Jobs for Crypto Arbitrage Bot
+Durable, resumable arbitrage executions run by a background worker
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ['completed', 'failed', 'needs_attention']
+
+
+class AmbiguousStepError(Exception):
+    """An irreversible action was started before a restart and its outcome was never recorded"""
+
+
+class JobPreconditionError(Exception):
+    """The job cannot go ahead as configured (missing wallet, exchange, market or token, or not profitable)"""
+
+
+def caused_by(error: BaseException, error_types: Tuple[type, ...]) -> bool:
+    """True if the error or anything in its cause/context chain is one of error_types"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, error_types):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class JobCheckpoints:
+    """
+    Persistent progress of one job (a failsafe_states document). Step results are stored under
+    step_results and the outcome of every irreversible action (broadcast tx, order, withdrawal) under
+    checkpoints, so a resumed job skips what already happened instead of doing it twice.
+    """
+
+    def __init__(self, db: Any, job: dict, ambiguous_errors: Tuple[type, ...] = (asyncio.TimeoutError,)):
+        self.db = db
+        self.job_id = job['id']
+        self.ambiguous_errors = ambiguous_errors
+        self.steps: Dict[str, Any] = dict(job.get('step_results') or {})
+        self.actions: Dict[str, Any] = dict(job.get('checkpoints') or {})
+        self._lock = asyncio.Lock()
+
+    async def _write(self, fields: dict):
+        async with self._lock:
+            fields['updated_at'] = datetime.now(timezone.utc).isoformat()
+            await self.db.failsafe_states.update_one({'id': self.job_id}, {'$set': fields})
+
+    async def transition(self, status: str, **fields):
+        """Persist a state machine transition"""
+        await self._write({'status': status, **fields})
+
+    async def update(self, **fields):
+        await self._write(fields)
+
+    async def save_step(self, name: str, result: Any):
+        self.steps[name] = result
+        await self._write({'step_results': dict(self.steps)})
+
+    async def once(self, key: str, action: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run an irreversible action at most once across restarts. A start marker is persisted first;
+        finding the marker without a recorded outcome means the process died mid-action, which needs a
+        human to check the exchange or chain rather than a blind retry. The marker is kept the same way when
+        the action is cancelled or fails with one of ambiguous_errors (timeouts). Any other error is a definite
+        refusal (e.g. ccxt InvalidOrder or InsufficientFunds): it is recorded under <key>_error and the marker
+        is cleared, so the action may run again.
+        """
+        if key in self.actions:
+            return self.actions[key]
+        marker = f"{key}_started"
+        if self.actions.get(marker):
+            raise AmbiguousStepError(f"'{key}' was started before a restart but its outcome is unknown - verify manually")
+
+        self.actions[marker] = True
+        await self._write({'checkpoints': dict(self.actions)})
+        try:
+            result = await action()
+        except Exception as e:
+            if not caused_by(e, self.ambiguous_errors):
+                del self.actions[marker]
+                self.actions[f"{key}_error"] = str(e)
+                await self._write({'checkpoints': dict(self.actions)})
+            raise
+        self.actions.pop(f"{key}_error", None)
+        self.actions[key] = result
+        await self._write({'checkpoints': dict(self.actions)})
+        return result
+
+
+class ExecutionWorker:
+    """
+    Runs queued jobs in the background with a fixed number of workers. Jobs are persisted before they
+    are queued and every unfinished job (status not terminal) is queued again by resume() on startup.
+    Stopping the worker interrupts running jobs without marking them, so they resume from their last
+    checkpoint on the next start.
+    """
+
+    def __init__(self, db: Any, handler: Callable[[dict], Awaitable[Any]], workers: int = 2):
+        self.db = db
+        self.handler = handler
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._queued: set = set()
+        self._running: Dict[str, float] = {}
+        self.finished = 0
+        self.resumed = 0
+
+    async def submit(self, job: dict) -> str:
+        """Persist a new job and queue it; returns the job id"""
+        await self.db.failsafe_states.insert_one(dict(job))
+        self._enqueue(job['id'])
+        return job['id']
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._queued and job_id not in self._running:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def resume(self, required_fields: Tuple[str, ...] = ()) -> int:
+        """
+        Queue every job that has not reached a terminal status; returns how many were queued.
+        Jobs missing any of required_fields (e.g. rows written before jobs carried a resumable payload)
+        cannot be run again and are marked needs_attention for a human instead.
+        """
+        projection = {'_id': 0, 'id': 1, 'status': 1, **{field: 1 for field in required_fields}}
+        jobs = await self.db.failsafe_states.find({'status': {'$nin': TERMINAL_STATUSES}}, projection).to_list(1000)
+        queued = 0
+        for job in jobs:
+            if not job.get('id'):
+                continue
+            missing = [field for field in required_fields if not job.get(field)]
+            if missing:
+                logger.warning(f"Arbitrage job {job['id']} stopped at {job.get('status')} without {', '.join(missing)} - needs attention")
+                await self.db.failsafe_states.update_one({'id': job['id']}, {'$set': {
+                    'status': 'needs_attention',
+                    'error': f"Interrupted at '{job.get('status')}' without a resumable {', '.join(missing)} - verify exchange and wallet balances manually",
+                    'updated_at': datetime.now(timezone.utc).isoformat()
+                }})
+                continue
+            logger.info(f"Resuming arbitrage job {job['id']} from status {job.get('status')}")
+            self._enqueue(job['id'])
+            self.resumed += 1
+            queued += 1
+        return queued
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _next_job(self) -> Optional[dict]:
+        """Next job to run (FIFO); None if the queued job no longer needs running"""
+        job_id = await self._queue.get()
+        self._queued.discard(job_id)
+        job = await self.db.failsafe_states.find_one({'id': job_id}, {'_id': 0})
+        if not job or job.get('status') in TERMINAL_STATUSES:
+            return None
+        return job
+
+    def _job_finished(self, job: dict):
+        """Called after a job's handler returns, fails or is interrupted"""
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._next_job()
+            if job is None:
+                continue
+            job_id = job['id']
+            self._running[job_id] = loop.time()
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Arbitrage job {job_id} failed: {e}")
+            finally:
+                self._running.pop(job_id, None)
+                self.finished += 1
+                self._job_finished(job)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queued': len(self._queued),
+            'running': len(self._running),
+            'finished': self.finished,
+            'resumed': self.resumed
+        }
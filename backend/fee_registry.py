@@ -0,0 +1,216 @@
+"""
+Fee Registry for Crypto Arbitrage Bot
+Cached trading fees and per-currency withdrawal/deposit data per exchange
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# ccxt venues name the BSC network differently
+NETWORK_ALIASES = {
+    'BSC': ['BSC', 'BEP20', 'BEP-20', 'BNB'],
+    'BEP20': ['BEP20', 'BSC', 'BEP-20', 'BNB'],
+}
+
+
+class FeeRegistry:
+    """
+    Loads trading fees and currency/network tables once per exchange, refreshes them on a long TTL
+    in the background and persists them so a restart starts warm. Lookups never touch the network.
+    """
+
+    def __init__(self, db, ttl: float = 6 * 3600, check_interval: float = 300):
+        self.db = db
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._tables: Dict[str, dict] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- loading ----------
+
+    async def warm_start(self):
+        """Load persisted tables from the database"""
+        try:
+            docs = await self.db.exchange_fees.find({}, {"_id": 0}).to_list(100)
+        except Exception as e:
+            logger.warning(f"Could not load persisted fee tables: {e}")
+            return
+        for doc in docs:
+            try:
+                self._tables[doc['exchange']] = json.loads(doc['table'])
+            except Exception as e:
+                logger.warning(f"Skipping unreadable fee table for {doc.get('exchange')}: {e}")
+        logger.info(f"Fee registry warm-started with {len(self._tables)} exchanges")
+
+    async def load(self, exchange_name: str, instance: Any) -> dict:
+        """Fetch fee data from the exchange, replace the cached table and persist it"""
+        key = exchange_name.lower()
+        has = getattr(instance, 'has', None) or {}
+        static = (getattr(instance, 'fees', None) or {}).get('trading', {})
+        table = {
+            'default': {'maker': static.get('maker'), 'taker': static.get('taker')},
+            'trading': {},
+            'currencies': {},
+            'loaded_at': time.time()
+        }
+
+        if has.get('fetchTradingFees'):
+            try:
+                fees = await instance.fetch_trading_fees()
+                table['trading'] = {
+                    symbol: {'maker': fee.get('maker'), 'taker': fee.get('taker')}
+                    for symbol, fee in fees.items()
+                    if isinstance(fee, dict)
+                }
+            except Exception as e:
+                logger.warning(f"fetch_trading_fees failed on {exchange_name}: {e}")
+
+        if has.get('fetchCurrencies'):
+            try:
+                currencies = await instance.fetch_currencies()
+                table['currencies'] = {
+                    code: self._currency_entry(currency)
+                    for code, currency in (currencies or {}).items()
+                    if isinstance(currency, dict)
+                }
+            except Exception as e:
+                logger.warning(f"fetch_currencies failed on {exchange_name}: {e}")
+
+        self._tables[key] = table
+        try:
+            await self.db.exchange_fees.update_one(
+                {'exchange': key},
+                {'$set': {
+                    'exchange': key,
+                    'table': json.dumps(table),
+                    'updated_at': datetime.now(timezone.utc).isoformat()
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Could not persist fee table for {exchange_name}: {e}")
+
+        logger.info(f"Loaded fees for {exchange_name}: {len(table['trading'])} markets, {len(table['currencies'])} currencies")
+        return table
+
+    @staticmethod
+    def _currency_entry(currency: dict) -> dict:
+        networks = {}
+        for network, info in (currency.get('networks') or {}).items():
+            if not isinstance(info, dict):
+                continue
+            limits = info.get('limits') or {}
+            networks[network.upper()] = {
+                'fee': info.get('fee'),
+                'withdraw': info.get('withdraw'),
+                'deposit': info.get('deposit'),
+                'min_withdraw': (limits.get('withdraw') or {}).get('min'),
+                'min_deposit': (limits.get('deposit') or {}).get('min')
+            }
+        limits = currency.get('limits') or {}
+        return {
+            'fee': currency.get('fee'),
+            'withdraw': currency.get('withdraw'),
+            'deposit': currency.get('deposit'),
+            'min_withdraw': (limits.get('withdraw') or {}).get('min'),
+            'networks': networks
+        }
+
+    def is_stale(self, exchange_name: str) -> bool:
+        table = self._tables.get(exchange_name.lower())
+        return table is None or time.time() - table.get('loaded_at', 0) > self.ttl
+
+    def ensure_loaded(self, exchange_name: str, instance: Any):
+        """Schedule a background load if the exchange has no fresh table; concurrent callers share one load"""
+        key = exchange_name.lower()
+        if not self.is_stale(key) or (key in self._loading and not self._loading[key].done()):
+            return
+        task = asyncio.get_running_loop().create_task(self.load(key, instance))
+        self._loading[key] = task
+        task.add_done_callback(lambda _: self._loading.pop(key, None))
+
+    # ---------- background refresh ----------
+
+    def start(self, list_instances: Callable[[], Awaitable[Dict[str, Any]]]):
+        """Periodically refresh stale tables for the exchanges returned by list_instances()"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(list_instances))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._loading.values()):
+            task.cancel()
+
+    async def _run(self, list_instances):
+        while True:
+            try:
+                instances = await list_instances()
+                stale = [(name, instance) for name, instance in instances.items() if self.is_stale(name)]
+                if stale:
+                    await asyncio.gather(*[self.load(name, instance) for name, instance in stale], return_exceptions=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Fee registry refresh failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    # ---------- lookups (no I/O) ----------
+
+    def trading_fee(self, exchange_name: str, symbol: Optional[str] = None, side: str = 'taker', default: float = 0.001) -> float:
+        """Fee rate for a market (falls back to the venue default, then to default)"""
+        table = self._tables.get(exchange_name.lower())
+        if not table:
+            return default
+        rate = (table['trading'].get(symbol) or {}).get(side) if symbol else None
+        if rate is None:
+            rate = table['default'].get(side)
+        return float(rate) if rate is not None else default
+
+    def _network(self, exchange_name: str, code: str, network: str) -> Optional[dict]:
+        table = self._tables.get(exchange_name.lower())
+        currency = (table or {}).get('currencies', {}).get(code.upper())
+        if not currency:
+            return None
+        for alias in NETWORK_ALIASES.get(network.upper(), [network.upper()]):
+            if alias in currency['networks']:
+                return currency['networks'][alias]
+        return None
+
+    def withdrawal_fee(self, exchange_name: str, code: str, network: str = 'BSC') -> Optional[float]:
+        """Withdrawal fee in units of the currency, or None if unknown"""
+        info = self._network(exchange_name, code, network)
+        if info and info.get('fee') is not None:
+            return float(info['fee'])
+        table = self._tables.get(exchange_name.lower())
+        currency = (table or {}).get('currencies', {}).get(code.upper())
+        if currency and currency.get('fee') is not None:
+            return float(currency['fee'])
+        return None
+
+    def network_status(self, exchange_name: str, code: str, network: str = 'BSC') -> Optional[dict]:
+        """Withdraw/deposit enablement and minimums for a currency on a network, or None if unknown"""
+        return self._network(exchange_name, code, network)
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            exchange_name: {
+                'markets': len(table['trading']),
+                'currencies': len(table['currencies']),
+                'age_seconds': int(now - table.get('loaded_at', now))
+            }
+            for exchange_name, table in self._tables.items()
+        }
@@ -0,0 +1,87 @@
+"""
+Inventory Execution for Crypto Arbitrage Bot
+Both legs of a trade fired at once against inventory pre-positioned on the buy and sell venues
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientInventoryError(Exception):
+    """The inventory a paired trade needs is not free on one of the venues"""
+
+
+class UnhedgedFillError(Exception):
+    """One leg of a paired trade filled and the other did not - the position is open"""
+
+
+async def execute_inventory_legs(
+    executor: Any,
+    scheduler: Any,
+    trade_id: str,
+    requirements: Dict[Tuple[str, str], float],
+    available: Dict[Tuple[str, str], float],
+    buy_leg: Tuple[Any, str, float],
+    sell_leg: Tuple[Any, str, float],
+    amount: float,
+    slippage_tolerance: float,
+    on_leg: Optional[Callable[[str, Any], Awaitable[Any]]] = None
+) -> dict:
+    """
+    Buy and sell `amount` at the same time against inventory already on both venues, each leg placed through
+    executor.execute (an order_execution.OrderExecutor). buy_leg/sell_leg are (exchange, symbol, reference_price). The inventory in requirements is reserved in
+    scheduler.ledger for the duration of the orders (released via scheduler.release even if they fail), so
+    concurrent trades cannot draw the same balance; available holds the free balances it is checked against.
+    on_leg(side, fill_or_exception) is awaited for each leg before the outcome is judged (for logging).
+
+    Returns both fills plus the profit on the matched quantity. Raises InsufficientInventoryError if the
+    reservation fails and UnhedgedFillError if exactly one leg filled; a difference between two partial
+    fills is reported as 'unhedged' for the rebalancer instead.
+    """
+    if not scheduler.ledger.try_reserve(trade_id, requirements, available):
+        shortfall = ', '.join(
+            f"{available.get(key, 0.0):.6f} {key[1]} free on {key[0]} (need {needed:.6f})"
+            for key, needed in requirements.items()
+        )
+        raise InsufficientInventoryError(f"Insufficient inventory: {shortfall}")
+
+    (buy_exchange, buy_symbol, buy_price), (sell_exchange, sell_symbol, sell_price) = buy_leg, sell_leg
+    try:
+        buy, sell = await asyncio.gather(
+            executor.execute(buy_exchange, buy_symbol, 'buy', slippage_tolerance, amount=amount, reference_price=buy_price),
+            executor.execute(sell_exchange, sell_symbol, 'sell', slippage_tolerance, amount=amount, reference_price=sell_price),
+            return_exceptions=True
+        )
+    finally:
+        scheduler.release(trade_id)
+
+    if on_leg:
+        await on_leg('buy', buy)
+        await on_leg('sell', sell)
+
+    bought = 0.0 if isinstance(buy, BaseException) else buy['net_filled']
+    sold = 0.0 if isinstance(sell, BaseException) else sell['filled']
+    if bought <= 0 and sold > 0:
+        raise UnhedgedFillError(f"Buy leg did not fill after the sell filled - {sold:.6f} {sell_symbol} unhedged: {buy}")
+    if sold <= 0 and bought > 0:
+        raise UnhedgedFillError(f"Sell leg did not fill after the buy filled - {bought:.6f} {buy_symbol} unhedged: {sell}")
+    if bought <= 0:
+        raise Exception(f"Neither leg filled. Buy: {buy}; Sell: {sell}")
+
+    # Profit on the matched quantity from the reconciled fills
+    matched = min(bought, sold)
+    buy_cost = buy['cost'] / bought * matched
+    sell_revenue = sell['net_cost'] / sold * matched
+    return {
+        'buy': buy,
+        'sell': sell,
+        'matched': matched,
+        'unhedged': bought - sold,
+        'buy_cost': buy_cost,
+        'sell_revenue': sell_revenue,
+        'profit': sell_revenue - buy_cost,
+        'profit_percent': (sell_revenue - buy_cost) / buy_cost * 100
+    }
@@ -0,0 +1,216 @@
+"""
+Inventory Rebalancer for Crypto Arbitrage Bot
+Target allocations from recent opportunity flow and netted, batched cross-venue transfers
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (exchange, asset)
+Holding = Tuple[str, str]
+# (asset, source exchange, destination exchange)
+Route = Tuple[str, str, str]
+
+
+def compute_targets(flow: Iterable[dict], holdings: Dict[Holding, float]) -> Dict[Holding, float]:
+    """
+    Target balance per (exchange, asset). Each asset's total across venues is split in proportion to
+    recent demand: USDT where tokens are bought, tokens where they are sold (weighted by trade size).
+    Assets without recent demand are left where they are.
+    """
+    demand: Dict[Holding, float] = {}
+    for opportunity in flow:
+        weight = opportunity.get('recommended_usdt_amount') or 1.0
+        buy_key = (opportunity['buy_exchange'].lower(), 'USDT')
+        sell_key = (opportunity['sell_exchange'].lower(), opportunity['token_symbol'])
+        demand[buy_key] = demand.get(buy_key, 0.0) + weight
+        demand[sell_key] = demand.get(sell_key, 0.0) + weight
+
+    totals: Dict[str, float] = {}
+    for (_, asset), amount in holdings.items():
+        totals[asset] = totals.get(asset, 0.0) + amount
+    asset_demand: Dict[str, float] = {}
+    for (_, asset), weight in demand.items():
+        asset_demand[asset] = asset_demand.get(asset, 0.0) + weight
+
+    targets = {}
+    for key in set(holdings) | set(demand):
+        asset = key[1]
+        if asset_demand.get(asset):
+            targets[key] = totals.get(asset, 0.0) * demand.get(key, 0.0) / asset_demand[asset]
+        else:
+            targets[key] = holdings.get(key, 0.0)
+    return targets
+
+
+def plan_transfers(
+    holdings: Dict[Holding, float],
+    targets: Dict[Holding, float],
+    tolerance: float = 0.1
+) -> Dict[Route, float]:
+    """
+    Fewest transfers that bring every venue within tolerance (fraction of the asset's total) of its target.
+    Per asset the largest surplus feeds the largest deficit until one side is used up, so each route carries
+    at most one transfer and an asset over n venues needs at most n - 1 transfers.
+    """
+    plan: Dict[Route, float] = {}
+    assets = {asset for _, asset in set(holdings) | set(targets)}
+    for asset in assets:
+        keys = [key for key in set(holdings) | set(targets) if key[1] == asset]
+        total = sum(holdings.get(key, 0.0) for key in keys)
+        if total <= 0:
+            continue
+        threshold = total * tolerance
+        deficits = {
+            key[0]: targets.get(key, 0.0) - holdings.get(key, 0.0)
+            for key in keys if targets.get(key, 0.0) - holdings.get(key, 0.0) > threshold
+        }
+        surpluses = {
+            key[0]: holdings.get(key, 0.0) - targets.get(key, 0.0)
+            for key in keys if holdings.get(key, 0.0) > targets.get(key, 0.0)
+        }
+        while deficits and surpluses:
+            destination = max(deficits, key=deficits.get)
+            source = max(surpluses, key=surpluses.get)
+            amount = min(deficits[destination], surpluses[source])
+            if amount <= threshold:
+                break
+            plan[(asset, source, destination)] = amount
+            deficits[destination] -= amount
+            surpluses[source] -= amount
+            if deficits[destination] <= threshold:
+                del deficits[destination]
+            if surpluses[source] <= 0:
+                del surpluses[source]
+    return plan
+
+
+class InventoryRebalancer:
+    """
+    Restores venue inventory after inventory-mode trades. Trades only call request(); the rebalance runs
+    batch_window seconds later, so every trade in between is netted into the resulting balances and each
+    asset/route gets a single transfer (one fee, one confirmation wait) per rebalance. An asset with
+    transfers still in flight is not replanned until they settle, since its balances are in motion.
+
+    flow() -> recent opportunities (buy_exchange, sell_exchange, token_symbol, recommended_usdt_amount)
+    holdings(keys) -> {(exchange, asset): balance available to move} - free balance less capital
+        reserved by running trades
+    transfer(asset, source, destination, amount) -> completes when the destination is credited
+    """
+
+    def __init__(
+        self,
+        flow: Callable[[], Awaitable[List[dict]]],
+        holdings: Callable[[List[Holding]], Awaitable[Dict[Holding, float]]],
+        venues: Callable[[], Awaitable[List[str]]],
+        transfer: Callable[[str, str, str, float], Awaitable[Any]],
+        batch_window: float = 60.0,
+        tolerance: float = 0.1
+    ):
+        self.flow = flow
+        self.holdings = holdings
+        self.venues = venues
+        self.transfer = transfer
+        self.batch_window = batch_window
+        self.tolerance = tolerance
+        self._inflight: Dict[Route, float] = {}
+        self._transfers: set = set()
+        self._requested = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_plan: Dict[Route, float] = {}
+        self.last_run: Optional[float] = None
+        self.rebalances = 0
+        self.transfers = 0
+        self.failed_transfers = 0
+
+    def request(self):
+        """Ask for a rebalance at the end of the current batch window"""
+        self._requested.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._requested.wait()
+            await asyncio.sleep(self.batch_window)
+            self._requested.clear()
+            try:
+                await self.rebalance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Inventory rebalance failed: {e}")
+
+    async def plan(self) -> Tuple[Dict[Holding, float], Dict[Holding, float], Dict[Route, float]]:
+        """Current holdings, targets and the transfer plan (assets with transfers in flight are skipped)"""
+        flow, venues = await asyncio.gather(self.flow(), self.venues())
+        venues = [venue.lower() for venue in venues]
+        moving = {asset for asset, _, _ in self._inflight}
+        assets = ({'USDT'} | {opportunity['token_symbol'] for opportunity in flow}) - moving
+        keys = [(venue, asset) for venue in venues for asset in assets]
+        holdings = await self.holdings(keys) if keys else {}
+
+        targets = compute_targets(
+            [opportunity for opportunity in flow
+             if opportunity['buy_exchange'].lower() in venues and opportunity['sell_exchange'].lower() in venues],
+            holdings
+        )
+        return holdings, targets, plan_transfers(holdings, targets, self.tolerance)
+
+    async def rebalance(self) -> Dict[Route, float]:
+        """Plan one rebalance and start its transfers concurrently in the background; returns the plan"""
+        async with self._lock:
+            _, _, plan = await self.plan()
+            self.last_plan = plan
+            self.last_run = time.time()
+            self.rebalances += 1
+            if not plan:
+                return plan
+
+            logger.info(f"Rebalancing inventory: {plan}")
+            self._inflight.update(plan)
+
+            async def run_transfer(route: Route, amount: float):
+                asset, source, destination = route
+                try:
+                    await self.transfer(asset, source, destination, amount)
+                    self.transfers += 1
+                except Exception as e:
+                    self.failed_transfers += 1
+                    logger.error(f"Rebalance transfer of {amount} {asset} {source} -> {destination} failed: {e}")
+                finally:
+                    self._inflight.pop(route, None)
+
+            for route, amount in plan.items():
+                task = asyncio.create_task(run_transfer(route, amount))
+                self._transfers.add(task)
+                task.add_done_callback(self._transfers.discard)
+            return plan
+
+    async def wait_settled(self):
+        """Wait for every in-flight transfer to finish"""
+        await asyncio.gather(*self._transfers, return_exceptions=True)
+
+    async def stop(self):
+        tasks = [self._task] if self._task else []
+        tasks.extend(self._transfers)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            'pending_request': self._requested.is_set(),
+            'inflight': {f"{asset} {source}->{destination}": amount for (asset, source, destination), amount in self._inflight.items()},
+            'last_plan': {f"{asset} {source}->{destination}": amount for (asset, source, destination), amount in self.last_plan.items()},
+            'last_run': self.last_run,
+            'rebalances': self.rebalances,
+            'transfers': self.transfers,
+            'failed_transfers': self.failed_transfers
+        }
@@ -0,0 +1,130 @@
+"""
+Transaction Log Sink for Crypto Arbitrage Bot
+Write-behind queue that persists log records in batches off the trade path
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000  # MongoDB error code: the document is already stored
+
+
+class BatchedLogSink:
+    """
+    Queues records in memory and writes them to db.<collection> with insert_many once batch_size records
+    are waiting or flush_interval seconds after the oldest one arrived. write() never waits on the database;
+    write(record, urgent=True) starts a flush right away, and flush() writes everything queued so far for
+    callers that must see it persisted (terminal states, readers, shutdown). Batches are inserted unordered;
+    only the records that were not stored go back on the queue to be retried, and duplicate-key errors on a
+    retry (the insert had landed before an error or timeout was reported) count as written. Beyond max_queue
+    records the oldest are dropped.
+    """
+
+    def __init__(self, db: Any, collection: str, batch_size: int = 100, flush_interval: float = 1.0, max_queue: int = 50000):
+        self.db = db
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: Deque[dict] = deque()
+        self._arrived = asyncio.Event()
+        self._urgent = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def write(self, record: dict, urgent: bool = False):
+        """Queue a record for the next batch"""
+        self._queue.append(record)
+        if len(self._queue) > self.max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"{self.collection} log queue full - dropped {self.dropped} records so far")
+        self._arrived.set()
+        if urgent or len(self._queue) >= self.batch_size:
+            self._urgent.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._arrived.wait()
+            try:
+                await asyncio.wait_for(self._urgent.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._arrived.clear()
+            self._urgent.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Flushing {self.collection} logs failed, will retry: {e}")
+                self._arrived.set()
+
+    async def flush(self):
+        """Write every queued record now, in batches of batch_size"""
+        async with self._lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                try:
+                    await getattr(self.db, self.collection).insert_many(batch, ordered=False)
+                except Exception as e:
+                    unwritten = self._unwritten(batch, e)
+                    self.written += len(batch) - len(unwritten)
+                    if unwritten:
+                        self.failures += 1
+                        self._queue.extendleft(reversed(unwritten))
+                        raise
+                else:
+                    self.written += len(batch)
+                self.batches += 1
+
+    @staticmethod
+    def _unwritten(batch: List[dict], error: Exception) -> List[dict]:
+        """
+        Records of a failed unordered insert that were not stored. A bulk write error lists the failed
+        indexes; any other error leaves the outcome unknown, so the whole batch is retried - the ids the
+        driver assigned stay on the records, so the ones that did land come back as duplicate keys.
+        """
+        details = getattr(error, 'details', None)
+        write_errors = details.get('writeErrors') if isinstance(details, dict) else None
+        if write_errors is None:
+            return batch
+        return [batch[write_error['index']] for write_error in write_errors if write_error.get('code') != DUPLICATE_KEY]
+
+    async def stop(self):
+        """Stop the background writer after a final flush"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final flush of {self.collection} logs failed, {len(self._queue)} records lost: {e}")
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> dict:
+        return {
+            'queued': len(self._queue),
+            'written': self.written,
+            'batches': self.batches,
+            'failures': self.failures,
+            'dropped': self.dropped
+        }
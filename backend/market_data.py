@@ -0,0 +1,377 @@
+"""
+Market Data Engine for Crypto Arbitrage Bot
+Concurrent, batched ticker acquisition across all configured exchanges
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ScanEngine:
+    """
+    Fan-out ticker fetcher bounded by a global and a per-exchange concurrency limit.
+    A batched fetch_tickers gets batch_timeout (half the call timeout by default); if it times out, per-symbol
+    calls use what is left of call_timeout, so one exchange never takes longer than a single call would.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 20,
+        per_exchange_concurrency: int = 4,
+        call_timeout: float = 10.0,
+        batch_timeout: Optional[float] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_exchange_concurrency = per_exchange_concurrency
+        self.call_timeout = call_timeout
+        self.batch_timeout = call_timeout / 2 if batch_timeout is None else batch_timeout
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._exchange_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphores(self, exchange_name: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        """Get (exchange, global) semaphores, created lazily inside the running loop"""
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        key = exchange_name.lower()
+        if key not in self._exchange_semaphores:
+            self._exchange_semaphores[key] = asyncio.Semaphore(self.per_exchange_concurrency)
+        return self._exchange_semaphores[key], self._global_semaphore
+
+    async def call(self, exchange_name: str, coro_factory, deadline: Optional[float] = None):
+        """
+        Run one exchange request under both limits with a timeout, cut short at deadline (time.monotonic()) if given.
+        The exchange slot is taken first so a slow venue never holds global slots while queueing.
+        """
+        exchange_semaphore, global_semaphore = self._semaphores(exchange_name)
+        async with exchange_semaphore:
+            async with global_semaphore:
+                timeout = self.call_timeout
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError()
+                return await asyncio.wait_for(coro_factory(), timeout=timeout)
+
+    async def fetch_ticker(self, exchange_name: str, instance: Any, symbol: str, deadline: Optional[float] = None) -> Optional[dict]:
+        """Fetch a single ticker, returning None on timeout or error"""
+        try:
+            return await self.call(exchange_name, lambda: instance.fetch_ticker(symbol), deadline)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out fetching {symbol} from {exchange_name}")
+        except Exception as e:
+            logger.warning(f"Error fetching {symbol} from {exchange_name}: {e}")
+        return None
+
+    async def fetch_exchange_tickers(self, exchange_name: str, instance: Any, symbols: List[str]) -> Dict[str, dict]:
+        """
+        Fetch many tickers from one exchange.
+        Uses a single fetch_tickers request where the venue supports it, per-symbol calls otherwise
+        or when the batch fails or times out.
+        """
+        if not symbols:
+            return {}
+        
+        deadline = None
+        has = getattr(instance, 'has', None) or {}
+        if len(symbols) > 1 and has.get('fetchTickers'):
+            started = time.monotonic()
+            try:
+                tickers = await self.call(exchange_name, lambda: instance.fetch_tickers(symbols), started + self.batch_timeout)
+                return {symbol: tickers[symbol] for symbol in symbols if tickers.get(symbol)}
+            except asyncio.TimeoutError:
+                deadline = started + self.call_timeout
+                logger.warning(
+                    f"Timed out fetching {len(symbols)} tickers from {exchange_name} after {self.batch_timeout}s, "
+                    f"falling back to per-symbol for the remaining {max(deadline - time.monotonic(), 0):.1f}s"
+                )
+            except Exception as e:
+                logger.warning(f"Batch ticker fetch failed on {exchange_name}, falling back to per-symbol: {e}")
+        
+        results = await asyncio.gather(*[self.fetch_ticker(exchange_name, instance, symbol, deadline) for symbol in symbols])
+        return {symbol: ticker for symbol, ticker in zip(symbols, results) if ticker}
+
+    async def scan(self, requests: List[Tuple[str, Any, str]]) -> Dict[Tuple[str, str], dict]:
+        """
+        Fetch every (exchange_name, instance, symbol) ticker concurrently,
+        grouping symbols into one batched request per exchange.
+        Returns {(exchange_name, symbol): ticker} for the calls that succeeded.
+        """
+        grouped: Dict[str, Tuple[Any, List[str]]] = {}
+        for exchange_name, instance, symbol in requests:
+            _, symbols = grouped.setdefault(exchange_name, (instance, []))
+            if symbol not in symbols:
+                symbols.append(symbol)
+        
+        exchange_names = list(grouped)
+        results = await asyncio.gather(*[
+            self.fetch_exchange_tickers(exchange_name, *grouped[exchange_name])
+            for exchange_name in exchange_names
+        ])
+        return {
+            (exchange_name, symbol): ticker
+            for exchange_name, tickers in zip(exchange_names, results)
+            for symbol, ticker in tickers.items()
+        }
+
+
+class SymbolIndex:
+    """
+    Per-exchange map of token symbol -> venue market for each supported quote currency.
+    Built from an instance's loaded markets and rebuilt automatically when load_markets replaces them.
+    """
+
+    QUOTE_CURRENCIES = ('USDT', 'FDUSD', 'USDC')
+
+    def __init__(self, quote_currencies: Tuple[str, ...] = QUOTE_CURRENCIES):
+        self.quote_currencies = quote_currencies
+        self._index: Dict[str, Dict[str, Dict[str, dict]]] = {}
+        self._sources: Dict[str, Any] = {}
+
+    def build(self, exchange_name: str, markets: Dict[str, dict]):
+        """Index spot markets as {TOKEN: {QUOTE: {'symbol': unified symbol, 'id': venue market id}}}"""
+        index: Dict[str, Dict[str, dict]] = {}
+        for market in (markets or {}).values():
+            if market.get('spot') is False or market.get('active') is False:
+                continue
+            base = (market.get('base') or '').upper()
+            quote = (market.get('quote') or '').upper()
+            if base and quote in self.quote_currencies:
+                index.setdefault(base, {})[quote] = {'symbol': market['symbol'], 'id': market.get('id')}
+        
+        key = exchange_name.lower()
+        self._index[key] = index
+        self._sources[key] = markets
+        logger.info(f"Indexed {len(index)} tokens on {exchange_name}")
+
+    def _ensure(self, exchange_name: str, instance: Any) -> Dict[str, Dict[str, dict]]:
+        key = exchange_name.lower()
+        markets = getattr(instance, 'markets', None)
+        if self._sources.get(key) is not markets:
+            self.build(exchange_name, markets)
+        return self._index[key]
+
+    def markets_for(self, exchange_name: str, instance: Any, token_symbol: str) -> Dict[str, dict]:
+        """All indexed quote markets for a token, e.g. {'USDT': {...}, 'FDUSD': {...}}"""
+        return self._ensure(exchange_name, instance).get(token_symbol.upper(), {})
+
+    def resolve(self, exchange_name: str, instance: Any, token_symbol: str, quote: str = 'USDT') -> Optional[str]:
+        """Unified market symbol for TOKEN/QUOTE on an exchange, or None if the venue does not list it"""
+        market = self.markets_for(exchange_name, instance, token_symbol).get(quote.upper())
+        return market['symbol'] if market else None
+
+    def forget(self, exchange_name: str):
+        key = exchange_name.lower()
+        self._index.pop(key, None)
+        self._sources.pop(key, None)
+
+
+class TickerCache:
+    """
+    Process-wide ticker cache keyed by (exchange, symbol)
+    Concurrent misses for the same key share one in-flight fetch instead of stampeding the exchange
+    """
+
+    def __init__(self, scan_engine: ScanEngine, ttl: float = 10.0):
+        self.scan_engine = scan_engine
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Tuple[float, dict]] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_fetches = 0
+
+    @staticmethod
+    def _key(exchange_name: str, symbol: str) -> Tuple[str, str]:
+        return exchange_name.lower(), symbol
+
+    def put(self, exchange_name: str, symbol: str, ticker: dict, fetched_at: Optional[float] = None):
+        """Store a ticker obtained elsewhere (e.g. from a stream)"""
+        self._entries[self._key(exchange_name, symbol)] = (fetched_at or time.monotonic(), ticker)
+
+    def get_cached(self, exchange_name: str, symbol: str, max_age: Optional[float] = None) -> Optional[dict]:
+        """Return a cached ticker if it is younger than max_age (defaults to the TTL), without fetching"""
+        max_age = self.ttl if max_age is None else max_age
+        entry = self._entries.get(self._key(exchange_name, symbol))
+        if entry and time.monotonic() - entry[0] <= max_age:
+            return entry[1]
+        return None
+
+    async def get_many(self, requests: List[Tuple[str, Any, str]], max_age: Optional[float] = None) -> Dict[Tuple[str, str], dict]:
+        """
+        Get tickers for (exchange_name, instance, symbol) requests, fetching only stale or missing ones.
+        max_age overrides the TTL for this call; pass 0 to force fresh quotes.
+        Returns {(exchange_name, symbol): ticker}.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        now = time.monotonic()
+        result: Dict[Tuple[str, str], dict] = {}
+        pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        to_fetch: List[Tuple[str, Any, str]] = []
+        
+        for exchange_name, instance, symbol in requests:
+            key = self._key(exchange_name, symbol)
+            entry = self._entries.get(key)
+            if entry and now - entry[0] <= max_age:
+                self.hits += 1
+                result[(exchange_name, symbol)] = entry[1]
+                continue
+            
+            self.misses += 1
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.shared_fetches += 1
+                pending[(exchange_name, symbol)] = inflight
+                continue
+            
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            pending[(exchange_name, symbol)] = future
+            to_fetch.append((exchange_name, instance, symbol))
+        
+        if to_fetch:
+            fetched: Dict[Tuple[str, str], dict] = {}
+            try:
+                fetched = await self._fetch(to_fetch)
+            finally:
+                fetched_at = time.monotonic()
+                for exchange_name, _, symbol in to_fetch:
+                    key = self._key(exchange_name, symbol)
+                    ticker = fetched.get((exchange_name, symbol))
+                    if ticker:
+                        self._entries[key] = (fetched_at, ticker)
+                    future = self._inflight.pop(key, None)
+                    if future is not None and not future.done():
+                        future.set_result(ticker)
+        
+        for request_key, future in pending.items():
+            ticker = await future
+            if ticker:
+                result[request_key] = ticker
+        return result
+
+    async def _fetch(self, requests: List[Tuple[str, Any, str]]) -> Dict[Tuple[str, str], dict]:
+        return await self.scan_engine.scan(requests)
+
+    def stats(self) -> dict:
+        """Cache counters for health/monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared_fetches': self.shared_fetches,
+            'in_flight': len(self._inflight),
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class OrderBookCache(TickerCache):
+    """
+    TTL cache of L2 order books keyed by (exchange, symbol), with the same shared in-flight fetches as TickerCache.
+    Each book is one fetch_order_book call of `depth` levels under the scan engine's limits.
+    """
+
+    def __init__(self, scan_engine: ScanEngine, ttl: float = 10.0, depth: int = 20):
+        super().__init__(scan_engine, ttl)
+        self.depth = depth
+
+    async def _fetch(self, requests: List[Tuple[str, Any, str]]) -> Dict[Tuple[str, str], dict]:
+        async def fetch(exchange_name: str, instance: Any, symbol: str) -> Optional[dict]:
+            try:
+                return await self.scan_engine.call(exchange_name, lambda: instance.fetch_order_book(symbol, self.depth))
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out fetching order book {symbol} from {exchange_name}")
+            except Exception as e:
+                logger.warning(f"Error fetching order book {symbol} from {exchange_name}: {e}")
+            return None
+
+        books = await asyncio.gather(*[fetch(*request) for request in requests])
+        return {(exchange_name, symbol): book for (exchange_name, _, symbol), book in zip(requests, books) if book}
+
+
+class MarketDataPoller:
+    """
+    Background loop that refreshes market data on a fixed schedule
+    and keeps the latest {token_symbol: {exchange_name: ticker}} snapshot in memory
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[], Awaitable[Dict[str, Dict[str, dict]]]],
+        interval: float = 10.0,
+        max_staleness: float = 30.0
+    ):
+        self.refresh = refresh
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.snapshot: Dict[str, Dict[str, dict]] = {}
+        self.updated_at: Optional[float] = None
+        self.cycles = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Launch the polling loop (idempotent)"""
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Market data poller started (every {self.interval}s)")
+
+    async def stop(self):
+        """Cancel the polling loop and wait for it to exit"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Market data poller stopped")
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                self.snapshot = await self.refresh()
+                self.updated_at = time.monotonic()
+                self.cycles += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Market data refresh failed: {e}")
+            self.last_duration = time.monotonic() - started
+            await asyncio.sleep(max(0.0, self.interval - self.last_duration))
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful refresh"""
+        return None if self.updated_at is None else time.monotonic() - self.updated_at
+
+    def get_snapshot(self, max_age: Optional[float] = None) -> Optional[Dict[str, Dict[str, dict]]]:
+        """Return the latest snapshot if it is younger than max_age (defaults to max_staleness), else None"""
+        max_age = self.max_staleness if max_age is None else max_age
+        age = self.age()
+        if age is None or age > max_age:
+            return None
+        return self.snapshot
+
+    def stats(self) -> dict:
+        age = self.age()
+        return {
+            'running': self.is_running,
+            'interval_seconds': self.interval,
+            'snapshot_age_seconds': round(age, 2) if age is not None else None,
+            'tokens': len(self.snapshot),
+            'cycles': self.cycles,
+            'errors': self.errors,
+            'last_duration_seconds': round(self.last_duration, 3)
+        }
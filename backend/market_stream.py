@@ -0,0 +1,260 @@
+"""
+Streaming Market Data for Crypto Arbitrage Bot
+Websocket top-of-book ingestion via ccxt.pro style watch_order_book / watch_ticker
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TopOfBookTable:
+    """Live best bid/ask per (exchange, market symbol)"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], dict] = {}
+        self._listeners: List[Callable[[str, str, dict], None]] = []
+
+    def add_listener(self, callback: Callable[[str, str, dict], None]):
+        """Register a callback(exchange_name, symbol, ticker) invoked on every update"""
+        self._listeners.append(callback)
+
+    def update(
+        self,
+        exchange_name: str,
+        symbol: str,
+        bid: Optional[float],
+        ask: Optional[float],
+        bid_volume: Optional[float] = None,
+        ask_volume: Optional[float] = None,
+        last: Optional[float] = None
+    ) -> dict:
+        """Record a new top-of-book quote and notify listeners"""
+        entry = {
+            'symbol': symbol,
+            'bid': bid,
+            'ask': ask,
+            'bidVolume': bid_volume,
+            'askVolume': ask_volume,
+            'received_at': time.monotonic(),
+            'source': 'stream'
+        }
+        if last is not None:
+            entry['last'] = last
+        self._entries[(exchange_name, symbol)] = entry
+
+        for callback in self._listeners:
+            try:
+                callback(exchange_name, symbol, entry)
+            except Exception as e:
+                logger.warning(f"Top-of-book listener failed: {e}")
+        return entry
+
+    def get(self, exchange_name: str, symbol: str, max_age: Optional[float] = None) -> Optional[dict]:
+        """Return the latest quote, or None if missing or older than max_age seconds"""
+        entry = self._entries.get((exchange_name, symbol))
+        if entry is None:
+            return None
+        if max_age is not None and time.monotonic() - entry['received_at'] > max_age:
+            return None
+        return entry
+
+    def last_update(self, exchange_name: str) -> Optional[float]:
+        """Monotonic time of the most recent update from an exchange"""
+        times = [entry['received_at'] for (name, _), entry in self._entries.items() if name == exchange_name]
+        return max(times) if times else None
+
+    def remove(self, exchange_name: str, symbol: str):
+        self._entries.pop((exchange_name, symbol), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MarketStreamer:
+    """
+    Runs one websocket watch loop per (exchange, market) on venues that support streaming.
+    Clients come from client_factory(exchange_name) and must expose ccxt.pro's
+    has / watch_order_book / watch_ticker / close interface; venues without one are left to REST polling.
+    """
+
+    def __init__(
+        self,
+        table: TopOfBookTable,
+        client_factory: Callable[[str], Awaitable[Optional[Any]]],
+        use_order_book: bool = True,
+        max_age: float = 5.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        self.table = table
+        self.client_factory = client_factory
+        self.use_order_book = use_order_book
+        self.max_age = max_age
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._clients: Dict[str, Any] = {}
+        self._unsupported: Set[str] = set()
+        self._subscriptions: Dict[str, Dict[str, str]] = {}
+        self._tokens: Dict[Tuple[str, str], List[str]] = {}
+        self._tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.errors = 0
+
+    @staticmethod
+    def supports_streaming(client: Any) -> bool:
+        has = getattr(client, 'has', None) or {}
+        return bool(has.get('watchOrderBook') or has.get('watchTicker'))
+
+    async def _get_client(self, exchange_name: str) -> Optional[Any]:
+        if exchange_name in self._clients:
+            return self._clients[exchange_name]
+        if exchange_name in self._unsupported:
+            return None
+
+        try:
+            client = await self.client_factory(exchange_name)
+        except Exception as e:
+            logger.warning(f"Could not create stream client for {exchange_name}: {e}")
+            client = None
+
+        if client is None or not self.supports_streaming(client):
+            self._unsupported.add(exchange_name)
+            if client is not None:
+                await self._close_client(exchange_name, client)
+            logger.info(f"{exchange_name} has no websocket stream - using REST polling")
+            return None
+
+        self._clients[exchange_name] = client
+        return client
+
+    async def sync(self, subscriptions: Dict[str, Dict[str, str]]) -> Set[str]:
+        """
+        Make the running watch loops match {exchange_name: {token_symbol: market_symbol}}.
+        Returns the set of exchanges being streamed; the rest need REST polling.
+        """
+        streamed = set()
+        wanted: Set[Tuple[str, str]] = set()
+
+        for exchange_name, markets in subscriptions.items():
+            client = await self._get_client(exchange_name)
+            if client is None:
+                continue
+
+            listed = getattr(client, 'symbols', None)
+            markets = {
+                token_symbol: market_symbol
+                for token_symbol, market_symbol in markets.items()
+                if not listed or market_symbol in listed
+            }
+            self._subscriptions[exchange_name] = markets
+            streamed.add(exchange_name)
+
+            for market_symbol in markets.values():
+                key = (exchange_name, market_symbol)
+                wanted.add(key)
+                if key not in self._tasks or self._tasks[key].done():
+                    self._tasks[key] = asyncio.create_task(self._watch(exchange_name, client, market_symbol))
+
+        for key in [key for key in self._tasks if key not in wanted]:
+            self._tasks.pop(key).cancel()
+            self.table.remove(*key)
+        for exchange_name in [name for name in self._subscriptions if name not in streamed]:
+            del self._subscriptions[exchange_name]
+
+        self._tokens = {}
+        for exchange_name, markets in self._subscriptions.items():
+            for token_symbol, market_symbol in markets.items():
+                self._tokens.setdefault((exchange_name, market_symbol), []).append(token_symbol)
+        return streamed
+
+    async def _watch(self, exchange_name: str, client: Any, symbol: str):
+        """Consume one market's stream forever, reconnecting with exponential backoff"""
+        has = getattr(client, 'has', None) or {}
+        use_order_book = self.use_order_book and has.get('watchOrderBook')
+        delay = self.reconnect_delay
+
+        while True:
+            try:
+                if use_order_book:
+                    order_book = await client.watch_order_book(symbol, 5)
+                    bids = order_book.get('bids') or []
+                    asks = order_book.get('asks') or []
+                    self.table.update(
+                        exchange_name, symbol,
+                        bids[0][0] if bids else None,
+                        asks[0][0] if asks else None,
+                        bids[0][1] if bids else None,
+                        asks[0][1] if asks else None
+                    )
+                else:
+                    ticker = await client.watch_ticker(symbol)
+                    self.table.update(
+                        exchange_name, symbol,
+                        ticker.get('bid'), ticker.get('ask'),
+                        ticker.get('bidVolume'), ticker.get('askVolume'),
+                        ticker.get('last')
+                    )
+                delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Stream error for {symbol} on {exchange_name}, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def is_live(self, exchange_name: str) -> bool:
+        """True if the exchange is subscribed and has delivered a quote within max_age"""
+        if exchange_name not in self._subscriptions:
+            return False
+        last = self.table.last_update(exchange_name)
+        return last is not None and time.monotonic() - last <= self.max_age
+
+    def tokens_for(self, exchange_name: str, market_symbol: str) -> List[str]:
+        """Tokens subscribed through a market - the market symbol may use a venue alias rather than the token symbol"""
+        return self._tokens.get((exchange_name, market_symbol), [])
+
+    def token_tickers(self, max_age: Optional[float] = None) -> Dict[str, Dict[str, dict]]:
+        """Fresh streamed quotes as {token_symbol: {exchange_name: ticker}}"""
+        max_age = self.max_age if max_age is None else max_age
+        result: Dict[str, Dict[str, dict]] = {}
+        for exchange_name, markets in self._subscriptions.items():
+            for token_symbol, market_symbol in markets.items():
+                entry = self.table.get(exchange_name, market_symbol, max_age)
+                if entry and entry.get('bid') and entry.get('ask'):
+                    result.setdefault(token_symbol, {})[exchange_name] = entry
+        return result
+
+    async def _close_client(self, exchange_name: str, client: Any):
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing stream client {exchange_name}: {e}")
+
+    async def stop(self):
+        """Cancel all watch loops and close stream clients"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        for exchange_name, client in list(self._clients.items()):
+            await self._close_client(exchange_name, client)
+        self._clients.clear()
+        self._subscriptions.clear()
+        self._tokens.clear()
+        self._unsupported.clear()
+
+    def stats(self) -> dict:
+        return {
+            'streaming_exchanges': sorted(self._subscriptions),
+            'live_exchanges': sorted(name for name in self._subscriptions if self.is_live(name)),
+            'rest_only_exchanges': sorted(self._unsupported),
+            'watch_loops': sum(1 for task in self._tasks.values() if not task.done()),
+            'quotes': len(self.table),
+            'errors': self.errors
+        }
@@ -0,0 +1,208 @@
+"""
+Order Execution for Crypto Arbitrage Bot
+Marketable limit/IOC orders capped at the slippage tolerance, with fill polling and reconciliation
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FINAL_ORDER_STATUSES = ('closed', 'canceled', 'cancelled', 'expired', 'rejected')
+
+
+def limit_price(side: str, reference_price: float, slippage_tolerance: float) -> float:
+    """Worst acceptable price: reference +/- slippage_tolerance percent"""
+    factor = 1 + slippage_tolerance / 100 if side == 'buy' else 1 - slippage_tolerance / 100
+    return reference_price * factor
+
+
+def plan_child_orders(levels: List[list], amount: float, cap: float, side: str, max_children: int = 1) -> List[Tuple[float, float]]:
+    """
+    Split amount into at most max_children (price, amount) limit orders across book levels within cap.
+    Each child is priced at the deepest level it is expected to reach, so it only takes that slice of the
+    book; the last child is priced at cap and carries whatever the visible book cannot fill.
+    """
+    if max_children <= 1 or not levels:
+        return [(cap, amount)]
+
+    within = [
+        (float(level[0]), float(level[1])) for level in levels
+        if (float(level[0]) <= cap if side == 'buy' else float(level[0]) >= cap)
+    ]
+    slice_size = amount / max_children
+    children: List[Tuple[float, float]] = []
+    planned = 0.0
+    pending = 0.0
+    for price, size in within:
+        pending += size
+        if pending >= slice_size and len(children) < max_children - 1:
+            take = min(pending, amount - planned)
+            children.append((price, take))
+            planned += take
+            pending = 0.0
+            if planned >= amount:
+                break
+
+    if planned < amount:
+        children.append((cap, amount - planned))
+    return children
+
+
+def summarize_fills(orders: List[dict], base: str, quote: str, cap: float) -> dict:
+    """Reconcile child orders into one fill: amounts, cost, average price and fees by currency"""
+    filled = sum(float(order.get('filled') or 0) for order in orders)
+    cost = 0.0
+    fees: Dict[str, float] = {}
+    for order in orders:
+        order_filled = float(order.get('filled') or 0)
+        order_cost = order.get('cost')
+        if not order_cost and order_filled:
+            order_cost = order_filled * float(order.get('average') or order.get('price') or cap)
+        cost += float(order_cost or 0)
+        for fee in order.get('fees') or ([order['fee']] if order.get('fee') else []):
+            if fee and fee.get('currency') and fee.get('cost'):
+                fees[fee['currency']] = fees.get(fee['currency'], 0.0) + float(fee['cost'])
+
+    return {
+        'id': orders[0].get('id') if orders else None,
+        'order_ids': [order.get('id') for order in orders],
+        'filled': filled,
+        'net_filled': filled - fees.get(base, 0.0),  # Base-currency fees are taken from what was bought
+        'cost': cost,
+        'net_cost': cost - fees.get(quote, 0.0),
+        'average': cost / filled if filled else None,
+        'fees': fees,
+        'limit_price': cap
+    }
+
+
+class OrderExecutor:
+    """
+    Places one leg as marketable limit IOC orders no worse than the slippage tolerance allows, optionally split
+    into child orders across the book, then polls each order until it is final (cancelling it after
+    fill_timeout if the venue kept it open) and reconciles what actually filled. Orders are never retried
+    blindly - an unconfirmed submission could fill twice.
+    """
+
+    def __init__(self, max_children: int = 1, poll_interval: float = 0.5, fill_timeout: float = 10.0, book_depth: int = 20):
+        self.max_children = max_children
+        self.poll_interval = poll_interval
+        self.fill_timeout = fill_timeout
+        self.book_depth = book_depth
+        self.orders = 0
+        self.partial_fills = 0
+        self.market_remainders = 0
+
+    @staticmethod
+    def _to_precision(exchange: Any, method: str, symbol: str, value: float) -> float:
+        try:
+            return float(getattr(exchange, method)(symbol, value))
+        except Exception:
+            return value
+
+    @staticmethod
+    def _min_amount(exchange: Any, symbol: str) -> float:
+        try:
+            return float(exchange.markets[symbol]['limits']['amount']['min'] or 0)
+        except Exception:
+            return 0.0
+
+    async def _settle(self, exchange: Any, symbol: str, order: dict) -> dict:
+        """Poll an order until it is final; cancel whatever is still open after fill_timeout"""
+        if not (getattr(exchange, 'has', None) or {}).get('fetchOrder') or not order.get('id'):
+            return order
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.fill_timeout
+        while order.get('status') not in FINAL_ORDER_STATUSES:
+            if loop.time() >= deadline:
+                try:
+                    await exchange.cancel_order(order['id'], symbol)
+                except Exception as e:
+                    logger.warning(f"Cancel of order {order['id']} on {symbol} failed: {e}")
+                return await exchange.fetch_order(order['id'], symbol)
+            await asyncio.sleep(self.poll_interval)
+            try:
+                order = await exchange.fetch_order(order['id'], symbol)
+            except Exception as e:
+                logger.warning(f"Order status check failed for {order['id']}: {e}")
+        return order
+
+    async def execute(
+        self,
+        exchange: Any,
+        symbol: str,
+        side: str,
+        slippage_tolerance: float,
+        amount: Optional[float] = None,
+        quote_amount: Optional[float] = None,
+        reference_price: Optional[float] = None,
+        market_remainder: bool = False
+    ) -> dict:
+        """
+        Execute one leg and return the reconciled fill (see summarize_fills) plus 'status' ('closed' when
+        fully filled, 'partial' or 'unfilled') and 'remaining'.
+
+        amount is in base currency; for buys quote_amount can be given instead (sized at the limit price,
+        so the cost never exceeds it). reference_price defaults to the top of a fresh order book.
+        market_remainder sends any amount left after the limit orders as a market order - for legs that
+        must exit whatever the price.
+        """
+        base, quote = symbol.split('/')[0], symbol.split('/')[1].split(':')[0]
+        book = None
+        if reference_price is None or self.max_children > 1:
+            book = await exchange.fetch_order_book(symbol, self.book_depth)
+        levels = (book or {}).get('asks' if side == 'buy' else 'bids') or []
+        if reference_price is None:
+            if not levels:
+                raise Exception(f"No {'asks' if side == 'buy' else 'bids'} in the {symbol} order book")
+            reference_price = float(levels[0][0])
+
+        cap = self._to_precision(exchange, 'price_to_precision', symbol, limit_price(side, reference_price, slippage_tolerance))
+        if amount is None:
+            amount = quote_amount / cap
+        amount = self._to_precision(exchange, 'amount_to_precision', symbol, amount)
+        min_amount = self._min_amount(exchange, symbol)
+
+        orders: List[dict] = []
+        carry = 0.0
+        for price, size in plan_child_orders(levels, amount, cap, side, self.max_children):
+            size = self._to_precision(exchange, 'amount_to_precision', symbol, size + carry)
+            if size <= 0 or size < min_amount:
+                carry = size
+                continue
+            price = self._to_precision(exchange, 'price_to_precision', symbol, price)
+            order = await exchange.create_order(symbol, 'limit', side, size, price, {'timeInForce': 'IOC'})
+            self.orders += 1
+            order = await self._settle(exchange, symbol, order)
+            orders.append(order)
+            carry = max(0.0, size - float(order.get('filled') or 0))
+
+        filled = sum(float(order.get('filled') or 0) for order in orders)
+        remaining = self._to_precision(exchange, 'amount_to_precision', symbol, max(0.0, amount - filled))
+        if market_remainder and remaining > 0 and remaining >= min_amount:
+            logger.warning(f"{side} {symbol}: {remaining} unfilled within the slippage cap - sending the rest at market")
+            order = await exchange.create_order(symbol, 'market', side, remaining)
+            self.market_remainders += 1
+            orders.append(await self._settle(exchange, symbol, order))
+
+        result = summarize_fills(orders, base, quote, cap)
+        result['requested'] = amount
+        result['remaining'] = max(0.0, amount - result['filled'])
+        if result['filled'] <= 0:
+            result['status'] = 'unfilled'
+        elif result['remaining'] > max(min_amount, amount * 1e-6):
+            result['status'] = 'partial'
+            self.partial_fills += 1
+        else:
+            result['status'] = 'closed'
+        return result
+
+    def stats(self) -> dict:
+        return {
+            'max_children': self.max_children,
+            'orders': self.orders,
+            'partial_fills': self.partial_fills,
+            'market_remainders': self.market_remainders
+        }
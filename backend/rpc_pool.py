@@ -0,0 +1,276 @@
+"""
+BSC RPC Provider Pool for Crypto Arbitrage Bot
+Health-scored multi-endpoint JSON-RPC routing with hedged reads and failover
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, List, Optional, Tuple
+
+import aiohttp
+from eth_utils import keccak
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+logger = logging.getLogger(__name__)
+
+# Never hedged, and never retried elsewhere after a timeout: the first node may already have broadcast them
+WRITE_METHODS = {'eth_sendRawTransaction', 'eth_sendTransaction'}
+
+# JSON-RPC error codes nodes use for rate limiting / overload
+RATE_LIMIT_CODES = {-32005, -32090, 429}
+RATE_LIMIT_MESSAGES = ('rate limit', 'too many requests')
+
+# Answers to a rebroadcast of a transaction the node already holds
+ALREADY_KNOWN_MESSAGES = ('already known', 'known transaction', 'already imported')
+
+
+class RPCEndpointError(Exception):
+    """Transport failure, timeout, HTTP error or rate limit on one endpoint"""
+
+
+class RPCTimeoutError(RPCEndpointError):
+    """The endpoint did not answer in time - the request may still have been processed"""
+
+
+def is_rate_limited(error: dict) -> bool:
+    """Throttling only - deterministic errors such as "exceeds block gas limit" are answers, not endpoint faults"""
+    message = str(error.get('message', '')).lower()
+    return error.get('code') in RATE_LIMIT_CODES or any(marker in message for marker in RATE_LIMIT_MESSAGES)
+
+
+def accept_known_transactions(payload: bytes, body: bytes) -> bytes:
+    """Replace "already known" errors for eth_sendRawTransaction with the transaction hash"""
+    sent = json.loads(payload)
+    raw_transactions = {
+        item.get('id'): item['params'][0]
+        for item in (sent if isinstance(sent, list) else [sent])
+        if item.get('method') == 'eth_sendRawTransaction' and item.get('params')
+    }
+    if not raw_transactions:
+        return body
+    decoded = json.loads(body)
+    changed = False
+    for item in decoded if isinstance(decoded, list) else [decoded]:
+        error = item.get('error') if isinstance(item, dict) else None
+        message = str(error.get('message', '')).lower() if error else ''
+        if item.get('id') in raw_transactions and any(marker in message for marker in ALREADY_KNOWN_MESSAGES):
+            del item['error']
+            item['result'] = '0x' + keccak(hexstr=raw_transactions[item['id']]).hex()
+            changed = True
+    return json.dumps(decoded).encode() if changed else body
+
+
+class EndpointHealth:
+    """Exponentially weighted latency and error rate for one endpoint"""
+
+    def __init__(self, url: str, alpha: float = 0.2):
+        self.url = url
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.consecutive_errors = 0
+        self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+        self.error_rate *= 1 - self.alpha
+
+    def record_failure(self, cooldown: float, failure_threshold: int):
+        self.requests += 1
+        self.errors += 1
+        self.consecutive_errors += 1
+        self.error_rate += self.alpha * (1 - self.error_rate)
+        if self.consecutive_errors >= failure_threshold:
+            self.cooldown_until = time.monotonic() + cooldown
+
+    def in_cooldown(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def score(self) -> float:
+        """Lower is healthier: expected latency inflated by the recent error rate"""
+        latency = self.latency if self.latency is not None else 0.0  # Untried endpoints get a chance first
+        return latency * (1 + 10 * self.error_rate) + self.error_rate
+
+    def stats(self) -> dict:
+        return {
+            'url': self.url,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 4),
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_cooldown': self.in_cooldown()
+        }
+
+
+class RPCPool:
+    """
+    Routes each JSON-RPC payload to the healthiest endpoint. Reads that have not answered within
+    hedge_delay are also sent to the next endpoint and the first good answer wins; any endpoint
+    failure falls over to the next one. Transaction broadcasts are never hedged and do not fail over
+    after a timeout. Endpoints failing failure_threshold times in a row sit out for cooldown seconds
+    (they are still tried as a last resort).
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        timeout: float = 10.0,
+        hedge_delay: float = 0.5,
+        cooldown: float = 30.0,
+        failure_threshold: int = 3,
+        alpha: float = 0.2
+    ):
+        if not urls:
+            raise ValueError("RPCPool needs at least one endpoint")
+        self.endpoints = [EndpointHealth(url, alpha) for url in urls]
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.cooldown = cooldown
+        self.failure_threshold = failure_threshold
+        self.hedged = 0
+        self.failovers = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def ranked(self) -> List[EndpointHealth]:
+        """Endpoints healthiest first, cooling-down endpoints last"""
+        return sorted(self.endpoints, key=lambda endpoint: (endpoint.in_cooldown(), endpoint.score()))
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Content-Type': 'application/json'}
+            )
+        return self._session
+
+    async def _post(self, endpoint: EndpointHealth, payload: bytes) -> bytes:
+        started = time.monotonic()
+        try:
+            async with self._get_session().post(endpoint.url, data=payload) as response:
+                body = await response.read()
+                if response.status == 429 or response.status >= 500:
+                    raise RPCEndpointError(f"HTTP {response.status}")
+            decoded = json.loads(body)
+            for item in decoded if isinstance(decoded, list) else [decoded]:
+                error = item.get('error') if isinstance(item, dict) else None
+                if error and is_rate_limited(error):
+                    raise RPCEndpointError(f"Rate limited: {error.get('message')}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            endpoint.record_failure(self.cooldown, self.failure_threshold)
+            logger.warning(f"RPC endpoint {endpoint.url} failed: {e}")
+            if isinstance(e, RPCEndpointError):
+                raise
+            if isinstance(e, asyncio.TimeoutError):
+                raise RPCTimeoutError(f"No answer from {endpoint.url} within {self.timeout}s") from e
+            raise RPCEndpointError(str(e) or type(e).__name__) from e
+
+        endpoint.record_success(time.monotonic() - started)
+        return body
+
+    async def request(self, method: str, payload: bytes) -> bytes:
+        """Send an encoded JSON-RPC request (or batch) and return the raw response body"""
+        candidates = self.ranked()
+        if method in WRITE_METHODS:
+            return await self._broadcast(candidates, payload)
+        return await self._hedged(candidates, payload)
+
+    async def _broadcast(self, candidates: List[EndpointHealth], payload: bytes) -> bytes:
+        """
+        Writes fail over only when the endpoint answered with a failure. A timeout is raised as is - the
+        node may have relayed the transaction - and a node that already holds the transaction counts as success.
+        """
+        last_error: Optional[Exception] = None
+        for attempt, endpoint in enumerate(candidates):
+            if attempt:
+                self.failovers += 1
+            try:
+                return accept_known_transactions(payload, await self._post(endpoint, payload))
+            except RPCTimeoutError:
+                raise
+            except RPCEndpointError as e:
+                last_error = e
+        raise RPCEndpointError(f"All RPC endpoints failed: {last_error}")
+
+    async def _hedged(self, candidates: List[EndpointHealth], payload: bytes) -> bytes:
+        remaining = list(candidates)
+        pending = set()
+        last_error: Optional[Exception] = None
+
+        def launch():
+            pending.add(asyncio.ensure_future(self._post(remaining.pop(0), payload)))
+
+        launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Primary is slow - race it against the next endpoint
+                    self.hedged += 1
+                    launch()
+                    continue
+                for task in sorted(done, key=lambda task: task.exception() is not None):
+                    pending.discard(task)
+                    try:
+                        return task.result()
+                    except RPCEndpointError as e:
+                        last_error = e
+                if remaining and not pending:
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise RPCEndpointError(f"All RPC endpoints failed: {last_error}")
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> dict:
+        return {
+            'endpoints': [endpoint.stats() for endpoint in self.ranked()],
+            'hedged_requests': self.hedged,
+            'failovers': self.failovers
+        }
+
+
+class PooledAsyncProvider(AsyncJSONBaseProvider):
+    """web3 async provider that sends every request through an RPCPool"""
+
+    def __init__(self, pool: RPCPool, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    def __str__(self) -> str:
+        return f"RPC pool {[endpoint.url for endpoint in self.pool.endpoints]}"
+
+    async def make_request(self, method, params):
+        raw_response = await self.pool.request(method, self.encode_rpc_request(method, params))
+        return self.decode_rpc_response(raw_response)
+
+    async def make_batch_request(self, requests: List[Tuple[Any, Any]]):
+        methods = {method for method, _ in requests}
+        raw_response = await self.pool.request(
+            next(iter(methods & WRITE_METHODS), 'batch'),
+            self.encode_batch_rpc_request(requests)
+        )
+        response = self.decode_rpc_response(raw_response)
+        if not isinstance(response, list):
+            return response
+        return sorted(response, key=lambda item: item.get('id', 0))
+
+    async def disconnect(self):
+        await self.pool.close()
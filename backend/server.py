@@ -7,7 +7,7 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 import uuid
 from datetime import datetime, timezone, timedelta
 import asyncio
@@ -17,11 +17,33 @@ from cryptography.fernet import Fernet
 import base64
 import hashlib
 import ccxt.async_support as ccxt
+try:
+    import ccxt.pro as ccxtpro  # Websocket streaming (optional)
+except ImportError:
+    ccxtpro = None
 import httpx
 import jwt
-from web3 import Web3
+from web3 import AsyncWeb3, Web3
 from web3.middleware import ExtraDataToPOAMiddleware
 from database_helper import create_database
+from market_data import MarketDataPoller, OrderBookCache, ScanEngine, SymbolIndex, TickerCache
+from market_stream import MarketStreamer, TopOfBookTable
+from fee_registry import FeeRegistry
+from balance_reader import BalanceReader
+from rpc_pool import PooledAsyncProvider, RPCPool, RPCTimeoutError
+from block_watcher import BlockWatcher
+from tx_manager import WalletTransactionManager
+from balance_tracker import BalanceTracker
+from step_graph import StepGraph
+from execution_jobs import AmbiguousStepError, JobCheckpoints, JobPreconditionError, TERMINAL_STATUSES
+from trade_scheduler import TradeScheduler, TransferTimings, exchange_account, wallet_account
+from transfer_tracker import TransferTracker
+from inventory_rebalancer import InventoryRebalancer
+from spread_watch import SpreadWatch
+from order_execution import OrderExecutor
+from inventory_execution import execute_inventory_legs
+from log_sink import BatchedLogSink
+from arbitrage_engine import IncrementalDetector, SpreadMatrix, book_side, depth_confidence, optimize_trade_size, simulate_fills
 
 ROOT_DIR = Path(__file__).parent
 
@@ -47,8 +69,17 @@ API_KEY = os.environ.get('API_KEY', '')  # Set this in .env for production
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
 
 # BSC Network Configuration
-BSC_MAINNET_RPC = "https://bsc-dataseed1.binance.org/"
-BSC_TESTNET_RPC = "https://data-seed-prebsc-1-s1.binance.org:8545/"
+BSC_MAINNET_RPCS = [url.strip() for url in os.environ.get(
+    'BSC_MAINNET_RPC_URLS',
+    'https://bsc-dataseed1.binance.org/,https://bsc-dataseed2.binance.org/,https://bsc-dataseed1.defibit.io/,https://bsc-dataseed1.ninicoin.io/'
+).split(',') if url.strip()]
+BSC_TESTNET_RPCS = [url.strip() for url in os.environ.get(
+    'BSC_TESTNET_RPC_URLS',
+    'https://data-seed-prebsc-1-s1.binance.org:8545/,https://data-seed-prebsc-2-s1.binance.org:8545/'
+).split(',') if url.strip()]
+BSC_RPC_TIMEOUT = float(os.environ.get('BSC_RPC_TIMEOUT', 10))  # Seconds before a BSC RPC call is abandoned
+BSC_RPC_HEDGE_DELAY = float(os.environ.get('BSC_RPC_HEDGE_DELAY', 0.5))  # Seconds before a slow read is also sent to the next endpoint
+BSC_BLOCK_POLL_INTERVAL = float(os.environ.get('BSC_BLOCK_POLL_INTERVAL', 1.0))  # Seconds between chain head polls while transactions are pending
 
 # USDT Contract Addresses (BEP20)
 USDT_MAINNET = "0x55d398326f99059fF775485246999027B3197955"
@@ -59,6 +90,41 @@ MIN_CONFIRMATIONS = 1  # Fast confirmations (30-60 seconds on BSC)
 WITHDRAWAL_TIMEOUT = 1800  # 30 minutes max
 DEPOSIT_TIMEOUT = 1800  # 30 minutes max
 MAX_RETRIES = 3  # For API calls
+INVENTORY_REBALANCE_LOG_ID = "inventory_rebalance"  # Transaction log id of rebalance transfers
+
+# Market Data Scan Configuration
+SCAN_MAX_CONCURRENCY = int(os.environ.get('SCAN_MAX_CONCURRENCY', 20))  # Concurrent ticker calls overall
+SCAN_PER_EXCHANGE_CONCURRENCY = int(os.environ.get('SCAN_PER_EXCHANGE_CONCURRENCY', 4))  # Concurrent calls per exchange
+SCAN_CALL_TIMEOUT = float(os.environ.get('SCAN_CALL_TIMEOUT', 10))  # Seconds per ticker call
+TICKER_CACHE_TTL = float(os.environ.get('TICKER_CACHE_TTL', 10))  # Seconds a cached ticker stays fresh
+MARKET_POLL_ENABLED = os.environ.get('MARKET_POLL_ENABLED', 'true').lower() == 'true'  # Background price poller
+MARKET_POLL_INTERVAL = float(os.environ.get('MARKET_POLL_INTERVAL', 10))  # Seconds between poller refreshes
+MARKET_SNAPSHOT_MAX_AGE = float(os.environ.get('MARKET_SNAPSHOT_MAX_AGE', 30))  # Oldest snapshot endpoints will serve
+MARKET_STREAMING_ENABLED = os.environ.get('MARKET_STREAMING_ENABLED', 'false').lower() == 'true'  # Websocket top-of-book
+BALANCE_POLL_INTERVAL = float(os.environ.get('BALANCE_POLL_INTERVAL', 10))  # Seconds between exchange balance refreshes while waiting
+BALANCE_STREAMING_ENABLED = os.environ.get('BALANCE_STREAMING_ENABLED', 'false').lower() == 'true'  # Private watch_balance via ccxt.pro
+TRANSFER_POLL_FAST_INTERVAL = float(os.environ.get('TRANSFER_POLL_FAST_INTERVAL', 3))  # Seconds between transfer status polls right after a submission
+TRANSFER_POLL_SLOW_INTERVAL = float(os.environ.get('TRANSFER_POLL_SLOW_INTERVAL', 60))  # Longest gap between transfer status polls
+MARKET_STREAM_MAX_AGE = float(os.environ.get('MARKET_STREAM_MAX_AGE', 5))  # Oldest streamed quote treated as live
+SPREAD_CHANGE_THRESHOLD = float(os.environ.get('SPREAD_CHANGE_THRESHOLD', 0.1))  # Spread move (pp) that re-emits an opportunity
+ORDER_BOOK_DEPTH = int(os.environ.get('ORDER_BOOK_DEPTH', 20))  # L2 levels fetched for depth analysis
+ORDER_BOOK_CACHE_TTL = float(os.environ.get('ORDER_BOOK_CACHE_TTL', 10))  # Seconds a cached order book stays fresh for sizing
+MIN_TRADE_SIZE_USDT = float(os.environ.get('MIN_TRADE_SIZE_USDT', 10))  # Smallest size considered when sizing trades
+FEE_REGISTRY_TTL = float(os.environ.get('FEE_REGISTRY_TTL', 21600))  # Seconds before cached fee tables are refetched
+FEE_REGISTRY_CHECK_INTERVAL = float(os.environ.get('FEE_REGISTRY_CHECK_INTERVAL', 300))  # Seconds between staleness checks
+EXECUTION_WORKERS = int(os.environ.get('EXECUTION_WORKERS', 4))  # Arbitrage jobs executed concurrently in the background
+SCHEDULER_RECHECK_INTERVAL = float(os.environ.get('SCHEDULER_RECHECK_INTERVAL', 30))  # Seconds between funding checks for queued trades
+TRANSFER_TRADE_MINUTES = float(os.environ.get('TRANSFER_TRADE_MINUTES', 30))  # Assumed duration of a trade with wallet transfers when no transfer timings are known
+ORDER_MAX_CHILDREN = int(os.environ.get('ORDER_MAX_CHILDREN', 1))  # Child limit orders a leg may be split into across book levels
+ORDER_FILL_TIMEOUT = float(os.environ.get('ORDER_FILL_TIMEOUT', 10))  # Seconds an order may stay open before it is cancelled
+ORDER_POLL_INTERVAL = float(os.environ.get('ORDER_POLL_INTERVAL', 0.5))  # Seconds between order status checks
+LOG_BATCH_SIZE = int(os.environ.get('LOG_BATCH_SIZE', 100))  # Transaction log records per insert_many
+LOG_FLUSH_INTERVAL = float(os.environ.get('LOG_FLUSH_INTERVAL', 1.0))  # Longest a transaction log record waits before it is written
+LOG_MAX_QUEUE = int(os.environ.get('LOG_MAX_QUEUE', 50000))  # Queued transaction log records kept if the database is unavailable
+SPREAD_SAMPLE_INTERVAL = float(os.environ.get('SPREAD_SAMPLE_INTERVAL', 60))  # Seconds between persisted spread samples while monitoring
+INVENTORY_FLOW_WINDOW_HOURS = float(os.environ.get('INVENTORY_FLOW_WINDOW_HOURS', 24))  # Recent opportunities that set inventory targets
+INVENTORY_REBALANCE_BATCH_WINDOW = float(os.environ.get('INVENTORY_REBALANCE_BATCH_WINDOW', 60))  # Seconds of trades netted into one rebalance
+INVENTORY_REBALANCE_TOLERANCE = float(os.environ.get('INVENTORY_REBALANCE_TOLERANCE', 0.1))  # Drift (fraction of an asset's total) left alone
 
 # ERC20 ABI for balance checking and transfers
 ERC20_ABI = [
@@ -263,24 +329,31 @@ class BSCWalletService:
         self.mainnet_w3 = None
         self.testnet_w3 = None
         self._init_connections()
+        self.balance_readers = {
+            True: BalanceReader(self.mainnet_w3),
+            False: BalanceReader(self.testnet_w3)
+        }
+        self.block_watchers = {
+            True: BlockWatcher(self.mainnet_w3, BSC_BLOCK_POLL_INTERVAL),
+            False: BlockWatcher(self.testnet_w3, BSC_BLOCK_POLL_INTERVAL)
+        }
+        self.tx_managers = {
+            True: WalletTransactionManager(self.mainnet_w3, self.block_watchers[True]),
+            False: WalletTransactionManager(self.testnet_w3, self.block_watchers[False])
+        }
     
     def _init_connections(self):
-        """Initialize Web3 connections"""
-        try:
-            self.mainnet_w3 = Web3(Web3.HTTPProvider(BSC_MAINNET_RPC))
-            self.mainnet_w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-            logger.info(f"BSC Mainnet connected: {self.mainnet_w3.is_connected()}")
-        except Exception as e:
-            logger.error(f"Failed to connect to BSC Mainnet: {e}")
+        """Initialize async Web3 clients over RPC endpoint pools (connectivity is checked lazily so startup never blocks on RPC)"""
+        self.mainnet_pool = RPCPool(BSC_MAINNET_RPCS, BSC_RPC_TIMEOUT, BSC_RPC_HEDGE_DELAY)
+        self.testnet_pool = RPCPool(BSC_TESTNET_RPCS, BSC_RPC_TIMEOUT, BSC_RPC_HEDGE_DELAY)
         
-        try:
-            self.testnet_w3 = Web3(Web3.HTTPProvider(BSC_TESTNET_RPC))
-            self.testnet_w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-            logger.info(f"BSC Testnet connected: {self.testnet_w3.is_connected()}")
-        except Exception as e:
-            logger.error(f"Failed to connect to BSC Testnet: {e}")
+        self.mainnet_w3 = AsyncWeb3(PooledAsyncProvider(self.mainnet_pool))
+        self.mainnet_w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+        
+        self.testnet_w3 = AsyncWeb3(PooledAsyncProvider(self.testnet_pool))
+        self.testnet_w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
     
-    def get_web3(self, is_live: bool) -> Web3:
+    def get_web3(self, is_live: bool) -> AsyncWeb3:
         """Get appropriate Web3 instance based on mode"""
         return self.mainnet_w3 if is_live else self.testnet_w3
     
@@ -288,43 +361,63 @@ class BSCWalletService:
         """Get USDT contract address based on mode"""
         return USDT_MAINNET if is_live else USDT_TESTNET
     
-    async def get_bnb_balance(self, address: str, is_live: bool = True) -> float:
-        """Get BNB balance for an address"""
+    async def is_connected(self, is_live: bool) -> bool:
+        """Check RPC connectivity without blocking the event loop"""
+        w3 = self.get_web3(is_live)
+        if not w3:
+            return False
         try:
-            w3 = self.get_web3(is_live)
-            if not w3 or not w3.is_connected():
-                logger.warning("Web3 not connected")
-                return 0.0
-            
-            checksum_address = Web3.to_checksum_address(address)
-            balance_wei = w3.eth.get_balance(checksum_address)
-            balance_bnb = w3.from_wei(balance_wei, 'ether')
-            return float(balance_bnb)
-        except Exception as e:
-            logger.error(f"Error getting BNB balance: {e}")
-            return 0.0
+            return await asyncio.wait_for(w3.is_connected(), BSC_RPC_TIMEOUT)
+        except Exception:
+            return False
     
-    async def get_usdt_balance(self, address: str, is_live: bool = True) -> float:
-        """Get USDT (BEP20) balance for an address"""
+    async def get_balances(self, addresses: List[str], token_addresses: List[str], is_live: bool = True) -> Dict[str, Dict[str, float]]:
+        """BNB and token balances for many addresses in one batched RPC round trip"""
+        return await self.balance_readers[is_live].read(addresses, token_addresses)
+    
+    async def get_wallet_balances(self, address: str, is_live: bool = True) -> tuple:
+        """Get (BNB, USDT) balances for an address in a single batched read"""
         try:
-            w3 = self.get_web3(is_live)
-            if not w3 or not w3.is_connected():
-                logger.warning("Web3 not connected")
-                return 0.0
-            
             usdt_address = self.get_usdt_address(is_live)
-            checksum_address = Web3.to_checksum_address(address)
-            usdt_contract = w3.eth.contract(
-                address=Web3.to_checksum_address(usdt_address),
-                abi=ERC20_ABI
-            )
-            
-            balance = usdt_contract.functions.balanceOf(checksum_address).call()
-            decimals = usdt_contract.functions.decimals().call()
-            return float(balance) / (10 ** decimals)
+            balances = await self.get_balances([address], [usdt_address], is_live)
+            entry = balances[Web3.to_checksum_address(address)]
+            return entry.get('BNB', 0.0), entry.get(Web3.to_checksum_address(usdt_address), 0.0)
         except Exception as e:
-            logger.error(f"Error getting USDT balance: {e}")
-            return 0.0
+            logger.error(f"Error getting wallet balances: {e}")
+            return 0.0, 0.0
+    
+    def get_block_watcher(self, w3: AsyncWeb3) -> BlockWatcher:
+        """Shared block watcher for the chain a Web3 instance is connected to"""
+        for watcher in self.block_watchers.values():
+            if watcher.w3 is w3:
+                return watcher
+        watcher = BlockWatcher(w3, BSC_BLOCK_POLL_INTERVAL)
+        self.block_watchers[id(w3)] = watcher
+        return watcher
+    
+    def get_tx_manager(self, w3: AsyncWeb3) -> WalletTransactionManager:
+        """Shared nonce/gas manager for the chain a Web3 instance is connected to"""
+        for manager in self.tx_managers.values():
+            if manager.w3 is w3:
+                return manager
+        manager = WalletTransactionManager(w3, self.get_block_watcher(w3))
+        self.tx_managers[id(w3)] = manager
+        return manager
+    
+    async def close(self):
+        """Stop block watchers and close RPC pool sessions"""
+        for watcher in self.block_watchers.values():
+            await watcher.stop()
+        await self.mainnet_pool.close()
+        await self.testnet_pool.close()
+    
+    def stats(self) -> dict:
+        return {
+            'mainnet_rpc': self.mainnet_pool.stats(),
+            'testnet_rpc': self.testnet_pool.stats(),
+            'mainnet_blocks': self.block_watchers[True].stats(),
+            'mainnet_transactions': self.tx_managers[True].stats()
+        }
     
     def is_valid_address(self, address: str) -> bool:
         """Check if address is valid"""
@@ -393,6 +486,8 @@ class ArbitrageOpportunity(BaseModel):
     buy_price: float
     sell_price: float
     spread_percent: float
+    net_spread_percent: Optional[float] = None  # Spread after taker fees on both legs
+    expected_net_profit: Optional[float] = None  # Net USDT profit at the recommended size after slippage and fees
     confidence: float
     recommended_usdt_amount: float
     status: str = "detected"  # detected, executing, completed, failed
@@ -434,16 +529,18 @@ class BotSettings(BaseModel):
     is_live_mode: bool = False  # False = Test mode, True = Live mode
     telegram_chat_id: str = ""
     telegram_enabled: bool = False
-    min_spread_threshold: float = 0.5  # Minimum spread % to trigger opportunity
+    min_spread_threshold: float = 0.5  # Minimum spread % before taker fees to trigger opportunity
     max_trade_amount: float = 1000.0
     slippage_tolerance: float = 0.5  # Percentage
     # Fail-safe configuration (FIXED: Realistic values)
     target_sell_spread: float = 2.0  # Target spread % to trigger sell (REALISTIC: was 85%)
-    spread_check_interval: int = 10  # Seconds between spread checks
+    spread_check_interval: int = 10  # Seconds between direct spread checks while the market feed has no fresh quotes
     max_wait_time: int = 600  # Max time to wait for target spread (10 minutes - was 3600)
     # Stop-loss protection
     stop_loss_spread: float = -2.0  # Abort if spread drops below this (negative = loss)
     min_bnb_for_gas: float = 0.05  # Minimum BNB required for gas fees
+    # "transfer" = buy, move tokens via the wallet, sell; "inventory" = both legs at once from pre-positioned funds
+    execution_mode: Literal["transfer", "inventory"] = "transfer"
     updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class SettingsUpdate(BaseModel):
@@ -458,13 +555,14 @@ class SettingsUpdate(BaseModel):
     max_wait_time: Optional[int] = None
     stop_loss_spread: Optional[float] = None
     min_bnb_for_gas: Optional[float] = None
+    execution_mode: Optional[Literal["transfer", "inventory"]] = None
 
 # Fail-safe arbitrage state tracking
 class FailSafeArbitrageState(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     opportunity_id: str
-    status: str = "pending"  # pending, funding_cex_a, bought, withdrawn, funding_cex_b, monitoring, sold, completed, failed
+    status: str = "pending"  # pending, funding_cex_a, bought, withdrawn, funding_cex_b, monitoring, sold, completed, failed, needs_attention
     token_symbol: str
     buy_exchange: str
     sell_exchange: str
@@ -472,6 +570,16 @@ class FailSafeArbitrageState(BaseModel):
     usdt_invested: float = 0.0
     current_spread: float = 0.0
     target_spread: float = 85.0
+    # Everything needed to resume the job after a restart
+    opportunity: Dict[str, Any] = Field(default_factory=dict)
+    slippage_tolerance: float = 0.5
+    telegram_chat_id: Optional[str] = None
+    wallet_address: Optional[str] = None
+    expected_profit_per_minute: float = 0.0  # Scheduler priority
+    step_results: Dict[str, Any] = Field(default_factory=dict)
+    checkpoints: Dict[str, Any] = Field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
     started_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
@@ -490,8 +598,7 @@ async def verify_wallet_balances(wallet_address: str, usdt_amount: float, is_liv
     """
     try:
         # Get current balances
-        bnb_balance = await bsc_service.get_bnb_balance(wallet_address, is_live)
-        usdt_balance = await bsc_service.get_usdt_balance(wallet_address, is_live)
+        bnb_balance, usdt_balance = await bsc_service.get_wallet_balances(wallet_address, is_live)
         
         # Get minimum BNB requirement from settings
         settings = await db.settings.find_one({})
@@ -526,50 +633,69 @@ async def verify_wallet_balances(wallet_address: str, usdt_amount: float, is_liv
             'errors': [f"Failed to fetch balances: {str(e)}"]
         }
 
-async def check_arbitrage_readiness(opportunity: dict, usdt_amount: float, is_live: bool) -> dict:
+async def check_arbitrage_readiness(opportunity: dict, usdt_amount: float, is_live: bool, execution_mode: str = "transfer") -> dict:
     """
     Comprehensive pre-execution check for arbitrage readiness
     Checks: wallet exists, balances sufficient, exchanges configured
+    Inventory mode trades from exchange balances only, so the wallet checks are skipped (inventory is checked at execution)
     """
     issues = []
+    uses_wallet = execution_mode != "inventory"
     
     # Check 1: Wallet configured
     wallet = await db.wallet.find_one({})
-    if not wallet or not wallet.get('address'):
+    if uses_wallet and (not wallet or not wallet.get('address')):
         issues.append("❌ Wallet not configured. Please add wallet in settings.")
         return {'ready': False, 'issues': issues}
     
-    wallet_address = wallet['address']
+    wallet_address = wallet.get('address') if wallet else None
+    
+    # Checks 2-4 are independent lookups
+    balance_check = None
+    checks = [
+        db.exchanges.find_one({'name': opportunity['buy_exchange'], 'is_active': True}),
+        db.exchanges.find_one({'name': opportunity['sell_exchange'], 'is_active': True}),
+        db.tokens.find_one({'symbol': opportunity['token_symbol']})
+    ]
+    if is_live and uses_wallet:
+        checks.append(verify_wallet_balances(wallet_address, usdt_amount, is_live))
+    buy_exchange_doc, sell_exchange_doc, token, *balance_result = await asyncio.gather(*checks)
     
     # Check 2: Balances sufficient (only for live mode)
-    if is_live:
-        balance_check = await verify_wallet_balances(wallet_address, usdt_amount, is_live)
-        if not balance_check['valid']:
+    if balance_result:
+        balance_check = balance_result[0]
+        # USDT tied up in running trades returns to the wallet, so a short wallet queues instead of failing
+        waits_for_capital = (
+            balance_check.get('bnb_sufficient') and not balance_check.get('usdt_sufficient') and trade_scheduler.running > 0
+        )
+        if not balance_check['valid'] and not waits_for_capital:
             issues.extend([f"❌ {err}" for err in balance_check.get('errors', []) if err])
     
     # Check 3: Exchanges configured
-    buy_exchange_doc = await db.exchanges.find_one({'name': opportunity['buy_exchange'], 'is_active': True})
-    sell_exchange_doc = await db.exchanges.find_one({'name': opportunity['sell_exchange'], 'is_active': True})
-    
     if not buy_exchange_doc:
         issues.append(f"❌ Buy exchange '{opportunity['buy_exchange']}' not configured or inactive")
     if not sell_exchange_doc:
         issues.append(f"❌ Sell exchange '{opportunity['sell_exchange']}' not configured or inactive")
     
     # Check 4: Token exists in database
-    token = await db.tokens.find_one({'symbol': opportunity['token_symbol']})
     if not token:
         issues.append(f"❌ Token '{opportunity['token_symbol']}' not found in database")
     
     return {
         'ready': len(issues) == 0,
         'issues': issues,
-        'wallet_address': wallet_address if wallet else None,
-        'balance_check': balance_check if is_live else None
+        'wallet_address': wallet_address,
+        'balance_check': balance_check
     }
 
 # ============== EXCHANGE INSTANCES ==============
 exchange_instances: Dict[str, ccxt.Exchange] = {}
+symbol_index = SymbolIndex()
+scan_engine = ScanEngine(SCAN_MAX_CONCURRENCY, SCAN_PER_EXCHANGE_CONCURRENCY, SCAN_CALL_TIMEOUT)
+ticker_cache = TickerCache(scan_engine, TICKER_CACHE_TTL)
+order_book_cache = OrderBookCache(scan_engine, ORDER_BOOK_CACHE_TTL, ORDER_BOOK_DEPTH)
+fee_registry = FeeRegistry(db, FEE_REGISTRY_TTL, FEE_REGISTRY_CHECK_INTERVAL)
+transfer_timings = TransferTimings(db)
 
 async def get_exchange_instance(exchange_name: str) -> Optional[ccxt.Exchange]:
     """
@@ -589,6 +715,7 @@ async def get_exchange_instance(exchange_name: str) -> Optional[ccxt.Exchange]:
             # Remove invalid instance
             await instance.close()
             del exchange_instances[exchange_key]
+            symbol_index.forget(exchange_key)
     
     # Fetch exchange config from DB - use case-insensitive name match
     exchanges = await db.exchanges.find({"is_active": True}).to_list(100)
@@ -638,8 +765,10 @@ async def get_exchange_instance(exchange_name: str) -> Optional[ccxt.Exchange]:
                     raise
                 await asyncio.sleep(1 * (attempt + 1))
         
-        # Cache instance
+        # Cache instance and index its markets
         exchange_instances[exchange_key] = instance
+        symbol_index.build(exchange_key, instance.markets)
+        fee_registry.ensure_loaded(exchange_key, instance)
         logger.info(f"Successfully created exchange instance for {exchange_name}")
         return instance
         
@@ -647,6 +776,285 @@ async def get_exchange_instance(exchange_name: str) -> Optional[ccxt.Exchange]:
         logger.error(f"Error creating exchange instance for {exchange_name}: {e}")
         return None
 
+def get_taker_fee(exchange_name: str, instance: ccxt.Exchange, symbol: Optional[str] = None, default: float = 0.001) -> float:
+    """Taker fee rate from the fee registry, falling back to ccxt's static fee schedule"""
+    try:
+        default = float(instance.fees.get('trading', {}).get('taker') or default)
+    except Exception:
+        pass
+    return fee_registry.trading_fee(exchange_name, symbol, 'taker', default)
+
+def exchange_taker_fees(exchange_names) -> Dict[str, float]:
+    """Taker fee per exchange name for venues with a live instance (same rates for the detector and the spread matrix)"""
+    return {
+        exchange_name: get_taker_fee(exchange_name, exchange_instances[exchange_name.lower()])
+        for exchange_name in exchange_names
+        if exchange_name.lower() in exchange_instances
+    }
+
+async def list_active_exchange_instances() -> Dict[str, ccxt.Exchange]:
+    """Instances for every active exchange, keyed by lower-cased name"""
+    exchanges = await db.exchanges.find({"is_active": True}, {"_id": 0, "name": 1}).to_list(100)
+    instances = await get_exchange_instances([exchange_doc['name'] for exchange_doc in exchanges])
+    return {name.lower(): instance for name, instance in instances.items()}
+
+async def fetch_order_books(requests: List[tuple], max_age: Optional[float] = None) -> Dict[tuple, dict]:
+    """
+    Get L2 order books for (exchange_name, instance, market_symbol) requests through the shared book cache,
+    fetching stale or missing ones concurrently under the scan limits (max_age=0 forces fresh books)
+    Returns {(exchange_name, market_symbol): order_book} for the books available
+    """
+    return await order_book_cache.get_many(list(dict.fromkeys(requests)), max_age)
+
+_order_book_warmups: set = set()
+
+def warm_order_books(requests: List[tuple]):
+    """Refresh order books in the background so the next reader finds them cached"""
+    task = asyncio.get_running_loop().create_task(fetch_order_books(requests))
+    _order_book_warmups.add(task)
+    task.add_done_callback(_order_book_warmups.discard)
+
+def order_book_requests(pairs: List[dict], instances: Dict[str, ccxt.Exchange]) -> Dict[tuple, tuple]:
+    """Book requests for both legs of each (token, buy venue, sell venue) pair, keyed by (exchange_name, token_symbol)"""
+    requests = {}
+    for pair in pairs:
+        for exchange_name in (pair['buy_exchange'], pair['sell_exchange']):
+            instance = instances.get(exchange_name) or instances.get(exchange_name.lower())
+            market_symbol = resolve_market_symbol(exchange_name, instance, pair['token_symbol']) if instance else None
+            if market_symbol:
+                requests[(exchange_name, pair['token_symbol'])] = (exchange_name, instance, market_symbol)
+    return requests
+
+def resolve_market_symbol(exchange_name: str, instance: ccxt.Exchange, token_symbol: str, quote: str = 'USDT') -> Optional[str]:
+    """Look up the exchange's TOKEN/QUOTE market in the symbol index"""
+    return symbol_index.resolve(exchange_name, instance, token_symbol, quote)
+
+async def get_exchange_instances(exchange_names: List[str]) -> Dict[str, ccxt.Exchange]:
+    """Get instances for several exchanges concurrently, keyed by exchange name"""
+    instances = await asyncio.gather(*[get_exchange_instance(name) for name in exchange_names], return_exceptions=True)
+    return {
+        name: instance
+        for name, instance in zip(exchange_names, instances)
+        if instance and not isinstance(instance, Exception)
+    }
+
+async def collect_token_tickers(
+    token_symbols: List[str],
+    instances: Dict[str, ccxt.Exchange],
+    max_age: Optional[float] = None
+) -> Dict[str, Dict[str, dict]]:
+    """
+    Get {TOKEN}/USDT tickers for every token on every exchange through the shared ticker cache.
+    Misses are fetched in one concurrent scan, batched into a single fetch_tickers request per exchange where supported.
+    Returns {token_symbol: {exchange_name: ticker}}
+    """
+    requests = []
+    request_tokens = {}
+    for token_symbol in token_symbols:
+        for exchange_name, instance in instances.items():
+            market_symbol = resolve_market_symbol(exchange_name, instance, token_symbol)
+            if market_symbol:
+                requests.append((exchange_name, instance, market_symbol))
+                request_tokens[(exchange_name, market_symbol)] = token_symbol
+    
+    tickers = await ticker_cache.get_many(requests, max_age)
+    
+    result: Dict[str, Dict[str, dict]] = {token_symbol: {} for token_symbol in token_symbols}
+    for exchange_name, _, market_symbol in requests:
+        ticker = tickers.get((exchange_name, market_symbol))
+        if ticker:
+            result[request_tokens[(exchange_name, market_symbol)]][exchange_name] = ticker
+    return result
+
+async def create_stream_client(exchange_name: str) -> Optional[Any]:
+    """Create a public ccxt.pro websocket client for an exchange, if ccxt.pro provides one"""
+    if ccxtpro is None:
+        return None
+    exchange_class = getattr(ccxtpro, exchange_name.lower(), None)
+    if not exchange_class:
+        return None
+    client = exchange_class({'enableRateLimit': True, 'options': {'defaultType': 'spot'}})
+    await client.load_markets()
+    return client
+
+async def create_private_stream_client(exchange_name: str) -> Optional[Any]:
+    """Create an authenticated ccxt.pro client (for watch_balance), if ccxt.pro provides one"""
+    if ccxtpro is None:
+        return None
+    exchange_class = getattr(ccxtpro, exchange_name.lower(), None)
+    if not exchange_class:
+        return None
+    exchanges = await db.exchanges.find({"is_active": True}).to_list(100)
+    exchange_doc = next((ex for ex in exchanges if ex.get('name', '').lower() == exchange_name.lower()), None)
+    if not exchange_doc:
+        return None
+    return exchange_class({
+        'apiKey': decrypt_data(exchange_doc['api_key_encrypted']),
+        'secret': decrypt_data(exchange_doc['api_secret_encrypted']),
+        'enableRateLimit': True,
+        'options': {'defaultType': 'spot'}
+    })
+
+def overlay_streamed_tickers(token_tickers: Dict[str, Dict[str, dict]], exchange_names: List[str], max_age: Optional[float] = None) -> Dict[str, Dict[str, dict]]:
+    """Replace polled quotes with live streamed top-of-book where a stream is fresher"""
+    for token_symbol, streamed in market_streamer.token_tickers(max_age).items():
+        if token_symbol not in token_tickers:
+            continue
+        for exchange_name, entry in streamed.items():
+            if exchange_name in exchange_names:
+                polled = token_tickers[token_symbol].get(exchange_name, {})
+                token_tickers[token_symbol][exchange_name] = {**polled, **entry}
+    return token_tickers
+
+async def get_market_tickers(
+    token_symbols: List[str],
+    exchange_names: List[str],
+    max_age: Optional[float] = None
+) -> Dict[str, Dict[str, dict]]:
+    """
+    Get {TOKEN}/USDT tickers, answering from the background poller's snapshot when it is fresh
+    and covers every requested token; otherwise reads through the ticker cache.
+    Live websocket quotes, when streaming is enabled, take precedence over polled ones.
+    Returns {token_symbol: {exchange_name: ticker}}
+    """
+    snapshot = market_poller.get_snapshot(max_age)
+    if snapshot is not None and all(token_symbol in snapshot for token_symbol in token_symbols):
+        token_tickers = {
+            token_symbol: {
+                exchange_name: ticker
+                for exchange_name, ticker in snapshot[token_symbol].items()
+                if exchange_name in exchange_names
+            }
+            for token_symbol in token_symbols
+        }
+    else:
+        instances = await get_exchange_instances(exchange_names)
+        token_tickers = await collect_token_tickers(token_symbols, instances, max_age)
+    
+    return overlay_streamed_tickers(token_tickers, exchange_names, max_age)
+
+async def refresh_market_snapshot() -> Dict[str, Dict[str, dict]]:
+    """
+    Fetch fresh prices for all active tokens on all active exchanges (run by the background poller)
+    With streaming enabled, venues delivering live websocket quotes are skipped and only the rest are polled over REST
+    """
+    tokens = await db.tokens.find({"is_active": True}, {"_id": 0}).to_list(100)
+    exchanges = await db.exchanges.find({"is_active": True}, {"_id": 0}).to_list(100)
+    token_symbols = [token['symbol'] for token in tokens]
+    instances = await get_exchange_instances([exchange_doc['name'] for exchange_doc in exchanges])
+    
+    poll_instances = instances
+    if MARKET_STREAMING_ENABLED:
+        subscriptions = {}
+        for exchange_name, instance in instances.items():
+            markets = {}
+            for token_symbol in token_symbols:
+                market_symbol = resolve_market_symbol(exchange_name, instance, token_symbol)
+                if market_symbol:
+                    markets[token_symbol] = market_symbol
+            subscriptions[exchange_name] = markets
+        await market_streamer.sync(subscriptions)
+        poll_instances = {
+            exchange_name: instance
+            for exchange_name, instance in instances.items()
+            if not market_streamer.is_live(exchange_name)
+        }
+    
+    snapshot = await collect_token_tickers(token_symbols, poll_instances, max_age=0)
+    snapshot = overlay_streamed_tickers(snapshot, list(instances))
+    
+    settings = await db.settings.find_one({}, {"_id": 0})
+    arbitrage_detector.min_spread = settings.get('min_spread_threshold', 0.5) if settings else 0.5
+    feed_arbitrage_detector(snapshot)
+    
+    # Keep depth for the open opportunities warm so /arbitrage/detect sizes them from cached books
+    await fetch_order_books(list(order_book_requests(arbitrage_detector.opportunities(), instances).values()))
+    
+    return snapshot
+
+# ============== INCREMENTAL ARBITRAGE DETECTION ==============
+arbitrage_detector = IncrementalDetector(change_threshold=SPREAD_CHANGE_THRESHOLD)
+_detector_broadcasts: set = set()
+
+def publish_detector_event(event: dict):
+    """Push an opened/changed/closed spread event to websocket clients without blocking the caller"""
+    task = asyncio.get_running_loop().create_task(manager.broadcast({"type": "opportunity_update", **event}))
+    _detector_broadcasts.add(task)
+    task.add_done_callback(_detector_broadcasts.discard)
+
+def feed_arbitrage_detector(token_tickers: Dict[str, Dict[str, dict]]) -> List[dict]:
+    """
+    Apply polled quotes to the incremental detector; only changed quotes trigger re-evaluation.
+    Venues that no longer quote a token are dropped from it. Venues are ranked on the same fee-adjusted
+    net spread as /arbitrage/detect.
+    """
+    events = arbitrage_detector.set_taker_fees(
+        exchange_taker_fees({exchange_name for exchange_tickers in token_tickers.values() for exchange_name in exchange_tickers})
+    )
+    for token_symbol, exchange_tickers in token_tickers.items():
+        for exchange_name in arbitrage_detector.exchanges(token_symbol):
+            if exchange_name not in exchange_tickers:
+                events.append(arbitrage_detector.remove(token_symbol, exchange_name))
+        for exchange_name, ticker in exchange_tickers.items():
+            events.append(arbitrage_detector.update(token_symbol, exchange_name, ticker.get('bid'), ticker.get('ask')))
+            spread_watch.update(token_symbol, exchange_name, ticker.get('bid'), ticker.get('ask'))
+    
+    events = [event for event in events if event]
+    for event in events:
+        publish_detector_event(event)
+    return events
+
+def on_streamed_quote(exchange_name: str, symbol: str, ticker: dict):
+    """Route a live websocket quote into the ticker cache, the incremental detector and spread watches"""
+    ticker_cache.put(exchange_name, symbol, ticker)
+    for token_symbol in market_streamer.tokens_for(exchange_name, symbol):
+        spread_watch.update(token_symbol, exchange_name, ticker.get('bid'), ticker.get('ask'))
+        event = arbitrage_detector.update(token_symbol, exchange_name, ticker.get('bid'), ticker.get('ask'))
+        if event:
+            publish_detector_event(event)
+
+async def refresh_watched_spread(token_symbol: str, buy_exchange_name: str, sell_exchange_name: str):
+    """Fetch a watched pair directly when neither the poller nor a stream is quoting it"""
+    requests = []
+    for exchange_name in (buy_exchange_name, sell_exchange_name):
+        instance = await get_exchange_instance(exchange_name)
+        market_symbol = resolve_market_symbol(exchange_name, instance, token_symbol) if instance else None
+        if market_symbol:
+            requests.append((exchange_name, instance, market_symbol))
+    tickers = await ticker_cache.get_many(requests, max_age=0)
+    for (exchange_name, market_symbol), ticker in tickers.items():
+        spread_watch.update(token_symbol, exchange_name, ticker.get('bid'), ticker.get('ask'))
+
+# Executions wait on spread thresholds; quotes arrive from the poller and streams
+spread_watch = SpreadWatch(refresh_watched_spread)
+
+# ============== EXCHANGE BALANCE TRACKING ==============
+_balance_broadcasts: set = set()
+
+def publish_balance_event(exchange_name: str, asset: str, previous: dict, current: dict):
+    """Push a per-asset exchange balance change to websocket clients"""
+    task = asyncio.get_running_loop().create_task(manager.broadcast({
+        "type": "balance_update",
+        "exchange": exchange_name,
+        "asset": asset,
+        "previous_free": previous['free'],
+        "free": current['free'],
+        "total": current['total']
+    }))
+    _balance_broadcasts.add(task)
+    task.add_done_callback(_balance_broadcasts.discard)
+
+balance_tracker = BalanceTracker(BALANCE_POLL_INTERVAL, create_private_stream_client if BALANCE_STREAMING_ENABLED else None)
+balance_tracker.add_listener(publish_balance_event)
+
+# Withdrawal/deposit status: one fetch_withdrawals/fetch_deposits poll per exchange for all pending transfers
+transfer_tracker = TransferTracker(TRANSFER_POLL_FAST_INTERVAL, TRANSFER_POLL_SLOW_INTERVAL)
+
+top_of_book = TopOfBookTable()
+market_streamer = MarketStreamer(top_of_book, create_stream_client, max_age=MARKET_STREAM_MAX_AGE)
+top_of_book.add_listener(on_streamed_quote)
+market_poller = MarketDataPoller(refresh_market_snapshot, MARKET_POLL_INTERVAL, MARKET_SNAPSHOT_MAX_AGE)
+
 async def close_exchange_instances():
     """Close all exchange instances and clear cache"""
     closed_count = 0
@@ -768,6 +1176,7 @@ async def delete_exchange(exchange_id: str, authenticated: bool = Depends(verify
         except Exception:
             pass
         del exchange_instances[exchange['name'].lower()]
+        symbol_index.forget(exchange['name'])
     return {"status": "deleted"}
 
 @api_router.post("/exchanges/test")
@@ -847,8 +1256,7 @@ async def get_wallet_balance():
     if not address or not bsc_service.is_valid_address(address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
     
-    bnb_balance = await bsc_service.get_bnb_balance(address, is_live)
-    usdt_balance = await bsc_service.get_usdt_balance(address, is_live)
+    bnb_balance, usdt_balance = await bsc_service.get_wallet_balances(address, is_live)
     
     # Update stored balance
     await db.wallet.update_one(
@@ -868,6 +1276,52 @@ async def get_wallet_balance():
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
 
+@api_router.get("/wallet/portfolio")
+async def get_wallet_portfolio():
+    """Fetch BNB, USDT and every active token's balance for the wallet in one batched read"""
+    wallet = await db.wallet.find_one({}, {"_id": 0})
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not configured")
+    
+    settings = await db.settings.find_one({}, {"_id": 0})
+    is_live = settings.get('is_live_mode', False) if settings else False
+    
+    address = wallet.get('address')
+    if not address or not bsc_service.is_valid_address(address):
+        raise HTTPException(status_code=400, detail="Invalid wallet address")
+    
+    tokens = await db.tokens.find({"is_active": True}, {"_id": 0}).to_list(1000)
+    tokens = [token for token in tokens if bsc_service.is_valid_address(token.get('contract_address', ''))]
+    usdt_address = bsc_service.get_usdt_address(is_live)
+    
+    try:
+        balances = await bsc_service.get_balances(
+            [address],
+            [usdt_address] + [token['contract_address'] for token in tokens],
+            is_live
+        )
+    except Exception as e:
+        logger.error(f"Error reading wallet portfolio: {e}")
+        raise HTTPException(status_code=502, detail=f"Failed to read balances: {str(e)}")
+    entry = balances[Web3.to_checksum_address(address)]
+    
+    return {
+        "address": address,
+        "balance_bnb": entry.get('BNB', 0.0),
+        "balance_usdt": entry.get(Web3.to_checksum_address(usdt_address), 0.0),
+        "tokens": [
+            {
+                "token_id": token['id'],
+                "symbol": token['symbol'],
+                "contract_address": token['contract_address'],
+                "balance": entry.get(Web3.to_checksum_address(token['contract_address']))
+            }
+            for token in tokens
+        ],
+        "network": "BSC Mainnet" if is_live else "BSC Testnet",
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+
 @api_router.put("/wallet/balance")
 async def update_wallet_balance(balance_bnb: float = 0, balance_usdt: float = 0):
     await db.wallet.update_one(
@@ -878,59 +1332,74 @@ async def update_wallet_balance(balance_bnb: float = 0, balance_usdt: float = 0)
 
 # ============== PRICE MONITORING ==============
 @api_router.get("/prices/{symbol}")
-async def get_prices(symbol: str):
-    """Get prices for a symbol across all configured exchanges"""
+async def get_prices(symbol: str, max_age: Optional[float] = None):
+    """Get prices for a symbol across all configured exchanges (max_age overrides the ticker cache TTL)"""
     exchanges = await db.exchanges.find({"is_active": True}, {"_id": 0}).to_list(100)
-    prices = []
-    
-    for exchange_doc in exchanges:
-        try:
-            instance = await get_exchange_instance(exchange_doc['name'])
-            if instance and symbol in instance.symbols:
-                ticker = await instance.fetch_ticker(symbol)
-                prices.append({
-                    "exchange": exchange_doc['name'],
-                    "symbol": symbol,
-                    "bid": ticker.get('bid', 0) or 0,
-                    "ask": ticker.get('ask', 0) or 0,
-                    "last": ticker.get('last', 0) or 0,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                })
-        except Exception as e:
-            logger.warning(f"Error fetching price from {exchange_doc['name']}: {e}")
+    exchange_names = [exchange_doc['name'] for exchange_doc in exchanges]
+    
+    base, _, quote = symbol.partition('/')
+    snapshot = market_poller.get_snapshot(max_age)
+    if snapshot is not None and quote == 'USDT' and base in snapshot:
+        exchange_tickers = {
+            exchange_name: ticker
+            for exchange_name, ticker in snapshot[base].items()
+            if exchange_name in exchange_names
+        }
+    else:
+        # Each venue's market for the pair comes from the symbol index, as for every other price path
+        instances = await get_exchange_instances(exchange_names)
+        requests = []
+        for exchange_name, instance in instances.items():
+            market_symbol = resolve_market_symbol(exchange_name, instance, base, quote or 'USDT')
+            if market_symbol:
+                requests.append((exchange_name, instance, market_symbol))
+        tickers = await ticker_cache.get_many(requests, max_age)
+        exchange_tickers = {
+            exchange_name: tickers[(exchange_name, market_symbol)]
+            for exchange_name, _, market_symbol in requests
+            if (exchange_name, market_symbol) in tickers
+        }
     
-    return prices
+    # Streams are subscribed per token against USDT, so only those pairs take the live overlay
+    if quote in ('', 'USDT'):
+        exchange_tickers = overlay_streamed_tickers({base: exchange_tickers}, exchange_names, max_age)[base]
+    
+    return [
+        {
+            "exchange": exchange_name,
+            "symbol": symbol,
+            "bid": ticker.get('bid', 0) or 0,
+            "ask": ticker.get('ask', 0) or 0,
+            "last": ticker.get('last', 0) or 0,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        for exchange_name, ticker in exchange_tickers.items()
+    ]
 
 @api_router.get("/prices/all/tokens")
-async def get_all_token_prices():
-    """Get prices for all monitored tokens across all exchanges"""
+async def get_all_token_prices(max_age: Optional[float] = None):
+    """Get prices for all monitored tokens across all exchanges (max_age overrides the ticker cache TTL)"""
     tokens = await db.tokens.find({"is_active": True}, {"_id": 0}).to_list(100)
     exchanges = await db.exchanges.find({"is_active": True}, {"_id": 0}).to_list(100)
     
+    token_tickers = await get_market_tickers(
+        [token['symbol'] for token in tokens],
+        [exchange_doc['name'] for exchange_doc in exchanges],
+        max_age
+    )
+    
     all_prices = []
     
     for token in tokens:
-        symbol = f"{token['symbol']}/USDT"
-        token_prices = []
-        
-        for exchange_doc in exchanges:
-            try:
-                instance = await get_exchange_instance(exchange_doc['name'])
-                if instance:
-                    # Try different symbol formats
-                    symbols_to_try = [symbol, symbol.upper(), symbol.lower()]
-                    for sym in symbols_to_try:
-                        if sym in instance.symbols:
-                            ticker = await instance.fetch_ticker(sym)
-                            token_prices.append({
-                                "exchange": exchange_doc['name'],
-                                "bid": ticker.get('bid', 0) or 0,
-                                "ask": ticker.get('ask', 0) or 0,
-                                "last": ticker.get('last', 0) or 0,
-                            })
-                            break
-            except Exception as e:
-                logger.warning(f"Error fetching {symbol} from {exchange_doc['name']}: {e}")
+        token_prices = [
+            {
+                "exchange": exchange_name,
+                "bid": ticker.get('bid', 0) or 0,
+                "ask": ticker.get('ask', 0) or 0,
+                "last": ticker.get('last', 0) or 0,
+            }
+            for exchange_name, ticker in token_tickers.get(token['symbol'], {}).items()
+        ]
         
         if token_prices:
             all_prices.append({
@@ -943,66 +1412,91 @@ async def get_all_token_prices():
 
 # ============== ARBITRAGE DETECTION ==============
 @api_router.get("/arbitrage/detect")
-async def detect_arbitrage_opportunities():
-    """Detect arbitrage opportunities across all tokens and exchanges"""
+async def detect_arbitrage_opportunities(max_age: Optional[float] = None):
+    """Detect arbitrage opportunities across all tokens and exchanges (max_age overrides the ticker cache TTL)"""
     tokens = await db.tokens.find({"is_active": True}, {"_id": 0}).to_list(100)
     exchanges = await db.exchanges.find({"is_active": True}, {"_id": 0}).to_list(100)
     settings = await db.settings.find_one({}, {"_id": 0})
     min_spread = settings.get('min_spread_threshold', 0.5) if settings else 0.5
     
-    opportunities = []
+    token_tickers = await get_market_tickers(
+        [token['symbol'] for token in tokens],
+        [exchange_doc['name'] for exchange_doc in exchanges],
+        max_age
+    )
     
-    for token in tokens:
-        symbol = f"{token['symbol']}/USDT"
-        prices = []
-        
-        for exchange_doc in exchanges:
-            try:
-                instance = await get_exchange_instance(exchange_doc['name'])
-                if instance:
-                    symbols_to_try = [symbol, symbol.upper(), symbol.lower()]
-                    for sym in symbols_to_try:
-                        if sym in instance.symbols:
-                            ticker = await instance.fetch_ticker(sym)
-                            if ticker.get('bid') and ticker.get('ask'):
-                                prices.append({
-                                    "exchange": exchange_doc['name'],
-                                    "bid": ticker['bid'],
-                                    "ask": ticker['ask'],
-                                })
-                            break
-            except Exception as e:
-                logger.warning(f"Error in arbitrage detection for {symbol} on {exchange_doc['name']}: {e}")
-        
-        # Find arbitrage opportunities
-        if len(prices) >= 2:
-            # Find lowest ask (buy) and highest bid (sell)
-            lowest_ask = min(prices, key=lambda x: x['ask'])
-            highest_bid = max(prices, key=lambda x: x['bid'])
-            
-            if lowest_ask['exchange'] != highest_bid['exchange']:
-                spread = highest_bid['bid'] - lowest_ask['ask']
-                spread_percent = (spread / lowest_ask['ask']) * 100
-                
-                if spread_percent > min_spread:
-                    # Calculate confidence (simplified)
-                    confidence = min(95, 50 + spread_percent * 5)
-                    
-                    # Calculate recommended amount based on spread
-                    recommended_amount = min(1000, max(100, spread_percent * 100))
-                    
-                    opportunity = ArbitrageOpportunity(
-                        token_id=token['id'],
-                        token_symbol=token['symbol'],
-                        buy_exchange=lowest_ask['exchange'],
-                        sell_exchange=highest_bid['exchange'],
-                        buy_price=lowest_ask['ask'],
-                        sell_price=highest_bid['bid'],
-                        spread_percent=round(spread_percent, 4),
-                        confidence=round(confidence, 2),
-                        recommended_usdt_amount=round(recommended_amount, 2)
-                    )
-                    opportunities.append(opportunity.model_dump())
+    # Push spread changes to websocket clients; only quotes that changed since the last scan are re-evaluated
+    arbitrage_detector.min_spread = min_spread
+    feed_arbitrage_detector(token_tickers)
+    
+    # Rank every (buy venue, sell venue) pair above the gross min_spread_threshold by its spread after taker fees
+    exchange_names = [exchange_doc['name'] for exchange_doc in exchanges]
+    taker_fees = exchange_taker_fees(exchange_names)
+    spread_matrix = SpreadMatrix.from_tickers(token_tickers, exchange_names, taker_fees)
+    token_ids = {token['symbol']: token['id'] for token in tokens}
+    candidates = spread_matrix.opportunities(min_spread)
+    
+    # L2 depth for both legs comes from the book cache (kept warm by the poller) within the snapshot staleness
+    # bound; stale or missing books are refreshed in the background and candidates without one fall back to
+    # the spread heuristic this time
+    book_requests = order_book_requests(candidates, exchange_instances)
+    stale_books = [
+        request for request in book_requests.values()
+        if order_book_cache.get_cached(request[0], request[2]) is None
+    ]
+    if stale_books:
+        warm_order_books(stale_books)
+    
+    def order_book_for(exchange_name: str, token_symbol: str) -> Optional[dict]:
+        request = book_requests.get((exchange_name, token_symbol))
+        return order_book_cache.get_cached(exchange_name, request[2], MARKET_SNAPSHOT_MAX_AGE) if request else None
+    
+    max_trade_amount = settings.get('max_trade_amount', 1000.0) if settings else 1000.0
+    
+    opportunities = []
+    seen_tokens = set()
+    
+    # Candidates come widest net spread first; each token keeps its best pair that survives the depth check
+    for pair in candidates:
+        if pair['token_symbol'] in seen_tokens:
+            continue
+        spread_percent = pair['spread_percent']
+        buy_book = order_book_for(pair['buy_exchange'], pair['token_symbol'])
+        sell_book = order_book_for(pair['sell_exchange'], pair['token_symbol'])
+        expected_net_profit = None
+        
+        if buy_book and sell_book:
+            # Size the trade to maximize net profit after walking both books
+            depth = optimize_trade_size(
+                buy_book, sell_book,
+                taker_fees.get(pair['buy_exchange'], 0.001), taker_fees.get(pair['sell_exchange'], 0.001),
+                min_size=MIN_TRADE_SIZE_USDT, max_size=max_trade_amount
+            )
+            if depth is None:
+                continue  # Top-of-book spread does not survive slippage at any size
+            confidence = depth_confidence(depth)
+            recommended_amount = depth['size']
+            expected_net_profit = round(depth['net_profit'], 4)
+        else:
+            # No depth available: fall back to the spread heuristic
+            confidence = min(95, 50 + spread_percent * 5)
+            recommended_amount = min(1000, max(100, spread_percent * 100))
+        
+        opportunity = ArbitrageOpportunity(
+            token_id=token_ids[pair['token_symbol']],
+            token_symbol=pair['token_symbol'],
+            buy_exchange=pair['buy_exchange'],
+            sell_exchange=pair['sell_exchange'],
+            buy_price=pair['buy_price'],
+            sell_price=pair['sell_price'],
+            spread_percent=round(spread_percent, 4),
+            net_spread_percent=round(pair['net_spread_percent'], 4),
+            expected_net_profit=expected_net_profit,
+            confidence=round(confidence, 2),
+            recommended_usdt_amount=round(recommended_amount, 2)
+        )
+        opportunities.append(opportunity.model_dump())
+        seen_tokens.add(pair['token_symbol'])
     
     # Save opportunities to DB
     if opportunities:
@@ -1010,8 +1504,10 @@ async def detect_arbitrage_opportunities():
         
         # Send Telegram notifications for new opportunities
         if settings and settings.get('telegram_enabled') and settings.get('telegram_chat_id'):
-            for opp in opportunities:
-                await telegram_notifier.notify_opportunity(settings['telegram_chat_id'], opp)
+            await asyncio.gather(*(
+                telegram_notifier.notify_opportunity(settings['telegram_chat_id'], opp)
+                for opp in opportunities
+            ))
     
     return opportunities
 
@@ -1025,34 +1521,26 @@ async def get_arbitrage_opportunities():
     return opportunities
 
 @api_router.post("/arbitrage/manual-selection")
-async def create_manual_selection(selection: ManualSelectionCreate):
-    """Create a manual CEX selection for arbitrage"""
+async def create_manual_selection(selection: ManualSelectionCreate, max_age: Optional[float] = None):
+    """Create a manual CEX selection for arbitrage (max_age overrides the ticker cache TTL)"""
     token = await db.tokens.find_one({"id": selection.token_id}, {"_id": 0})
     if not token:
         raise HTTPException(status_code=404, detail="Token not found")
     
     # Get current prices for the manual selection
-    symbol = f"{token['symbol']}/USDT"
     buy_price = 0
     sell_price = 0
     
     try:
-        buy_instance = await get_exchange_instance(selection.buy_exchange)
-        sell_instance = await get_exchange_instance(selection.sell_exchange)
-        
-        if buy_instance:
-            for sym in [symbol, symbol.upper(), symbol.lower()]:
-                if sym in buy_instance.symbols:
-                    ticker = await buy_instance.fetch_ticker(sym)
-                    buy_price = ticker.get('ask', 0) or 0
-                    break
-        
-        if sell_instance:
-            for sym in [symbol, symbol.upper(), symbol.lower()]:
-                if sym in sell_instance.symbols:
-                    ticker = await sell_instance.fetch_ticker(sym)
-                    sell_price = ticker.get('bid', 0) or 0
-                    break
+        token_tickers = await get_market_tickers(
+            [token['symbol']],
+            [selection.buy_exchange, selection.sell_exchange],
+            max_age
+        )
+        exchange_tickers = token_tickers.get(token['symbol'], {})
+        
+        buy_price = exchange_tickers.get(selection.buy_exchange, {}).get('ask', 0) or 0
+        sell_price = exchange_tickers.get(selection.sell_exchange, {}).get('bid', 0) or 0
     except Exception as e:
         logger.error(f"Error fetching prices for manual selection: {e}")
     
@@ -1105,6 +1593,7 @@ async def execute_arbitrage(request: ExecuteArbitrageRequest, authenticated: boo
     telegram_enabled = settings.get('telegram_enabled', False) if settings else False
     telegram_chat_id = settings.get('telegram_chat_id', '') if settings else ''
     slippage_tolerance = settings.get('slippage_tolerance', 0.5) if settings else 0.5
+    execution_mode = settings.get('execution_mode', 'transfer') if settings else 'transfer'
     
     # SAFETY CHECK: Require confirmation for live trading
     if is_live and not request.confirmed:
@@ -1114,7 +1603,7 @@ async def execute_arbitrage(request: ExecuteArbitrageRequest, authenticated: boo
         )
     
     # ============== PRE-EXECUTION READINESS CHECK ==============
-    readiness = await check_arbitrage_readiness(opportunity, request.usdt_amount, is_live)
+    readiness = await check_arbitrage_readiness(opportunity, request.usdt_amount, is_live, execution_mode)
     if not readiness['ready']:
         error_msg = "Pre-execution checks failed:\n" + "\n".join(readiness['issues'])
         raise HTTPException(status_code=400, detail=error_msg)
@@ -1138,12 +1627,24 @@ async def execute_arbitrage(request: ExecuteArbitrageRequest, authenticated: boo
             # ============== FULL ARBITRAGE WITH TRANSFERS ==============
             # Check if wallet is configured for full arbitrage
             wallet = await db.wallet.find_one({}, {"_id": 0})
-            if wallet and wallet.get('address'):
-                # Use full arbitrage with wallet transfers
-                result = await execute_full_arbitrage_with_transfers(opportunity, request.usdt_amount, slippage_tolerance, telegram_chat_id if telegram_enabled else None)
+            if execution_mode != 'inventory' and wallet and wallet.get('address'):
+                # Full arbitrage with wallet transfers runs as a durable background job
+                job = create_arbitrage_job(
+                    opportunity, request.usdt_amount, slippage_tolerance,
+                    telegram_chat_id if telegram_enabled else None,
+                    settings.get('target_sell_spread', 85.0) if settings else 85.0,
+                    wallet['address']
+                )
+                job_id = await trade_scheduler.submit(job)
+                return {
+                    "status": "queued",
+                    "job_id": job_id,
+                    "opportunity_id": request.opportunity_id,
+                    "is_live": True
+                }
             else:
-                # Fallback to legacy arbitrage (requires pre-positioned funds)
-                result = await execute_real_arbitrage(opportunity, request.usdt_amount, slippage_tolerance, telegram_chat_id if telegram_enabled else None)
+                # Both legs at once from pre-positioned funds (also the fallback without a wallet)
+                result = await execute_inventory_arbitrage(opportunity, request.usdt_amount, slippage_tolerance, telegram_chat_id if telegram_enabled else None)
         else:
             # ============== SIMULATED EXECUTION ==============
             result = await execute_simulated_arbitrage(opportunity, request.usdt_amount)
@@ -1167,6 +1668,7 @@ async def execute_arbitrage(request: ExecuteArbitrageRequest, authenticated: boo
             "is_live": is_live
         })
         
+        await flush_transaction_logs()
         return result
         
     except Exception as e:
@@ -1183,6 +1685,7 @@ async def execute_arbitrage(request: ExecuteArbitrageRequest, authenticated: boo
         if telegram_enabled and telegram_chat_id:
             await telegram_notifier.notify_error(telegram_chat_id, error_msg, f"Executing arbitrage {request.opportunity_id}")
         
+        await flush_transaction_logs()
         raise HTTPException(status_code=500, detail=f"Arbitrage execution failed: {error_msg}")
 
 async def send_telegram_message(chat_id: str, message: str) -> bool:
@@ -1216,47 +1719,74 @@ async def check_arbitrage_profitability(opportunity: dict, usdt_amount: float, b
     try:
         token = opportunity['token_symbol']
         
-        # 1. Get trading fees
-        buy_fees = await buy_exchange.fetch_trading_fees()
-        sell_fees = await sell_exchange.fetch_trading_fees()
+        buy_symbol = resolve_market_symbol(opportunity['buy_exchange'], buy_exchange, token) or f"{token}/USDT"
+        sell_symbol = resolve_market_symbol(opportunity['sell_exchange'], sell_exchange, token) or f"{token}/USDT"
         
-        buy_fee_rate = buy_fees.get('trading', {}).get('maker', 0.001)  # Default 0.1%
-        sell_fee_rate = sell_fees.get('trading', {}).get('taker', 0.001)
+        # 1. Get trading fees (cached in the fee registry, no network round trip)
+        buy_fee_rate = get_taker_fee(opportunity['buy_exchange'], buy_exchange, buy_symbol)
+        sell_fee_rate = get_taker_fee(opportunity['sell_exchange'], sell_exchange, sell_symbol)
         
-        # 2. Get withdrawal fees
-        buy_currencies = await buy_exchange.fetch_currencies()
-        token_info = buy_currencies.get(token, {})
-        withdrawal_fee = token_info.get('fee', 0)  # Withdrawal fee in token amount
-        withdrawal_fee_usdt = withdrawal_fee * opportunity['buy_price'] if withdrawal_fee else 5  # Estimate $5 if unknown
+        # 2. Get withdrawal fees for the BSC network
+        withdrawal_fee = fee_registry.withdrawal_fee(opportunity['buy_exchange'], token, 'BSC')  # Withdrawal fee in token amount
+        withdrawal_fee_usdt = withdrawal_fee * opportunity['buy_price'] if withdrawal_fee is not None else 5  # Estimate $5 if unknown
         
         # 3. Calculate gas fees for wallet transfers (BSC is cheap)
         gas_fee_estimate = 0.50  # ~$0.50 for BSC token transfer
         
-        # 4. Calculate total costs
-        token_amount = usdt_amount / opportunity['buy_price']
+        # 4. Price both legs at their order-book VWAP for this size (top-of-book if depth is unavailable)
+        buy_price = opportunity['buy_price']
+        sell_price = opportunity['sell_price']
+        books = await fetch_order_books([
+            (opportunity['buy_exchange'], buy_exchange, buy_symbol),
+            (opportunity['sell_exchange'], sell_exchange, sell_symbol)
+        ], max_age=0)
+        buy_book = books.get((opportunity['buy_exchange'], buy_symbol))
+        sell_book = books.get((opportunity['sell_exchange'], sell_symbol))
+        if buy_book and sell_book:
+            fills = simulate_fills(*book_side(buy_book.get('asks')), *book_side(sell_book.get('bids')), [usdt_amount])
+            if fills['fillable'][0]:
+                buy_price = float(fills['buy_vwap'][0])
+                sell_price = float(fills['sell_vwap'][0])
+        
+        # 5. Calculate total costs
+        token_amount = usdt_amount / buy_price
         
         buy_fee = usdt_amount * buy_fee_rate
-        sell_fee = (token_amount * opportunity['sell_price']) * sell_fee_rate
+        sell_fee = (token_amount * sell_price) * sell_fee_rate
         total_fees = buy_fee + sell_fee + withdrawal_fee_usdt + gas_fee_estimate
         
-        # 5. Calculate profit
-        gross_revenue = token_amount * opportunity['sell_price']
+        # 6. Calculate profit
+        gross_revenue = token_amount * sell_price
         net_revenue = gross_revenue - sell_fee
         total_cost = usdt_amount + buy_fee + withdrawal_fee_usdt + gas_fee_estimate
         
         net_profit = net_revenue - total_cost
         profit_percent = (net_profit / total_cost) * 100 if total_cost > 0 else 0
         
+        # 7. Make sure the token can actually move over BSC (unknown status is assumed open)
+        withdraw_network = fee_registry.network_status(opportunity['buy_exchange'], token, 'BSC') or {}
+        deposit_network = fee_registry.network_status(opportunity['sell_exchange'], token, 'BSC') or {}
+        transfer_available = (
+            withdraw_network.get('withdraw') is not False
+            and deposit_network.get('deposit') is not False
+            and token_amount >= (withdraw_network.get('min_withdraw') or 0)
+        )
+        
         return {
-            'is_profitable': net_profit > 0,
+            'is_profitable': net_profit > 0 and transfer_available,
+            'transfer_available': transfer_available,
             'net_profit': net_profit,
             'profit_percent': profit_percent,
             'total_fees': total_fees,
+            'buy_vwap': buy_price,
+            'sell_vwap': sell_price,
             'breakdown': {
                 'buy_fee': buy_fee,
                 'sell_fee': sell_fee,
                 'withdrawal_fee': withdrawal_fee_usdt,
-                'gas_fee': gas_fee_estimate
+                'gas_fee': gas_fee_estimate,
+                'buy_slippage': usdt_amount - token_amount * opportunity['buy_price'],
+                'sell_slippage': token_amount * (opportunity['sell_price'] - sell_price)
             },
             'min_spread_required': (total_fees / usdt_amount) * 100
         }
@@ -1298,10 +1828,12 @@ async def withdraw_from_exchange_to_wallet(
     token: str,
     amount: float,
     wallet_address: str,
-    opportunity_id: str
+    opportunity_id: str,
+    tag: Optional[str] = None
 ) -> dict:
     """
     Withdraw tokens from exchange to wallet with retries
+    (or to another exchange's deposit address, which may need a tag/memo)
     """
     await log_transaction(opportunity_id, f"withdraw_from_{exchange_name}", "started", {
         'token': token,
@@ -1316,7 +1848,7 @@ async def withdraw_from_exchange_to_wallet(
                 code=token,
                 amount=amount,
                 address=wallet_address,
-                tag=None,
+                tag=tag,
                 params={'network': 'BSC'}
             )
         
@@ -1342,51 +1874,47 @@ async def withdraw_from_exchange_to_wallet(
         raise Exception(f"Withdrawal from {exchange_name} failed: {str(e)}")
 
 
+# Marketable limit/IOC legs capped at the slippage tolerance; fills are reconciled from the exchange
+order_executor = OrderExecutor(ORDER_MAX_CHILDREN, ORDER_POLL_INTERVAL, ORDER_FILL_TIMEOUT, ORDER_BOOK_DEPTH)
+
+# An order, withdrawal or broadcast that timed out may still have gone through; anything else was refused
+AMBIGUOUS_ACTION_ERRORS = (asyncio.TimeoutError, ccxt.RequestTimeout, RPCTimeoutError)
+
+
 async def wait_for_withdrawal_completion(
     exchange: ccxt.Exchange,
     exchange_name: str,
     withdrawal_id: str,
+    currency: str,
     opportunity_id: str,
     timeout: int = WITHDRAWAL_TIMEOUT
 ) -> str:
     """
     Wait for exchange to process withdrawal and broadcast to blockchain
     """
+    await log_transaction(opportunity_id, f"withdraw_status_{exchange_name}", "started", {
+        'withdrawal_id': withdrawal_id
+    }, is_live=True)
+    
     start_time = time.time()
     
-    while time.time() - start_time < timeout:
-        try:
-            withdrawal = await exchange.fetch_withdrawal(withdrawal_id)
-            status = withdrawal.get('status', '').lower()
-            
-            await log_transaction(opportunity_id, f"withdraw_status_{exchange_name}", "checking", {
-                'status': status,
-                'elapsed_seconds': int(time.time() - start_time)
-            }, is_live=True)
-            
-            if status in ['ok', 'complete', 'completed', 'success']:
-                tx_hash = withdrawal.get('txid')
-                if tx_hash:
-                    await log_transaction(opportunity_id, f"withdraw_from_{exchange_name}", "completed", {
-                        'tx_hash': tx_hash,
-                        'total_wait_seconds': int(time.time() - start_time)
-                    }, is_live=True)
-                    return tx_hash
-            elif status in ['failed', 'canceled', 'cancelled']:
-                raise Exception(f"Withdrawal {status}: {withdrawal.get('info', {})}")
-            
-            await asyncio.sleep(10)  # Check every 10 seconds
-            
-        except Exception as e:
-            if 'not found' not in str(e).lower():
-                logger.warning(f"Error checking withdrawal: {e}")
-            await asyncio.sleep(10)
+    # Status comes from the exchange's shared withdrawal-history poll (fast right after submission, then backing off)
+    try:
+        withdrawal = await transfer_tracker.wait_for_withdrawal(exchange_name, exchange, currency, withdrawal_id, timeout)
+    except asyncio.TimeoutError:
+        raise Exception(f"Withdrawal timeout after {timeout} seconds")
     
-    raise Exception(f"Withdrawal timeout after {timeout} seconds")
+    tx_hash = withdrawal['txid']
+    await transfer_timings.record(exchange_name, currency, 'withdrawal', time.time() - start_time)
+    await log_transaction(opportunity_id, f"withdraw_from_{exchange_name}", "completed", {
+        'tx_hash': tx_hash,
+        'total_wait_seconds': int(time.time() - start_time)
+    }, is_live=True)
+    return tx_hash
 
 
 async def wait_for_blockchain_confirmation(
-    w3: Web3,
+    w3: AsyncWeb3,
     tx_hash: str,
     opportunity_id: str,
     step_name: str,
@@ -1403,39 +1931,29 @@ async def wait_for_blockchain_confirmation(
     
     start_time = time.time()
     
-    while time.time() - start_time < timeout:
-        try:
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
-            
-            if receipt:
-                current_block = w3.eth.block_number
-                tx_block = receipt['blockNumber']
-                confirmations = current_block - tx_block + 1
-                
-                await log_transaction(opportunity_id, step_name, "confirming", {
-                    'confirmations': confirmations,
-                    'required': required_confirmations,
-                    'elapsed_seconds': int(time.time() - start_time)
-                }, is_live=True)
-                
-                if confirmations >= required_confirmations:
-                    await log_transaction(opportunity_id, step_name, "completed", {
-                        'confirmations': confirmations,
-                        'total_wait_seconds': int(time.time() - start_time)
-                    }, is_live=True)
-                    return True
-            
-            await asyncio.sleep(3)  # Check every 3 seconds (BSC block time)
-            
-        except Exception as e:
-            logger.warning(f"Error checking blockchain confirmation: {e}")
-            await asyncio.sleep(3)
+    # One shared head-following loop resolves receipts for every pending transaction
+    try:
+        receipt = await bsc_service.get_block_watcher(w3).wait_for_receipt(tx_hash, required_confirmations, timeout)
+    except asyncio.TimeoutError:
+        raise Exception(f"Blockchain confirmation timeout after {timeout} seconds")
     
-    raise Exception(f"Blockchain confirmation timeout after {timeout} seconds")
+    if receipt.get('status') == 0:
+        await log_transaction(opportunity_id, step_name, "failed", {
+            'error': 'Transaction reverted',
+            'block_number': receipt['blockNumber']
+        }, is_live=True)
+        raise Exception(f"Transaction {tx_hash} reverted in block {receipt['blockNumber']}")
+    
+    await log_transaction(opportunity_id, step_name, "completed", {
+        'confirmations': receipt['confirmations'],
+        'block_number': receipt['blockNumber'],
+        'total_wait_seconds': int(time.time() - start_time)
+    }, is_live=True)
+    return True
 
 
 async def send_token_from_wallet_to_exchange(
-    w3: Web3,
+    w3: AsyncWeb3,
     private_key: str,
     token_address: str,
     to_address: str,
@@ -1456,47 +1974,20 @@ async def send_token_from_wallet_to_exchange(
     try:
         account = w3.eth.account.from_key(private_key)
         
-        # Get token contract
-        token_contract = w3.eth.contract(
-            address=Web3.to_checksum_address(token_address),
-            abi=ERC20_ABI
-        )
-        
         # Convert amount to wei
         amount_wei = int(amount * (10 ** decimals))
         
-        # Build transaction
-        nonce = w3.eth.get_transaction_count(account.address)
-        gas_price = w3.eth.gas_price
-        
-        # Estimate gas
-        gas_estimate = token_contract.functions.transfer(
-            Web3.to_checksum_address(to_address),
-            amount_wei
-        ).estimate_gas({'from': account.address})
-        
-        transaction = token_contract.functions.transfer(
-            Web3.to_checksum_address(to_address),
-            amount_wei
-        ).build_transaction({
-            'from': account.address,
-            'gas': int(gas_estimate * 1.2),  # Add 20% buffer
-            'gasPrice': gas_price,
-            'nonce': nonce
-        })
-        
-        # Sign and send
-        signed = account.sign_transaction(transaction)
-        tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-        tx_hash_hex = w3.to_hex(tx_hash)
+        # Sign with a locally tracked nonce and cached gas data, then broadcast
+        sent = await bsc_service.get_tx_manager(w3).send_token_transfer(account, token_address, to_address, amount_wei)
         
         await log_transaction(opportunity_id, step_name, "broadcast", {
-            'tx_hash': tx_hash_hex,
-            'gas_used': gas_estimate,
-            'gas_price': str(gas_price)
+            'tx_hash': sent['tx_hash'],
+            'nonce': sent['nonce'],
+            'gas_limit': sent['gas_limit'],
+            'gas_price': str(sent['gas_price'])
         }, is_live=True)
         
-        return tx_hash_hex
+        return sent['tx_hash']
         
     except Exception as e:
         await log_transaction(opportunity_id, step_name, "failed", {
@@ -1549,61 +2040,94 @@ async def wait_for_deposit_credit(
     token: str,
     expected_amount: float,
     opportunity_id: str,
-    timeout: int = DEPOSIT_TIMEOUT
+    timeout: int = DEPOSIT_TIMEOUT,
+    baseline: Optional[float] = None,
+    tx_hash: Optional[str] = None
 ) -> bool:
     """
     Wait for exchange to credit deposited tokens
+    With the deposit tx_hash the exchange's deposit history is matched directly; otherwise the free
+    balance is watched - pass the balance captured before sending as baseline so an early credit is not missed
     """
     await log_transaction(opportunity_id, f"wait_deposit_{exchange_name}", "started", {
         'token': token,
-        'expected_amount': expected_amount
+        'expected_amount': expected_amount,
+        'baseline': baseline,
+        'tx_hash': tx_hash
     }, is_live=True)
     
-    try:
-        initial_balance = await exchange.fetch_balance()
-        initial_amount = initial_balance.get(token, {}).get('free', 0)
-    except Exception:
-        initial_amount = 0
-    
     start_time = time.time()
     
-    while time.time() - start_time < timeout:
-        try:
-            current_balance = await exchange.fetch_balance()
-            current_amount = current_balance.get(token, {}).get('free', 0)
-            
-            increase = current_amount - initial_amount
-            
-            await log_transaction(opportunity_id, f"wait_deposit_{exchange_name}", "checking", {
-                'initial': initial_amount,
-                'current': current_amount,
-                'increase': increase,
-                'expected': expected_amount,
-                'elapsed_seconds': int(time.time() - start_time)
-            }, is_live=True)
-            
-            # Allow 1% tolerance for rounding
-            if increase >= (expected_amount * 0.99):
-                await log_transaction(opportunity_id, f"wait_deposit_{exchange_name}", "completed", {
-                    'credited_amount': increase,
-                    'total_wait_seconds': int(time.time() - start_time)
-                }, is_live=True)
-                return True
-            
-            await asyncio.sleep(30)  # Check every 30 seconds
-            
-        except Exception as e:
-            logger.warning(f"Error checking deposit: {e}")
-            await asyncio.sleep(30)
+    try:
+        if tx_hash and transfer_tracker.supports_deposits(exchange):
+            deposit = await transfer_tracker.wait_for_deposit(exchange_name, exchange, token, tx_hash, timeout)
+            increase = deposit.get('amount')
+        else:
+            # Allow 1% tolerance for rounding; one shared refresh loop per exchange serves every waiter
+            increase = await balance_tracker.wait_for_increase(
+                exchange_name, exchange, token, expected_amount * 0.99, baseline, timeout
+            )
+    except asyncio.TimeoutError:
+        raise Exception(f"Deposit credit timeout after {timeout} seconds")
     
-    raise Exception(f"Deposit credit timeout after {timeout} seconds")
+    await transfer_timings.record(exchange_name, token, 'deposit', time.time() - start_time)
+    await log_transaction(opportunity_id, f"wait_deposit_{exchange_name}", "completed", {
+        'credited_amount': increase,
+        'total_wait_seconds': int(time.time() - start_time)
+    }, is_live=True)
+    return True
+
+
+def estimate_transfer_trade_minutes(opportunity: dict) -> float:
+    """
+    Expected duration of a trade that moves funds through the wallet: USDT deposit to and token withdrawal from
+    the buy venue, token deposit to and USDT withdrawal from the sell venue, from observed transfer timings
+    """
+    token = opportunity['token_symbol']
+    return transfer_timings.estimate_minutes([
+        (opportunity['buy_exchange'], 'USDT', 'deposit'),
+        (opportunity['buy_exchange'], token, 'withdrawal'),
+        (opportunity['sell_exchange'], token, 'deposit'),
+        (opportunity['sell_exchange'], 'USDT', 'withdrawal')
+    ], TRANSFER_TRADE_MINUTES)
+
+
+def create_arbitrage_job(
+    opportunity: dict,
+    usdt_amount: float,
+    slippage_tolerance: float,
+    telegram_chat_id: Optional[str],
+    target_spread: float = 85.0,
+    wallet_address: Optional[str] = None
+) -> dict:
+    """Fail-safe state record for a new execution, holding everything needed to resume it"""
+    net_spread_percent = opportunity.get('net_spread_percent')
+    if net_spread_percent is None:
+        net_spread_percent = opportunity.get('spread_percent', 0)
+    expected_profit = usdt_amount * net_spread_percent / 100
+    
+    return FailSafeArbitrageState(
+        opportunity_id=opportunity['id'],
+        status='pending',
+        token_symbol=opportunity['token_symbol'],
+        buy_exchange=opportunity['buy_exchange'],
+        sell_exchange=opportunity['sell_exchange'],
+        usdt_invested=usdt_amount,
+        target_spread=target_spread,
+        opportunity=opportunity,
+        slippage_tolerance=slippage_tolerance,
+        telegram_chat_id=telegram_chat_id,
+        wallet_address=wallet_address,
+        expected_profit_per_minute=expected_profit / estimate_transfer_trade_minutes(opportunity)
+    ).model_dump()
 
 
 async def execute_full_arbitrage_with_transfers(
     opportunity: dict,
     usdt_amount: float,
     slippage_tolerance: float,
-    telegram_chat_id: Optional[str]
+    telegram_chat_id: Optional[str],
+    job: Optional[dict] = None
 ) -> dict:
     """
     Execute FAIL-SAFE Arbitrage with spread monitoring:
@@ -1617,6 +2141,9 @@ async def execute_full_arbitrage_with_transfers(
     6. If spread never hits target within max_wait_time, sell anyway (fail-safe)
     
     This ensures you only sell at favorable conditions, protecting your investment.
+    
+    Progress is checkpointed to the job's failsafe_states document; passing a job that was interrupted
+    resumes it after its last completed step.
     """
     start_time = time.time()
     
@@ -1624,124 +2151,140 @@ async def execute_full_arbitrage_with_transfers(
     sell_exchange_name = opportunity['sell_exchange']
     token_symbol = opportunity['token_symbol']
     
+    # Settings, wallet, token and both exchange instances are independent lookups
+    settings, wallet, token_doc, buy_exchange, sell_exchange = await asyncio.gather(
+        db.settings.find_one({}),
+        db.wallet.find_one({}),
+        db.tokens.find_one({'symbol': token_symbol}),
+        get_exchange_instance(buy_exchange_name),
+        get_exchange_instance(sell_exchange_name)
+    )
+    
     # Get settings for fail-safe configuration
-    settings = await db.settings.find_one({})
     target_spread = settings.get('target_sell_spread', 85.0) if settings else 85.0
     spread_check_interval = settings.get('spread_check_interval', 10) if settings else 10
     max_wait_time = settings.get('max_wait_time', 3600) if settings else 3600  # 1 hour default
+    stop_loss_spread = settings.get('stop_loss_spread', -2.0) if settings else -2.0
     
     # Get wallet config
-    wallet = await db.wallet.find_one({})
     if not wallet:
-        raise HTTPException(status_code=400, detail="Wallet not configured. Please add your wallet in settings.")
+        raise JobPreconditionError("Wallet not configured. Please add your wallet in settings.")
     
     wallet_address = wallet['address']
     private_key = decrypt_data(wallet['private_key_encrypted'])
     
-    # Get exchange instances
-    buy_exchange = await get_exchange_instance(buy_exchange_name)
-    sell_exchange = await get_exchange_instance(sell_exchange_name)
-    
     if not buy_exchange or not sell_exchange:
-        raise HTTPException(status_code=400, detail="Exchange not configured")
+        raise JobPreconditionError("Exchange not configured")
+    
+    # Each venue's USDT market for the token, from the symbol index (as in inventory mode)
+    buy_symbol = resolve_market_symbol(buy_exchange_name, buy_exchange, token_symbol)
+    sell_symbol = resolve_market_symbol(sell_exchange_name, sell_exchange, token_symbol)
+    if not buy_symbol:
+        raise JobPreconditionError(f"{token_symbol}/USDT market not found on {buy_exchange_name}")
+    if not sell_symbol:
+        raise JobPreconditionError(f"{token_symbol}/USDT market not found on {sell_exchange_name}")
     
     # Get Web3 instance (always mainnet for real money)
     w3 = bsc_service.get_web3(is_live=True)
     
     # Get token info
-    token_doc = await db.tokens.find_one({'symbol': token_symbol})
     if not token_doc:
-        raise HTTPException(status_code=400, detail=f"Token {token_symbol} not found in database")
+        raise JobPreconditionError(f"Token {token_symbol} not found in database")
     
     token_contract_address = token_doc['contract_address']
     
-    # Update opportunity status
-    await db.arbitrage_opportunities.update_one(
-        {'id': opportunity['id']},
-        {'$set': {'status': 'executing'}}
-    )
-    
-    # Create fail-safe state record
-    failsafe_state = FailSafeArbitrageState(
-        opportunity_id=opportunity['id'],
-        status='pending',
-        token_symbol=token_symbol,
-        buy_exchange=buy_exchange_name,
-        sell_exchange=sell_exchange_name,
-        usdt_invested=usdt_amount,
-        target_spread=target_spread
-    )
-    await db.failsafe_states.insert_one(failsafe_state.model_dump())
+    # Update opportunity status and create the fail-safe state record (unless running a queued job)
+    if job is None:
+        job = create_arbitrage_job(opportunity, usdt_amount, slippage_tolerance, telegram_chat_id, target_spread, wallet_address)
+        await asyncio.gather(
+            db.arbitrage_opportunities.update_one(
+                {'id': opportunity['id']},
+                {'$set': {'status': 'executing'}}
+            ),
+            db.failsafe_states.insert_one(dict(job))
+        )
+    checkpoints = JobCheckpoints(db, job, AMBIGUOUS_ACTION_ERRORS)
     
-    # STEP 0: Check profitability with ALL fees
-    await log_transaction(opportunity['id'], "profitability_check", "started", {}, is_live=True)
+    token_amount = usdt_amount / opportunity['buy_price']
     
-    profitability = await check_arbitrage_profitability(
-        opportunity, usdt_amount, buy_exchange, sell_exchange
-    )
+    def tokens_bought(results: dict) -> float:
+        # Tokens actually received: the reconciled fill less any fee charged in the token
+        buy_order = results['buy']
+        return buy_order.get('net_filled', buy_order.get('filled', token_amount))
     
-    if not profitability['is_profitable']:
-        await log_transaction(opportunity['id'], "profitability_check", "failed", {
-            'reason': 'Not profitable after fees',
-            'net_profit': profitability['net_profit'],
-            'total_fees': profitability['total_fees'],
-            'min_spread_required': profitability['min_spread_required']
-        }, is_live=True)
+    # ═══════════════════════════════════════════════════════════════
+    # STEP 0: Check profitability with ALL fees (deposit addresses and the
+    # USDT baseline are fetched alongside it)
+    # ═══════════════════════════════════════════════════════════════
+    async def check_profitability(results: dict) -> dict:
+        await log_transaction(opportunity['id'], "profitability_check", "started", {}, is_live=True)
         
-        await db.arbitrage_opportunities.update_one(
-            {'id': opportunity['id']},
-            {'$set': {'status': 'failed'}}
+        profitability = await check_arbitrage_profitability(
+            opportunity, usdt_amount, buy_exchange, sell_exchange
         )
         
-        raise HTTPException(
-            status_code=400,
-            detail=f"Not profitable after fees. Net profit: ${profitability['net_profit']:.2f}. "
-                   f"Total fees: ${profitability['total_fees']:.2f}. "
-                   f"Need spread > {profitability['min_spread_required']:.2f}%"
-        )
+        if not profitability['is_profitable']:
+            await log_transaction(opportunity['id'], "profitability_check", "failed", {
+                'reason': 'Not profitable after fees',
+                'net_profit': profitability['net_profit'],
+                'total_fees': profitability['total_fees'],
+                'min_spread_required': profitability['min_spread_required']
+            }, is_live=True)
+            
+            raise JobPreconditionError(
+                f"Not profitable after fees. Net profit: ${profitability['net_profit']:.2f}. "
+                f"Total fees: ${profitability['total_fees']:.2f}. "
+                f"Need spread > {profitability['min_spread_required']:.2f}%"
+            )
+        
+        await log_transaction(opportunity['id'], "profitability_check", "completed", profitability, is_live=True)
+        return profitability
     
-    await log_transaction(opportunity['id'], "profitability_check", "completed", profitability, is_live=True)
-    
-    # Send Telegram notification
-    if telegram_chat_id and TELEGRAM_BOT_TOKEN:
-        message = (
-            f"🚀 *Starting FAIL-SAFE Arbitrage*\n\n"
-            f"Token: {token_symbol}\n"
-            f"Buy: {buy_exchange_name} @ ${opportunity['buy_price']:.4f}\n"
-            f"Sell: {sell_exchange_name} @ ${opportunity['sell_price']:.4f}\n"
-            f"Amount: ${usdt_amount}\n"
-            f"Expected Profit: ${profitability['net_profit']:.2f} ({profitability['profit_percent']:.2f}%)\n\n"
-            f"🎯 Target Sell Spread: {target_spread}%\n"
-            f"⏱ Max Wait Time: {max_wait_time/60:.0f} minutes\n\n"
-            f"📊 Will monitor spread and sell only when target is reached!"
-        )
-        await send_telegram_message(telegram_chat_id, message)
+    async def notify_start(results: dict):
+        profitability = results['profitability']
+        if telegram_chat_id and TELEGRAM_BOT_TOKEN:
+            message = (
+                f"🚀 *Starting FAIL-SAFE Arbitrage*\n\n"
+                f"Token: {token_symbol}\n"
+                f"Buy: {buy_exchange_name} @ ${opportunity['buy_price']:.4f}\n"
+                f"Sell: {sell_exchange_name} @ ${opportunity['sell_price']:.4f}\n"
+                f"Amount: ${usdt_amount}\n"
+                f"Expected Profit: ${profitability['net_profit']:.2f} ({profitability['profit_percent']:.2f}%)\n\n"
+                f"🎯 Target Sell Spread: {target_spread}%\n"
+                f"⏱ Max Wait Time: {max_wait_time/60:.0f} minutes\n\n"
+                f"📊 Will monitor spread and sell only when target is reached!"
+            )
+            await send_telegram_message(telegram_chat_id, message)
     
-    token_amount = usdt_amount / opportunity['buy_price']
+    async def fetch_buy_deposit_address(results: dict) -> dict:
+        return await get_deposit_address(buy_exchange, buy_exchange_name, 'USDT', opportunity['id'])
     
-    try:
-        # ═══════════════════════════════════════════════════════════════
-        # STEP 1: Fund first CEX and IMMEDIATELY buy token
-        # ═══════════════════════════════════════════════════════════════
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'funding_cex_a', 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
+    async def fetch_sell_deposit_address(results: dict) -> dict:
+        return await get_deposit_address(sell_exchange, sell_exchange_name, token_symbol, opportunity['id'])
+    
+    async def capture_usdt_baseline(results: dict) -> float:
+        # Record the balance before funding so the credit is measured against it
+        return await balance_tracker.free_balance(buy_exchange_name, buy_exchange, 'USDT', max_age=0)
+    
+    # ═══════════════════════════════════════════════════════════════
+    # STEP 1: Fund first CEX and IMMEDIATELY buy token
+    # ═══════════════════════════════════════════════════════════════
+    async def fund_buy_exchange(results: dict) -> str:
+        await checkpoints.transition('funding_cex_a')
         
         await log_transaction(opportunity['id'], "step_1_fund_buy_exchange", "started", {
             'amount': usdt_amount,
             'destination': buy_exchange_name
         }, is_live=True)
         
-        # Get deposit address for buy exchange
-        buy_deposit = await get_deposit_address(buy_exchange, buy_exchange_name, 'USDT', opportunity['id'])
-        
         # Send USDT from wallet to buy exchange
         usdt_contract = USDT_MAINNET
-        fund_tx_hash = await send_token_from_wallet_to_exchange(
-            w3, private_key, usdt_contract, buy_deposit['address'],
+        fund_tx_hash = await checkpoints.once('fund_tx_hash', lambda: send_token_from_wallet_to_exchange(
+            w3, private_key, usdt_contract, results['buy_deposit_address']['address'],
             usdt_amount, opportunity['id'], "step_1_fund_buy_exchange"
-        )
+        ))
+        # The USDT has left the wallet, so the balance itself now reflects it
+        trade_scheduler.release(job['id'], [(wallet_account(wallet_address), 'USDT')])
         
         # Wait for blockchain confirmation
         await wait_for_blockchain_confirmation(
@@ -1752,53 +2295,56 @@ async def execute_full_arbitrage_with_transfers(
         # Wait for exchange to credit USDT
         await wait_for_deposit_credit(
             buy_exchange, buy_exchange_name, 'USDT',
-            usdt_amount, opportunity['id']
+            usdt_amount, opportunity['id'], baseline=results['usdt_baseline'], tx_hash=fund_tx_hash
         )
-        
-        # IMMEDIATELY buy token
+        return fund_tx_hash
+    
+    async def buy_token(results: dict) -> dict:
         await log_transaction(opportunity['id'], "step_1b_buy_token", "started", {
             'exchange': buy_exchange_name,
             'amount': token_amount
         }, is_live=True)
         
-        async def place_buy_order():
-            return await buy_exchange.create_order(
-                symbol=f"{token_symbol}/USDT",
-                type='market',
-                side='buy',
-                amount=token_amount
-            )
-        
-        buy_order = await retry_with_backoff(place_buy_order)
-        actual_token_amount = buy_order.get('filled', token_amount)
+        # Sized from the funded USDT at the capped price (the opportunity's quote is minutes old by now)
+        buy_order = await checkpoints.once('buy_order', lambda: order_executor.execute(
+            buy_exchange, buy_symbol, 'buy', slippage_tolerance, quote_amount=usdt_amount
+        ))
+        if buy_order['filled'] <= 0:
+            raise Exception(f"Buy order did not fill within {slippage_tolerance}% slippage - USDT remains on {buy_exchange_name}")
+        actual_token_amount = tokens_bought({'buy': buy_order})
         
         await log_transaction(opportunity['id'], "step_1b_buy_token", "completed", {
             'order_id': buy_order['id'],
-            'filled': actual_token_amount,
-            'cost': buy_order.get('cost')
+            'order_ids': buy_order['order_ids'],
+            'status': buy_order['status'],
+            'filled': buy_order['filled'],
+            'net_filled': actual_token_amount,
+            'average_price': buy_order['average'],
+            'cost': buy_order['cost'],
+            'fees': buy_order['fees']
         }, is_live=True)
         
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'bought', 'tokens_held': actual_token_amount, 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
-        
-        # ═══════════════════════════════════════════════════════════════
-        # STEP 2: Withdraw purchased token to external wallet
-        # ═══════════════════════════════════════════════════════════════
+        await checkpoints.transition('bought', tokens_held=actual_token_amount)
+        return buy_order
+    
+    # ═══════════════════════════════════════════════════════════════
+    # STEP 2: Withdraw purchased token to external wallet
+    # ═══════════════════════════════════════════════════════════════
+    async def withdraw_to_wallet(results: dict) -> str:
+        actual_token_amount = tokens_bought(results)
         await log_transaction(opportunity['id'], "step_2_withdraw_to_wallet", "started", {
             'amount': actual_token_amount,
             'destination': wallet_address
         }, is_live=True)
         
-        withdrawal = await withdraw_from_exchange_to_wallet(
+        withdrawal = await checkpoints.once('token_withdrawal', lambda: withdraw_from_exchange_to_wallet(
             buy_exchange, buy_exchange_name, token_symbol,
             actual_token_amount, wallet_address, opportunity['id']
-        )
+        ))
         
         # Wait for withdrawal to complete
         withdraw_tx_hash = await wait_for_withdrawal_completion(
-            buy_exchange, buy_exchange_name, withdrawal['id'], opportunity['id']
+            buy_exchange, buy_exchange_name, withdrawal['id'], token_symbol, opportunity['id']
         )
         
         # Wait for blockchain confirmation
@@ -1807,27 +2353,25 @@ async def execute_full_arbitrage_with_transfers(
             "step_2_blockchain_confirm", MIN_CONFIRMATIONS
         )
         
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'withdrawn', 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
-        
-        # ═══════════════════════════════════════════════════════════════
-        # STEP 3: Fund second CEX (sell exchange) and WAIT
-        # ═══════════════════════════════════════════════════════════════
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'funding_cex_b', 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
-        
-        # Get deposit address for sell exchange
-        sell_deposit = await get_deposit_address(sell_exchange, sell_exchange_name, token_symbol, opportunity['id'])
+        await checkpoints.transition('withdrawn')
+        return withdraw_tx_hash
+    
+    async def capture_token_baseline(results: dict) -> float:
+        # Taken while the withdrawal is in flight, before anything is sent to the sell exchange
+        return await balance_tracker.free_balance(sell_exchange_name, sell_exchange, token_symbol, max_age=0)
+    
+    # ═══════════════════════════════════════════════════════════════
+    # STEP 3: Fund second CEX (sell exchange) and WAIT
+    # ═══════════════════════════════════════════════════════════════
+    async def send_to_sell_exchange(results: dict) -> str:
+        actual_token_amount = tokens_bought(results)
+        await checkpoints.transition('funding_cex_b')
         
         # Send token from wallet to sell exchange
-        deposit_tx_hash = await send_token_from_wallet_to_exchange(
-            w3, private_key, token_contract_address, sell_deposit['address'],
+        deposit_tx_hash = await checkpoints.once('deposit_tx_hash', lambda: send_token_from_wallet_to_exchange(
+            w3, private_key, token_contract_address, results['sell_deposit_address']['address'],
             actual_token_amount, opportunity['id'], "step_3_send_to_sell_exchange"
-        )
+        ))
         
         # Wait for blockchain confirmation
         await wait_for_blockchain_confirmation(
@@ -1838,21 +2382,20 @@ async def execute_full_arbitrage_with_transfers(
         # Wait for sell exchange to credit tokens
         await wait_for_deposit_credit(
             sell_exchange, sell_exchange_name, token_symbol,
-            actual_token_amount, opportunity['id']
+            actual_token_amount, opportunity['id'], baseline=results['token_baseline'], tx_hash=deposit_tx_hash
         )
         
         await log_transaction(opportunity['id'], "step_3_deposit_credited", "completed", {
             'exchange': sell_exchange_name,
             'tokens': actual_token_amount
         }, is_live=True)
-        
-        # ═══════════════════════════════════════════════════════════════
-        # STEP 4: FAIL-SAFE - Monitor spread continuously until target hit
-        # ═══════════════════════════════════════════════════════════════
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'monitoring', 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
+        return deposit_tx_hash
+    
+    # ═══════════════════════════════════════════════════════════════
+    # STEP 4: FAIL-SAFE - Monitor spread continuously until target hit
+    # ═══════════════════════════════════════════════════════════════
+    async def monitor_spread(results: dict) -> dict:
+        await checkpoints.transition('monitoring')
         
         await log_transaction(opportunity['id'], "step_4_monitoring_spread", "started", {
             'target_spread': target_spread,
@@ -1870,102 +2413,78 @@ async def execute_full_arbitrage_with_transfers(
             )
             await send_telegram_message(telegram_chat_id, message)
         
-        # Monitor spread until target is reached or timeout
+        # Wait on the shared market feed until the spread crosses target or stop-loss (or timeout)
         monitoring_start = time.time()
-        final_spread = 0
-        spread_hit_target = False
         
-        while (time.time() - monitoring_start) < max_wait_time:
-            try:
-                # Get current prices
-                buy_ticker = await buy_exchange.fetch_ticker(f"{token_symbol}/USDT")
-                sell_ticker = await sell_exchange.fetch_ticker(f"{token_symbol}/USDT")
-                
-                current_buy_price = buy_ticker.get('ask', 0) or 0
-                current_sell_price = sell_ticker.get('bid', 0) or 0
-                
-                if current_buy_price > 0:
-                    current_spread = ((current_sell_price - current_buy_price) / current_buy_price) * 100
-                else:
-                    current_spread = 0
-                
-                final_spread = current_spread
-                
-                # Update state with current spread
-                await db.failsafe_states.update_one(
-                    {'opportunity_id': opportunity['id']},
-                    {'$set': {'current_spread': current_spread, 'updated_at': datetime.now(timezone.utc).isoformat()}}
+        async def record_spread(latest: dict):
+            # Sampled at most every SPREAD_SAMPLE_INTERVAL seconds, not on every quote
+            current_spread = latest['spread']
+            await checkpoints.update(current_spread=current_spread)
+            await manager.broadcast({
+                "type": "spread_update",
+                "opportunity_id": opportunity['id'],
+                "current_spread": round(current_spread, 4),
+                "target_spread": target_spread,
+                "elapsed_seconds": int(time.time() - monitoring_start)
+            })
+            await log_transaction(opportunity['id'], "spread_check", "checking", {
+                'current_spread': round(current_spread, 4),
+                'target_spread': target_spread,
+                'stop_loss_spread': stop_loss_spread,
+                'buy_price': latest['buy_price'],
+                'sell_price': latest['sell_price'],
+                'elapsed_seconds': int(time.time() - monitoring_start)
+            }, is_live=True)
+        
+        watch = await spread_watch.wait(
+            token_symbol, buy_exchange_name, sell_exchange_name, target_spread, stop_loss_spread,
+            max_wait_time, record_spread, SPREAD_SAMPLE_INTERVAL, spread_check_interval
+        )
+        final_spread = watch['spread'] or 0
+        spread_hit_target = watch['reason'] == 'target'
+        
+        # ============== STOP-LOSS CHECK ==============
+        # Abort if spread becomes too negative (market crash protection)
+        if watch['reason'] == 'stop_loss':
+            await log_transaction(opportunity['id'], "stop_loss_triggered", "triggered", {
+                'current_spread': final_spread,
+                'stop_loss_spread': stop_loss_spread,
+                'reason': 'Spread dropped below stop-loss threshold - preventing further loss'
+            }, is_live=True)
+            
+            if telegram_chat_id and TELEGRAM_BOT_TOKEN:
+                message = (
+                    f"🛑 *STOP-LOSS TRIGGERED!*\n\n"
+                    f"Token: {token_symbol}\n"
+                    f"Current Spread: {final_spread:.2f}%\n"
+                    f"Stop-Loss: {stop_loss_spread}%\n\n"
+                    f"⚠️ Aborting to prevent further loss. Selling NOW at market price."
                 )
-                
-                # Broadcast spread update via WebSocket
-                await manager.broadcast({
-                    "type": "spread_update",
-                    "opportunity_id": opportunity['id'],
-                    "current_spread": round(current_spread, 4),
-                    "target_spread": target_spread,
-                    "elapsed_seconds": int(time.time() - monitoring_start)
-                })
-                
-                await log_transaction(opportunity['id'], "spread_check", "checking", {
-                    'current_spread': round(current_spread, 4),
-                    'target_spread': target_spread,
-                    'stop_loss_spread': stop_loss_spread,
-                    'buy_price': current_buy_price,
-                    'sell_price': current_sell_price,
-                    'elapsed_seconds': int(time.time() - monitoring_start)
-                }, is_live=True)
-                
-                # ============== STOP-LOSS CHECK ==============
-                # Abort if spread becomes too negative (market crash protection)
-                if current_spread <= stop_loss_spread:
-                    await log_transaction(opportunity['id'], "stop_loss_triggered", "triggered", {
-                        'current_spread': current_spread,
-                        'stop_loss_spread': stop_loss_spread,
-                        'reason': 'Spread dropped below stop-loss threshold - preventing further loss'
-                    }, is_live=True)
-                    
-                    if telegram_chat_id and TELEGRAM_BOT_TOKEN:
-                        message = (
-                            f"🛑 *STOP-LOSS TRIGGERED!*\n\n"
-                            f"Token: {token_symbol}\n"
-                            f"Current Spread: {current_spread:.2f}%\n"
-                            f"Stop-Loss: {stop_loss_spread}%\n\n"
-                            f"⚠️ Aborting to prevent further loss. Selling NOW at market price."
-                        )
-                        await send_telegram_message(telegram_chat_id, message)
-                    
-                    # Don't break - will sell at current price
-                    logger.warning(f"🛑 Stop-loss triggered: {current_spread:.2f}% <= {stop_loss_spread}%")
-                    break
-                
-                # Check if target spread is reached
-                if current_spread >= target_spread:
-                    spread_hit_target = True
-                    await log_transaction(opportunity['id'], "step_4_target_reached", "completed", {
-                        'final_spread': current_spread,
-                        'target_spread': target_spread,
-                        'wait_time_seconds': int(time.time() - monitoring_start)
-                    }, is_live=True)
-                    
-                    if telegram_chat_id and TELEGRAM_BOT_TOKEN:
-                        message = (
-                            f"🎯 *TARGET SPREAD REACHED!*\n\n"
-                            f"Token: {token_symbol}\n"
-                            f"Current Spread: {current_spread:.2f}%\n"
-                            f"Target: {target_spread}%\n\n"
-                            f"⚡ Executing sell order NOW!"
-                        )
-                        await send_telegram_message(telegram_chat_id, message)
-                    
-                    break
-                
-            except Exception as e:
-                logger.warning(f"Error checking spread: {e}")
+                await send_telegram_message(telegram_chat_id, message)
             
-            await asyncio.sleep(spread_check_interval)
+            # Sell at current price
+            logger.warning(f"🛑 Stop-loss triggered: {final_spread:.2f}% <= {stop_loss_spread}%")
+        
+        # Check if target spread is reached
+        if spread_hit_target:
+            await log_transaction(opportunity['id'], "step_4_target_reached", "completed", {
+                'final_spread': final_spread,
+                'target_spread': target_spread,
+                'wait_time_seconds': int(time.time() - monitoring_start)
+            }, is_live=True)
+            
+            if telegram_chat_id and TELEGRAM_BOT_TOKEN:
+                message = (
+                    f"🎯 *TARGET SPREAD REACHED!*\n\n"
+                    f"Token: {token_symbol}\n"
+                    f"Current Spread: {final_spread:.2f}%\n"
+                    f"Target: {target_spread}%\n\n"
+                    f"⚡ Executing sell order NOW!"
+                )
+                await send_telegram_message(telegram_chat_id, message)
         
         # Log if timeout occurred
-        if not spread_hit_target:
+        if watch['reason'] == 'timeout':
             await log_transaction(opportunity['id'], "step_4_timeout", "completed", {
                 'final_spread': final_spread,
                 'target_spread': target_spread,
@@ -1983,61 +2502,89 @@ async def execute_full_arbitrage_with_transfers(
                 )
                 await send_telegram_message(telegram_chat_id, message)
         
-        # ═══════════════════════════════════════════════════════════════
-        # STEP 5: Sell token when spread hits target (or timeout)
-        # ═══════════════════════════════════════════════════════════════
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'selling', 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
+        return {'final_spread': final_spread, 'spread_hit_target': spread_hit_target}
+    
+    # ═══════════════════════════════════════════════════════════════
+    # STEP 5: Sell token when spread hits target (or timeout)
+    # ═══════════════════════════════════════════════════════════════
+    async def sell_token(results: dict) -> dict:
+        actual_token_amount = tokens_bought(results)
+        await checkpoints.transition('selling')
         
         await log_transaction(opportunity['id'], "step_5_sell_token", "started", {
             'exchange': sell_exchange_name,
             'amount': actual_token_amount,
-            'spread_at_sell': final_spread
+            'spread_at_sell': results['monitor']['final_spread']
         }, is_live=True)
         
-        async def place_sell_order():
-            return await sell_exchange.create_order(
-                symbol=f"{token_symbol}/USDT",
-                type='market',
-                side='sell',
-                amount=actual_token_amount
-            )
-        
-        sell_order = await retry_with_backoff(place_sell_order)
-        usdt_received = sell_order.get('cost', 0)
+        # The position must be closed: whatever the capped limit orders leave goes at market
+        sell_order = await checkpoints.once('sell_order', lambda: order_executor.execute(
+            sell_exchange, sell_symbol, 'sell', slippage_tolerance,
+            amount=actual_token_amount, market_remainder=True
+        ))
+        usdt_received = sell_order['net_cost']
         
         await log_transaction(opportunity['id'], "step_5_sell_token", "completed", {
             'order_id': sell_order['id'],
-            'usdt_received': usdt_received
+            'order_ids': sell_order['order_ids'],
+            'status': sell_order['status'],
+            'filled': sell_order['filled'],
+            'average_price': sell_order['average'],
+            'usdt_received': usdt_received,
+            'fees': sell_order['fees']
         }, is_live=True)
         
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'sold', 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
-        
-        # ═══════════════════════════════════════════════════════════════
-        # STEP 6: Withdraw USDT profit back to wallet
-        # ═══════════════════════════════════════════════════════════════
+        await checkpoints.transition('sold')
+        return sell_order
+    
+    # ═══════════════════════════════════════════════════════════════
+    # STEP 6: Withdraw USDT profit back to wallet
+    # ═══════════════════════════════════════════════════════════════
+    async def withdraw_profit(results: dict) -> str:
+        usdt_received = results['sell'].get('net_cost', results['sell'].get('cost', 0))
         await log_transaction(opportunity['id'], "step_6_withdraw_profit", "started", {
             'amount': usdt_received
         }, is_live=True)
         
-        profit_withdrawal = await withdraw_from_exchange_to_wallet(
+        profit_withdrawal = await checkpoints.once('profit_withdrawal', lambda: withdraw_from_exchange_to_wallet(
             sell_exchange, sell_exchange_name, 'USDT',
             usdt_received, wallet_address, opportunity['id']
-        )
+        ))
         
         profit_tx_hash = await wait_for_withdrawal_completion(
-            sell_exchange, sell_exchange_name, profit_withdrawal['id'], opportunity['id']
+            sell_exchange, sell_exchange_name, profit_withdrawal['id'], 'USDT', opportunity['id']
         )
         
         await wait_for_blockchain_confirmation(
             w3, profit_tx_hash, opportunity['id'],
             "step_6_blockchain_confirm", MIN_CONFIRMATIONS
         )
+        return profit_tx_hash
+    
+    # Each step starts as soon as the steps it needs have finished; finished steps are checkpointed
+    graph = StepGraph(checkpoints.steps, checkpoints.save_step)
+    graph.add('profitability', check_profitability)
+    graph.add('buy_deposit_address', fetch_buy_deposit_address)
+    graph.add('sell_deposit_address', fetch_sell_deposit_address)
+    graph.add('usdt_baseline', capture_usdt_baseline)
+    graph.add('notify_start', notify_start, ['profitability'])
+    graph.add('fund', fund_buy_exchange, ['profitability', 'buy_deposit_address', 'usdt_baseline'])
+    graph.add('buy', buy_token, ['fund'])
+    graph.add('withdraw', withdraw_to_wallet, ['buy'])
+    graph.add('token_baseline', capture_token_baseline, ['buy'])
+    graph.add('send_to_sell', send_to_sell_exchange, ['withdraw', 'sell_deposit_address', 'token_baseline'])
+    graph.add('monitor', monitor_spread, ['send_to_sell'])
+    graph.add('sell', sell_token, ['monitor'])
+    graph.add('withdraw_profit', withdraw_profit, ['sell'])
+    
+    try:
+        results = await graph.run()
+        
+        buy_order = results['buy']
+        sell_order = results['sell']
+        usdt_received = sell_order.get('net_cost', sell_order.get('cost', 0))
+        final_spread = results['monitor']['final_spread']
+        spread_hit_target = results['monitor']['spread_hit_target']
         
         # Calculate final profit
         total_time = time.time() - start_time
@@ -2050,10 +2597,25 @@ async def execute_full_arbitrage_with_transfers(
             {'$set': {'status': 'completed'}}
         )
         
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'completed', 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
+        result = {
+            "status": "completed",
+            "opportunity_id": opportunity['id'],
+            "execution_time_seconds": int(total_time),
+            "execution_time_minutes": round(total_time / 60, 2),
+            "usdt_invested": usdt_amount,
+            "usdt_received": usdt_received,
+            "profit": round(actual_profit, 4),
+            "profit_percent": round(actual_profit_percent, 4),
+            "is_live": True,
+            "buy_order_id": buy_order['id'],
+            "sell_order_id": sell_order['id'],
+            "spread_at_sell": round(final_spread, 4),
+            "target_spread_reached": spread_hit_target,
+            "blockchain_transactions": [results['fund'], results['withdraw'], results['send_to_sell'], results['withdraw_profit']],
+            "all_funds_returned_to_wallet": True,
+            "step_timings": graph.timings()
+        }
+        await checkpoints.transition('completed', result=result)
         
         await log_transaction(opportunity['id'], "completed", "completed", {
             'total_time_seconds': int(total_time),
@@ -2064,7 +2626,9 @@ async def execute_full_arbitrage_with_transfers(
             'profit_percent': actual_profit_percent,
             'spread_at_sell': final_spread,
             'target_spread_reached': spread_hit_target,
-            'all_funds_returned_to_wallet': True
+            'all_funds_returned_to_wallet': True,
+            'critical_path': graph.critical_path(),
+            'step_timings': graph.timings()
         }, is_live=True)
         
         # Send success notification
@@ -2083,41 +2647,27 @@ async def execute_full_arbitrage_with_transfers(
             )
             await send_telegram_message(telegram_chat_id, message)
         
-        return {
-            "status": "completed",
-            "opportunity_id": opportunity['id'],
-            "execution_time_seconds": int(total_time),
-            "execution_time_minutes": round(total_time / 60, 2),
-            "usdt_invested": usdt_amount,
-            "usdt_received": usdt_received,
-            "profit": round(actual_profit, 4),
-            "profit_percent": round(actual_profit_percent, 4),
-            "is_live": True,
-            "buy_order_id": buy_order['id'],
-            "sell_order_id": sell_order['id'],
-            "spread_at_sell": round(final_spread, 4),
-            "target_spread_reached": spread_hit_target,
-            "blockchain_transactions": [fund_tx_hash, withdraw_tx_hash, deposit_tx_hash, profit_tx_hash],
-            "all_funds_returned_to_wallet": True
-        }
+        return result
         
     except Exception as e:
+        # An action interrupted by a restart is not retried blindly - a human has to check it
+        status = 'needs_attention' if isinstance(e, AmbiguousStepError) else 'failed'
+        
         # Log failure
-        await log_transaction(opportunity['id'], "failed", "failed", {
+        await log_transaction(opportunity['id'], status, "failed", {
             'error': str(e),
-            'failed_at_seconds': int(time.time() - start_time)
+            'failed_step': graph.failed_step,
+            'failed_at_seconds': int(time.time() - start_time),
+            'step_timings': graph.timings()
         }, is_live=True)
         
         # Update opportunity
         await db.arbitrage_opportunities.update_one(
             {'id': opportunity['id']},
-            {'$set': {'status': 'failed'}}
+            {'$set': {'status': status}}
         )
         
-        await db.failsafe_states.update_one(
-            {'opportunity_id': opportunity['id']},
-            {'$set': {'status': 'failed', 'updated_at': datetime.now(timezone.utc).isoformat()}}
-        )
+        await checkpoints.transition(status, error=str(e))
         
         # Send failure notification
         if telegram_chat_id and TELEGRAM_BOT_TOKEN:
@@ -2132,11 +2682,174 @@ async def execute_full_arbitrage_with_transfers(
         raise
 
 
+async def run_arbitrage_job(job: dict):
+    """Execution worker handler: run (or resume) a queued fail-safe job and publish its outcome"""
+    opportunity_id = (job.get('opportunity') or {}).get('id') or job.get('opportunity_id')
+    telegram_chat_id = job.get('telegram_chat_id')
+    
+    try:
+        opportunity = job.get('opportunity')
+        if not opportunity:
+            raise ValueError(f"Job {job['id']} has no opportunity to execute")
+        result = await execute_full_arbitrage_with_transfers(
+            opportunity, job['usdt_invested'], job.get('slippage_tolerance', 0.5), telegram_chat_id, job
+        )
+    except Exception as e:
+        error_msg = str(e)
+        status = 'needs_attention' if isinstance(e, AmbiguousStepError) else 'failed'
+        
+        # Errors raised before the first step (e.g. JobPreconditionError) never reached the state machine
+        await db.failsafe_states.update_one(
+            {'id': job['id'], 'status': {'$nin': TERMINAL_STATUSES}},
+            {'$set': {'status': status, 'error': error_msg, 'updated_at': datetime.now(timezone.utc).isoformat()}}
+        )
+        if opportunity_id:
+            await db.arbitrage_opportunities.update_one(
+                {"id": opportunity_id, "status": {"$nin": TERMINAL_STATUSES}},
+                {"$set": {"status": status}}
+            )
+        
+        if telegram_chat_id:
+            await telegram_notifier.notify_error(telegram_chat_id, error_msg, f"Executing arbitrage {opportunity_id}")
+        
+        await manager.broadcast({
+            "type": "arbitrage_failed",
+            "opportunity_id": opportunity_id,
+            "job_id": job['id'],
+            "error": error_msg
+        })
+        await flush_transaction_logs()
+        raise
+    
+    await db.arbitrage_opportunities.update_one(
+        {"id": opportunity['id']},
+        {"$set": {"status": result['status']}}
+    )
+    
+    if telegram_chat_id:
+        await telegram_notifier.notify_trade_completed(telegram_chat_id, result, True)
+    
+    await manager.broadcast({
+        "type": "arbitrage_completed",
+        "opportunity_id": opportunity['id'],
+        "job_id": job['id'],
+        "profit": result.get('profit', 0),
+        "profit_percent": result.get('profit_percent', 0),
+        "is_live": True
+    })
+    await flush_transaction_logs()
+    return result
+
+def job_capital_requirements(job: dict) -> dict:
+    """Capital a queued job still has to draw: the wallet's USDT until the buy exchange has been funded"""
+    if job.get('wallet_address') and 'fund_tx_hash_started' not in (job.get('checkpoints') or {}):
+        return {(wallet_account(job['wallet_address']), 'USDT'): job['usdt_invested']}
+    return {}
+
+async def read_capital_balances(keys, max_age: float = BALANCE_POLL_INTERVAL) -> dict:
+    """Free balances for scheduler capital keys: wallets in one batched read, exchanges via the balance tracker"""
+    keys = list(keys)
+    balances = {}
+    
+    wallet_keys = [key for key in keys if key[0].startswith('wallet:')]
+    if wallet_keys:
+        token_docs = await db.tokens.find(
+            {'symbol': {'$in': list({asset for _, asset in wallet_keys})}}, {'_id': 0}
+        ).to_list(100)
+        token_addresses = {doc['symbol']: doc.get('contract_address') for doc in token_docs}
+        token_addresses['USDT'] = USDT_MAINNET
+        addresses = list({account.split(':', 1)[1] for account, _ in wallet_keys})
+        wallet_balances = await bsc_service.get_balances(
+            addresses, [address for address in token_addresses.values() if address], is_live=True
+        )
+        for account, asset in wallet_keys:
+            entry = wallet_balances.get(Web3.to_checksum_address(account.split(':', 1)[1]), {})
+            if asset == 'BNB':
+                balances[(account, asset)] = entry.get('BNB', 0.0)
+            elif token_addresses.get(asset):
+                balances[(account, asset)] = entry.get(Web3.to_checksum_address(token_addresses[asset]), 0.0)
+    
+    async def exchange_balance(key):
+        exchange_name = key[0].split(':', 1)[1]
+        instance = await get_exchange_instance(exchange_name)
+        if instance:
+            balances[key] = await balance_tracker.free_balance(exchange_name, instance, key[1], max_age=max_age)
+    
+    await asyncio.gather(*[exchange_balance(key) for key in keys if key[0].startswith('exchange:')])
+    return balances
+
+# Background executor: concurrent jobs, capital reserved per wallet/exchange, best profit per minute first
+trade_scheduler = TradeScheduler(
+    db, run_arbitrage_job, job_capital_requirements, read_capital_balances,
+    lambda job: job.get('expected_profit_per_minute', 0.0),
+    EXECUTION_WORKERS, SCHEDULER_RECHECK_INTERVAL
+)
+
 
-# ============== LEGACY ARBITRAGE (Pre-positioned funds) ==============
+# ============== INVENTORY ARBITRAGE (Pre-positioned funds) ==============
 
-async def execute_real_arbitrage(opportunity: dict, usdt_amount: float, slippage_tolerance: float, telegram_chat_id: Optional[str]) -> dict:
-    """Execute real arbitrage trades on exchanges"""
+async def transfer_between_exchanges(
+    source: ccxt.Exchange,
+    source_name: str,
+    destination: ccxt.Exchange,
+    destination_name: str,
+    currency: str,
+    amount: float,
+    opportunity_id: str
+):
+    """Withdraw from one exchange straight to another exchange's deposit address and wait for the credit"""
+    deposit_address = await get_deposit_address(destination, destination_name, currency, opportunity_id)
+    withdrawal = await withdraw_from_exchange_to_wallet(
+        source, source_name, currency, amount, deposit_address['address'], opportunity_id, deposit_address.get('tag')
+    )
+    tx_hash = withdrawal['tx_hash'] or await wait_for_withdrawal_completion(
+        source, source_name, withdrawal['id'], currency, opportunity_id
+    )
+    await wait_for_deposit_credit(destination, destination_name, currency, amount, opportunity_id, tx_hash=tx_hash)
+
+async def recent_opportunity_flow() -> List[dict]:
+    """Opportunities detected within the flow window - where capital has recently been needed"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=INVENTORY_FLOW_WINDOW_HOURS)).isoformat()
+    return await db.arbitrage_opportunities.find(
+        {'detected_at': {'$gt': cutoff}},
+        {'_id': 0, 'buy_exchange': 1, 'sell_exchange': 1, 'token_symbol': 1, 'recommended_usdt_amount': 1}
+    ).to_list(5000)
+
+async def list_active_exchange_names() -> List[str]:
+    exchanges = await db.exchanges.find({'is_active': True}, {'_id': 0, 'name': 1}).to_list(100)
+    return [exchange['name'] for exchange in exchanges]
+
+async def read_movable_inventory(keys) -> dict:
+    """Fresh free exchange balances less capital reserved by running trades, per (exchange, asset)"""
+    capital_keys = {(exchange_account(exchange_name), asset): (exchange_name, asset) for exchange_name, asset in keys}
+    balances = await read_capital_balances(capital_keys, max_age=0)
+    return {
+        holding: max(0.0, balances.get(key, 0.0) - trade_scheduler.ledger.reserved(key))
+        for key, holding in capital_keys.items() if key in balances
+    }
+
+async def rebalance_transfer(asset: str, source_name: str, destination_name: str, amount: float):
+    source, destination = await asyncio.gather(
+        get_exchange_instance(source_name),
+        get_exchange_instance(destination_name)
+    )
+    if not source or not destination:
+        raise Exception(f"Exchange {source_name if not source else destination_name} not available")
+    await transfer_between_exchanges(
+        source, source_name, destination, destination_name, asset, amount, INVENTORY_REBALANCE_LOG_ID
+    )
+
+# Targets from recent opportunity flow; trades are netted over a batch window into one transfer per asset and route
+inventory_rebalancer = InventoryRebalancer(
+    recent_opportunity_flow, read_movable_inventory, list_active_exchange_names, rebalance_transfer,
+    INVENTORY_REBALANCE_BATCH_WINDOW, INVENTORY_REBALANCE_TOLERANCE
+)
+
+async def execute_inventory_arbitrage(opportunity: dict, usdt_amount: float, slippage_tolerance: float, telegram_chat_id: Optional[str]) -> dict:
+    """
+    Execute both legs at once against pre-positioned inventory: USDT on the buy exchange, tokens on the sell exchange.
+    Latency is one order round trip; the venues are rebalanced in the background afterwards.
+    """
     
     buy_exchange_name = opportunity['buy_exchange']
     sell_exchange_name = opportunity['sell_exchange']
@@ -2144,34 +2857,37 @@ async def execute_real_arbitrage(opportunity: dict, usdt_amount: float, slippage
     symbol = f"{token_symbol}/USDT"
     
     # Get exchange instances
-    buy_exchange = await get_exchange_instance(buy_exchange_name)
-    sell_exchange = await get_exchange_instance(sell_exchange_name)
+    buy_exchange, sell_exchange = await asyncio.gather(
+        get_exchange_instance(buy_exchange_name),
+        get_exchange_instance(sell_exchange_name)
+    )
     
     if not buy_exchange:
         raise Exception(f"Buy exchange {buy_exchange_name} not available")
     if not sell_exchange:
         raise Exception(f"Sell exchange {sell_exchange_name} not available")
     
-    # Find correct symbol format
-    buy_symbol = None
-    sell_symbol = None
-    for sym in [symbol, symbol.upper(), symbol.lower()]:
-        if sym in buy_exchange.symbols:
-            buy_symbol = sym
-        if sym in sell_exchange.symbols:
-            sell_symbol = sym
+    # Find each venue's market for the token
+    buy_symbol = resolve_market_symbol(buy_exchange_name, buy_exchange, token_symbol)
+    sell_symbol = resolve_market_symbol(sell_exchange_name, sell_exchange, token_symbol)
     
     if not buy_symbol:
         raise Exception(f"Symbol {symbol} not found on {buy_exchange_name}")
     if not sell_symbol:
         raise Exception(f"Symbol {symbol} not found on {sell_exchange_name}")
     
-    # Step 1: Get fresh prices and check slippage
-    buy_ticker = await buy_exchange.fetch_ticker(buy_symbol)
-    sell_ticker = await sell_exchange.fetch_ticker(sell_symbol)
+    # Step 1: Fresh prices (bypassing the ticker cache) and both venues' inventory, in parallel
+    fresh_tickers, usdt_available, tokens_available = await asyncio.gather(
+        ticker_cache.get_many([
+            (buy_exchange_name, buy_exchange, buy_symbol),
+            (sell_exchange_name, sell_exchange, sell_symbol)
+        ], max_age=0),
+        balance_tracker.free_balance(buy_exchange_name, buy_exchange, 'USDT', max_age=0),
+        balance_tracker.free_balance(sell_exchange_name, sell_exchange, token_symbol, max_age=0)
+    )
     
-    current_buy_price = buy_ticker.get('ask', 0)
-    current_sell_price = sell_ticker.get('bid', 0)
+    current_buy_price = fresh_tickers.get((buy_exchange_name, buy_symbol), {}).get('ask', 0)
+    current_sell_price = fresh_tickers.get((sell_exchange_name, sell_symbol), {}).get('bid', 0)
     
     if not current_buy_price or not current_sell_price:
         raise Exception("Unable to fetch current prices")
@@ -2186,7 +2902,7 @@ async def execute_real_arbitrage(opportunity: dict, usdt_amount: float, slippage
     if buy_slippage > slippage_tolerance or sell_slippage > slippage_tolerance:
         raise Exception(f"Price slippage too high. Buy: {buy_slippage:.2f}%, Sell: {sell_slippage:.2f}%. Tolerance: {slippage_tolerance}%")
     
-    # Calculate token amount to buy
+    # Calculate token amount to buy (and sell from inventory)
     token_amount = usdt_amount / current_buy_price
     
     # Log step 1
@@ -2194,69 +2910,77 @@ async def execute_real_arbitrage(opportunity: dict, usdt_amount: float, slippage
         "current_buy_price": current_buy_price,
         "current_sell_price": current_sell_price,
         "buy_slippage": buy_slippage,
-        "sell_slippage": sell_slippage
+        "sell_slippage": sell_slippage,
+        "usdt_inventory": usdt_available,
+        "token_inventory": tokens_available
     }, is_live=True)
     
-    # Step 2: Place buy order (market order)
-    try:
-        buy_order = await buy_exchange.create_order(
-            symbol=buy_symbol,
-            type='market',
-            side='buy',
-            amount=token_amount
-        )
-        
-        await log_transaction(opportunity['id'], "buy_order", "completed", {
-            "order_id": buy_order.get('id'),
-            "amount": token_amount,
-            "price": current_buy_price,
-            "exchange": buy_exchange_name
-        }, is_live=True)
-        
-    except Exception as e:
-        await log_transaction(opportunity['id'], "buy_order", "failed", {"error": str(e)}, is_live=True)
-        raise Exception(f"Buy order failed: {str(e)}")
+    async def log_leg(side: str, result):
+        exchange_name = buy_exchange_name if side == 'buy' else sell_exchange_name
+        if isinstance(result, BaseException):
+            await log_transaction(opportunity['id'], f"{side}_order", "failed", {"error": str(result)}, is_live=True)
+        else:
+            await log_transaction(opportunity['id'], f"{side}_order", "completed" if result['filled'] > 0 else "failed", {
+                "order_id": result['id'],
+                "order_ids": result['order_ids'],
+                "status": result['status'],
+                "amount": token_amount,
+                "filled": result['filled'],
+                "average_price": result['average'],
+                "limit_price": result['limit_price'],
+                "fees": result['fees'],
+                "exchange": exchange_name
+            }, is_live=True)
     
-    # Step 3: Place sell order (market order)
-    # Note: In real scenario, you'd need to transfer tokens between exchanges first
-    # This simplified version assumes tokens are already on the sell exchange
-    try:
-        sell_order = await sell_exchange.create_order(
-            symbol=sell_symbol,
-            type='market',
-            side='sell',
-            amount=token_amount
-        )
-        
-        await log_transaction(opportunity['id'], "sell_order", "completed", {
-            "order_id": sell_order.get('id'),
-            "amount": token_amount,
-            "price": current_sell_price,
-            "exchange": sell_exchange_name
-        }, is_live=True)
-        
-    except Exception as e:
-        await log_transaction(opportunity['id'], "sell_order", "failed", {"error": str(e)}, is_live=True)
-        raise Exception(f"Sell order failed: {str(e)}")
+    # Step 2: Both legs at once, as limit IOC orders capped at the slippage tolerance from the fresh quotes,
+    # with the inventory reserved so concurrent trades cannot draw the same balance
+    legs = await execute_inventory_legs(
+        order_executor,
+        trade_scheduler,
+        f"inventory:{opportunity['id']}:{uuid.uuid4()}",
+        {
+            (exchange_account(buy_exchange_name), 'USDT'): usdt_amount,
+            (exchange_account(sell_exchange_name), token_symbol): token_amount
+        },
+        {
+            (exchange_account(buy_exchange_name), 'USDT'): usdt_available,
+            (exchange_account(sell_exchange_name), token_symbol): tokens_available
+        },
+        (buy_exchange, buy_symbol, current_buy_price),
+        (sell_exchange, sell_symbol, current_sell_price),
+        token_amount,
+        slippage_tolerance,
+        log_leg
+    )
+    buy_order, sell_order = legs['buy'], legs['sell']
     
-    # Calculate actual profit
-    actual_buy_cost = buy_order.get('cost', usdt_amount)
-    actual_sell_revenue = sell_order.get('cost', token_amount * current_sell_price)
-    profit = actual_sell_revenue - actual_buy_cost
-    profit_percent = (profit / actual_buy_cost) * 100
+    # Any difference between the fills is left to the rebalancer
+    matched, unhedged = legs['matched'], legs['unhedged']
+    if abs(unhedged) > matched * 1e-6:
+        logger.warning(f"Inventory legs filled unevenly for {opportunity['id']}: bought {buy_order['net_filled']}, sold {sell_order['filled']}")
+    actual_buy_cost = legs['buy_cost']
+    actual_sell_revenue = legs['sell_revenue']
+    profit = legs['profit']
+    profit_percent = legs['profit_percent']
     
     await log_transaction(opportunity['id'], "completed", "completed", {
         "buy_cost": actual_buy_cost,
         "sell_revenue": actual_sell_revenue,
+        "matched_amount": matched,
+        "unhedged_amount": unhedged,
         "profit": profit,
         "profit_percent": profit_percent
     }, is_live=True)
     
+    # Step 3: Restore inventory in the background - the trade itself is done
+    inventory_rebalancer.request()
+    
     return {
         "status": "completed",
         "opportunity_id": opportunity['id'],
         "usdt_invested": actual_buy_cost,
-        "tokens_bought": token_amount,
+        "tokens_bought": buy_order['net_filled'],
+        "tokens_sold": sell_order['filled'],
         "sell_value": actual_sell_revenue,
         "profit": round(profit, 4),
         "profit_percent": round(profit_percent, 4),
@@ -2318,8 +3042,11 @@ async def execute_simulated_arbitrage(opportunity: dict, usdt_amount: float) ->
     }
 
 
+# Transaction logs are written behind the trade path in batches
+transaction_log_sink = BatchedLogSink(db, 'transaction_logs', LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, LOG_MAX_QUEUE)
+
 async def log_transaction(opportunity_id: str, step: str, status: str, details: dict, is_live: bool = False):
-    """Log a transaction step"""
+    """Log a transaction step (queued - never waits on the database; failures and trade completions are written right away)"""
     log = TransactionLog(
         opportunity_id=opportunity_id,
         step=step,
@@ -2327,12 +3054,60 @@ async def log_transaction(opportunity_id: str, step: str, status: str, details:
         details=details,
         is_live=is_live
     )
-    await db.transaction_logs.insert_one(log.model_dump())
+    transaction_log_sink.write(log.model_dump(), urgent=status == 'failed' or step == 'completed')
 
+async def flush_transaction_logs():
+    """Persist every queued transaction log (at terminal states and before reading logs back)"""
+    try:
+        await transaction_log_sink.flush()
+    except Exception as e:
+        logger.warning(f"Transaction log flush failed, records stay queued: {e}")
+
+
+@api_router.get("/arbitrage/jobs/{job_id}")
+async def get_arbitrage_job(job_id: str):
+    """Get the state of a queued or running arbitrage job"""
+    job = await db.failsafe_states.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def group_by_exchange(amounts: dict) -> dict:
+    grouped = {}
+    for (exchange_name, asset), amount in amounts.items():
+        grouped.setdefault(exchange_name, {})[asset] = amount
+    return grouped
+
+@api_router.get("/inventory/plan")
+async def get_inventory_plan():
+    """Inventory per exchange, targets from recent opportunity flow and the transfers a rebalance would make"""
+    holdings, targets, plan = await inventory_rebalancer.plan()
+    return {
+        "holdings": group_by_exchange(holdings),
+        "targets": group_by_exchange(targets),
+        "transfers": [
+            {"asset": asset, "from": source, "to": destination, "amount": amount}
+            for (asset, source, destination), amount in plan.items()
+        ],
+        "rebalancer": inventory_rebalancer.stats()
+    }
+
+@api_router.post("/inventory/rebalance")
+async def rebalance_inventory(authenticated: bool = Depends(verify_api_key)):
+    """Start a rebalance now - REQUIRES AUTHENTICATION"""
+    plan = await inventory_rebalancer.rebalance()
+    return {
+        "status": "started" if plan else "balanced",
+        "transfers": [
+            {"asset": asset, "from": source, "to": destination, "amount": amount}
+            for (asset, source, destination), amount in plan.items()
+        ]
+    }
 
 @api_router.get("/transactions/{opportunity_id}")
 async def get_transaction_logs(opportunity_id: str):
     """Get transaction logs for an arbitrage opportunity"""
+    await flush_transaction_logs()
     logs = await db.transaction_logs.find({"opportunity_id": opportunity_id}, {"_id": 0}).to_list(100)
     return logs
 
@@ -2355,7 +3130,8 @@ async def get_activity(limit: int = 100):
         {"_id": 0}
     ).sort("detected_at", -1).to_list(limit)
     
-    # Get all transaction logs
+    # Get all transaction logs (including any still queued)
+    await flush_transaction_logs()
     logs = await db.transaction_logs.find(
         {},
         {"_id": 0}
@@ -2406,14 +3182,33 @@ async def root():
 async def health_check():
     settings = await db.settings.find_one({}, {"_id": 0})
     is_live = settings.get('is_live_mode', False) if settings else False
+    bsc_mainnet_connected, bsc_testnet_connected = await asyncio.gather(
+        bsc_service.is_connected(True),
+        bsc_service.is_connected(False)
+    )
     
     return {
         "status": "healthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "exchanges_active": len(exchange_instances),
+        "ticker_cache": ticker_cache.stats(),
+        "order_book_cache": order_book_cache.stats(),
+        "market_poller": market_poller.stats(),
+        "market_streamer": market_streamer.stats() if MARKET_STREAMING_ENABLED else None,
+        "arbitrage_detector": arbitrage_detector.stats(),
+        "exchange_fees": fee_registry.stats(),
+        "exchange_balances": balance_tracker.stats(),
+        "exchange_transfers": transfer_tracker.stats(),
+        "order_execution": order_executor.stats(),
+        "transaction_log_queue": transaction_log_sink.stats(),
+        "spread_watch": spread_watch.stats(),
+        "execution_jobs": trade_scheduler.stats(),
+        "transfer_timings": transfer_timings.stats(),
+        "inventory_rebalancer": inventory_rebalancer.stats(),
         "mode": "LIVE" if is_live else "TEST",
-        "bsc_mainnet_connected": bsc_service.mainnet_w3.is_connected() if bsc_service.mainnet_w3 else False,
-        "bsc_testnet_connected": bsc_service.testnet_w3.is_connected() if bsc_service.testnet_w3 else False
+        "bsc_mainnet_connected": bsc_mainnet_connected,
+        "bsc_testnet_connected": bsc_testnet_connected,
+        "bsc_rpc": bsc_service.stats()
     }
 
 @api_router.get("/stats")
@@ -2454,6 +3249,23 @@ async def startup_event():
     try:
         await db_instance.connect()
         db_type = "MongoDB" if IS_MONGODB else "MySQL"
+        
+        # Start background market data refresh
+        if MARKET_POLL_ENABLED:
+            market_poller.start()
+        
+        # Warm-start cached exchange fees and keep them refreshed
+        await fee_registry.warm_start()
+        fee_registry.start(list_active_exchange_instances)
+        await transfer_timings.warm_start()
+        
+        # Execute queued arbitrage jobs and pick up any interrupted by a restart
+        # (mid-trade states written before jobs stored their opportunity are left for manual review)
+        trade_scheduler.start()
+        resumed = await trade_scheduler.resume(required_fields=('opportunity',))
+        if resumed:
+            logger.info(f"Resumed {resumed} unfinished arbitrage jobs")
+        
         logger.info(f"Application started successfully with {db_type}")
     except Exception as e:
         logger.error(f"Startup error: {e}")
@@ -2462,9 +3274,26 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    # Interrupt running jobs; they resume from their last checkpoint on the next start
+    await trade_scheduler.stop()
+    await inventory_rebalancer.stop()
+    
+    # Stop background market data refresh
+    await market_poller.stop()
+    await market_streamer.stop()
+    await fee_registry.stop()
+    await balance_tracker.stop()
+    await transfer_tracker.stop()
+    
     # Close all exchange instances
     await close_exchange_instances()
     
+    # Close BSC RPC sessions
+    await bsc_service.close()
+    
+    # Write out queued transaction logs
+    await transaction_log_sink.stop()
+    
     # Close database connection
     await db_instance.close()
     
@@ -0,0 +1,157 @@
+"""
+Spread Watch for Crypto Arbitrage Bot
+Executions wait on spread thresholds fed by the shared market data instead of polling tickers
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Watch:
+    def __init__(self, token_symbol: str, buy_exchange: str, sell_exchange: str, target: float, stop_loss: float):
+        self.token_symbol = token_symbol
+        self.buy_exchange = buy_exchange
+        self.sell_exchange = sell_exchange
+        self.target = target
+        self.stop_loss = stop_loss
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.latest: Optional[dict] = None
+        self.updates = 0
+
+
+class SpreadWatch:
+    """
+    Holds the latest bid/ask for every watched token, fed by the market poller and websocket streams
+    through update(). A waiting execution is only woken when its spread crosses the target or stop-loss.
+    If the feed goes quiet for a watched pair (token not polled, venue not streamed), the watch refreshes
+    the pair itself every fallback_interval seconds via refresh(token_symbol, buy_exchange, sell_exchange),
+    which should fetch both tickers and pass them to update().
+
+    Spread = (sell venue bid - buy venue ask) / buy venue ask * 100, as in the detector.
+    """
+
+    def __init__(
+        self,
+        refresh: Optional[Callable[[str, str, str], Awaitable[Any]]] = None,
+        fallback_interval: float = 10.0
+    ):
+        self.refresh = refresh
+        self.fallback_interval = fallback_interval
+        self._watches: Dict[str, List[_Watch]] = {}
+        self._quotes: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+        self.fallback_refreshes = 0
+
+    # ---------- feed ----------
+
+    def update(self, token_symbol: str, exchange_name: str, bid: Optional[float], ask: Optional[float]):
+        """Record a quote; evaluates only the watches on this token and venue"""
+        watches = self._watches.get(token_symbol)
+        if not watches:
+            return
+        exchange_name = exchange_name.lower()
+        self._quotes[(token_symbol, exchange_name)] = (bid or 0.0, ask or 0.0, time.monotonic())
+        for watch in watches:
+            if exchange_name in (watch.buy_exchange, watch.sell_exchange):
+                self._evaluate(watch)
+
+    def _evaluate(self, watch: _Watch):
+        buy_quote = self._quotes.get((watch.token_symbol, watch.buy_exchange))
+        sell_quote = self._quotes.get((watch.token_symbol, watch.sell_exchange))
+        if not buy_quote or not sell_quote or buy_quote[1] <= 0 or watch.future.done():
+            return
+        buy_price, sell_price = buy_quote[1], sell_quote[0]
+        spread = (sell_price - buy_price) / buy_price * 100
+        watch.latest = {'spread': spread, 'buy_price': buy_price, 'sell_price': sell_price}
+        watch.updates += 1
+        if spread >= watch.target:
+            watch.future.set_result('target')
+        elif spread <= watch.stop_loss:
+            watch.future.set_result('stop_loss')
+
+    def _last_quote_at(self, watch: _Watch) -> Optional[float]:
+        times = [
+            quote[2] for quote in (
+                self._quotes.get((watch.token_symbol, watch.buy_exchange)),
+                self._quotes.get((watch.token_symbol, watch.sell_exchange))
+            ) if quote
+        ]
+        return min(times) if len(times) == 2 else None
+
+    # ---------- waiting ----------
+
+    async def wait(
+        self,
+        token_symbol: str,
+        buy_exchange: str,
+        sell_exchange: str,
+        target: float,
+        stop_loss: float,
+        timeout: float,
+        on_sample: Optional[Callable[[dict], Awaitable[Any]]] = None,
+        sample_interval: float = 60.0,
+        fallback_interval: Optional[float] = None
+    ) -> dict:
+        """
+        Wait until the spread reaches target, falls to stop_loss, or timeout seconds pass.
+        on_sample(latest) is awaited at most every sample_interval seconds with the latest spread (for
+        persisting/broadcasting progress) and once more with the final one. fallback_interval overrides the
+        default quiet-feed refresh interval for this wait.
+        Returns the latest {'spread', 'buy_price', 'sell_price'} (None values if never quoted) plus 'reason':
+        'target', 'stop_loss' or 'timeout'.
+        """
+        watch = _Watch(token_symbol, buy_exchange.lower(), sell_exchange.lower(), target, stop_loss)
+        fallback_interval = fallback_interval or self.fallback_interval
+        self._watches.setdefault(token_symbol, []).append(watch)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        last_sample = loop.time()
+        try:
+            self._evaluate(watch)
+            while not watch.future.done():
+                now = loop.time()
+                if now >= deadline:
+                    break
+
+                quoted_at = self._last_quote_at(watch)
+                if self.refresh and (quoted_at is None or time.monotonic() - quoted_at >= fallback_interval):
+                    self.fallback_refreshes += 1
+                    try:
+                        await self.refresh(token_symbol, buy_exchange, sell_exchange)
+                    except Exception as e:
+                        logger.warning(f"Spread refresh failed for {token_symbol}: {e}")
+                    if watch.future.done():
+                        break
+
+                if on_sample and watch.latest and loop.time() - last_sample >= sample_interval:
+                    last_sample = loop.time()
+                    await on_sample(dict(watch.latest))
+
+                wake = min(deadline - loop.time(), fallback_interval, sample_interval)
+                try:
+                    await asyncio.wait_for(asyncio.shield(watch.future), max(wake, 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._watches[token_symbol].remove(watch)
+            if not self._watches[token_symbol]:
+                del self._watches[token_symbol]
+                for key in [key for key in self._quotes if key[0] == token_symbol]:
+                    del self._quotes[key]
+
+        result = dict(watch.latest or {'spread': None, 'buy_price': None, 'sell_price': None})
+        result['reason'] = watch.future.result() if watch.future.done() else 'timeout'
+        result['updates'] = watch.updates
+        if on_sample and watch.latest:
+            await on_sample(dict(watch.latest))
+        return result
+
+    def stats(self) -> dict:
+        return {
+            'watches': sum(len(watches) for watches in self._watches.values()),
+            'tokens': sorted(self._watches),
+            'fallback_refreshes': self.fallback_refreshes
+        }
@@ -0,0 +1,137 @@
+"""
+Execution Step Graph for Crypto Arbitrage Bot
+Runs trade steps as a dependency graph so independent steps overlap, with critical-path timing
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+StepFunction = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class _Step:
+    def __init__(self, name: str, func: StepFunction, depends_on: Sequence[str]):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.status = 'pending'
+
+
+class StepGraph:
+    """
+    Each step is an async callable receiving the results of finished steps (keyed by step name). A step
+    starts as soon as all of its dependencies have finished; the first failure cancels every step still
+    running and is re-raised from run(). timings() reports, per step, when it started and finished
+    relative to the start of the run and whether it lies on the critical path.
+
+    Steps found in `results` (e.g. checkpoints of an interrupted run) are not run again, and
+    on_step_complete(name, result) is awaited after each step so results can be persisted.
+    """
+
+    def __init__(
+        self,
+        results: Optional[Dict[str, Any]] = None,
+        on_step_complete: Optional[Callable[[str, Any], Awaitable[None]]] = None
+    ):
+        self._steps: Dict[str, _Step] = {}
+        self.results: Dict[str, Any] = dict(results or {})
+        self.on_step_complete = on_step_complete
+        self.failed_step: Optional[str] = None
+        self._started_at: Optional[float] = None
+
+    def add(self, name: str, func: StepFunction, depends_on: Sequence[str] = ()) -> 'StepGraph':
+        if name in self._steps:
+            raise ValueError(f"Duplicate step: {name}")
+        missing = [dep for dep in depends_on if dep not in self._steps]
+        if missing:
+            # Dependencies must be added first, which also rules out cycles
+            raise ValueError(f"Step {name} depends on unknown steps: {missing}")
+        self._steps[name] = _Step(name, func, depends_on)
+        return self
+
+    async def _run_step(self, step: _Step, tasks: Dict[str, asyncio.Task]):
+        for dep in step.depends_on:
+            await tasks[dep]
+        if step.name in self.results:
+            step.status = 'restored'
+            return
+        step.status = 'running'
+        step.started_at = time.monotonic()
+        try:
+            result = await step.func(self.results)
+            if self.on_step_complete is not None:
+                await self.on_step_complete(step.name, result)
+            self.results[step.name] = result
+        except asyncio.CancelledError:
+            step.status = 'cancelled'
+            raise
+        except Exception:
+            step.status = 'failed'
+            if self.failed_step is None:
+                self.failed_step = step.name
+            raise
+        finally:
+            step.finished_at = time.monotonic()
+        step.status = 'completed'
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every step; returns the results by step name"""
+        self._started_at = time.monotonic()
+        tasks: Dict[str, asyncio.Task] = {}
+        for name, step in self._steps.items():
+            tasks[name] = asyncio.create_task(self._run_step(step, tasks))
+
+        try:
+            done, pending = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        failure = next((task.exception() for task in done if not task.cancelled() and task.exception()), None)
+        if failure is not None:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            # Dependents re-raise the same exception; retrieve it so none is reported as unhandled
+            for task in tasks.values():
+                if task.done() and not task.cancelled():
+                    task.exception()
+            raise failure
+        return self.results
+
+    def critical_path(self) -> List[str]:
+        """Steps that bounded the run: walk back from the last step to finish through its latest dependency"""
+        finished = [step for step in self._steps.values() if step.finished_at is not None]
+        if not finished:
+            return []
+        step = max(finished, key=lambda s: s.finished_at)
+        path = [step.name]
+        while step.depends_on:
+            step = max((self._steps[dep] for dep in step.depends_on), key=lambda s: s.finished_at or 0)
+            if step.finished_at is None:
+                break  # Restored from an earlier run
+            path.append(step.name)
+        return path[::-1]
+
+    def timings(self) -> Dict[str, dict]:
+        """Per-step start/end offsets and duration in seconds (end = critical-path latency up to that step)"""
+        critical = set(self.critical_path())
+        timings = {}
+        for name, step in self._steps.items():
+            entry = {'status': step.status, 'critical': name in critical}
+            if step.started_at is not None:
+                end = step.finished_at or time.monotonic()
+                entry.update({
+                    'start': round(step.started_at - self._started_at, 3),
+                    'end': round(end - self._started_at, 3),
+                    'duration': round(end - step.started_at, 3)
+                })
+            timings[name] = entry
+        return timings
@@ -0,0 +1,100 @@
+"""
+Arbitrage Detection Engine Tests
+Vectorized spread matrix and depth analysis
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from arbitrage_engine import SpreadMatrix, book_side, depth_confidence, optimize_trade_size, simulate_fills
+
+
+class TestSpreadMatrix:
+    """Vectorized pairwise spreads"""
+
+    def test_returns_every_profitable_pair_ranked_after_fees(self):
+        token_tickers = {
+            'BTC': {
+                'a': {'bid': 100.0, 'ask': 100.0},
+                'b': {'bid': 102.0, 'ask': 102.0},
+                'c': {'bid': 101.0, 'ask': 101.0},
+            },
+            'ETH': {
+                'a': {'bid': 10.0, 'ask': 10.0},
+                'b': {'bid': None, 'ask': None},
+            },
+        }
+        matrix = SpreadMatrix.from_tickers(token_tickers, ['a', 'b', 'c'], {'a': 0.0, 'b': 0.0, 'c': 0.0})
+
+        pairs = matrix.opportunities(0.5)
+
+        assert [(p['buy_exchange'], p['sell_exchange']) for p in pairs] == [('a', 'b'), ('a', 'c'), ('c', 'b')]
+        assert pairs[0]['net_spread_percent'] == pytest.approx(2.0)
+
+    def test_fee_vector_reduces_net_spread(self):
+        token_tickers = {'BTC': {'a': {'bid': 100.0, 'ask': 100.0}, 'b': {'bid': 101.0, 'ask': 101.0}}}
+        matrix = SpreadMatrix.from_tickers(token_tickers, ['a', 'b'], {'a': 0.001, 'b': 0.005})
+
+        (pair,) = matrix.opportunities(0.0)
+
+        assert pair['spread_percent'] == pytest.approx(1.0)
+        expected = (101.0 * 0.995 - 100.0 * 1.001) / (100.0 * 1.001) * 100
+        assert pair['net_spread_percent'] == pytest.approx(expected)
+
+    def test_scan_of_100_tokens_by_10_venues_is_fast(self):
+        rng = np.random.default_rng(7)
+        exchanges = [f"ex{i}" for i in range(10)]
+        token_tickers = {
+            f"T{t}": {
+                exchange_name: {'bid': price, 'ask': price * 1.001}
+                for exchange_name, price in zip(exchanges, rng.uniform(99.0, 101.0, 10))
+            }
+            for t in range(100)
+        }
+        matrix = SpreadMatrix.from_tickers(token_tickers, exchanges)
+
+        matrix.compute()
+        started = time.perf_counter()
+        for _ in range(100):
+            matrix.compute()
+        elapsed = (time.perf_counter() - started) / 100
+
+        assert elapsed < 0.005
+
+
+class TestDepthAnalysis:
+    """Order-book VWAP fills and trade sizing"""
+
+    def test_vwap_fill_walks_levels(self):
+        asks = book_side([[100.0, 1.0], [101.0, 2.0]])
+        bids = book_side([[104.0, 1.0], [102.0, 2.0]])
+
+        fills = simulate_fills(*asks, *bids, [50.0, 200.0, 10_000.0])
+
+        assert fills['tokens'][0] == pytest.approx(0.5)
+        assert fills['buy_vwap'][1] == pytest.approx(200.0 / (1 + 100.0 / 101.0))
+        assert list(fills['fillable']) == [True, True, False]
+
+    def test_optimal_size_balances_slippage_against_fixed_cost(self):
+        buy_book = {'asks': [[100.0, 1.0], [101.0, 2.0], [103.0, 5.0]]}
+        sell_book = {'bids': [[104.0, 1.0], [102.0, 2.0], [100.0, 5.0]]}
+
+        analysis = optimize_trade_size(buy_book, sell_book, 0.001, 0.001, fixed_cost=0.5, max_size=800.0)
+
+        assert 100.0 < analysis['size'] < 400.0
+        assert analysis['net_profit'] > 0
+        assert analysis['buy_slippage_percent'] > 0
+        assert 0 < depth_confidence(analysis) <= 95
+
+    def test_unprofitable_books_have_no_size(self):
+        buy_book = {'asks': [[100.0, 10.0]]}
+        sell_book = {'bids': [[99.0, 10.0]]}
+
+        assert optimize_trade_size(buy_book, sell_book) is None
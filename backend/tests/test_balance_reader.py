@@ -0,0 +1,111 @@
+"""
+Batched Balance Reader Tests
+Runs BalanceReader against a local stand-in BSC JSON-RPC node with a fake Multicall3
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+from eth_abi import decode, encode
+from web3 import AsyncWeb3, Web3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from balance_reader import AGGREGATE3_SELECTOR, MULTICALL3_ADDRESS, BalanceReader
+
+WALLET = Web3.to_checksum_address('0x' + '22' * 20)
+USDT = Web3.to_checksum_address('0x' + '55' * 20)
+CAKE = Web3.to_checksum_address('0x' + '66' * 20)
+BROKEN = Web3.to_checksum_address('0x' + '77' * 20)
+
+TOKENS = {USDT: (18, 250 * 10 ** 18), CAKE: (6, 3 * 10 ** 6)}
+
+
+class FakeNode:
+    """Answers eth_call for Multicall3.aggregate3 and plain ERC20 calls"""
+
+    def __init__(self, multicall=True):
+        self.multicall = multicall
+        self.methods = []
+
+    def contract_call(self, target, data):
+        if target == Web3.to_checksum_address(MULTICALL3_ADDRESS) and data[:4] == bytes.fromhex('4d2301cc'):
+            return True, encode(['uint256'], [2 * 10 ** 18])
+        if target not in TOKENS:
+            return False, b''
+        decimals, balance = TOKENS[target]
+        if data[:4] == bytes.fromhex('313ce567'):
+            return True, encode(['uint8'], [decimals])
+        return True, encode(['uint256'], [balance])
+
+    async def handle(self, request):
+        body = await request.json()
+        self.methods.append(body['method'])
+        if body['method'] == 'eth_chainId':
+            return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'result': '0x38'})
+        if body['method'] == 'eth_getBalance':
+            return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'result': hex(2 * 10 ** 18)})
+
+        tx = body['params'][0]
+        target = Web3.to_checksum_address(tx['to'])
+        data = bytes.fromhex((tx.get('data') or tx.get('input'))[2:])
+        if target == Web3.to_checksum_address(MULTICALL3_ADDRESS) and data[:4] == AGGREGATE3_SELECTOR:
+            if not self.multicall:
+                return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'error': {'code': -32000, 'message': 'execution reverted'}})
+            calls = decode(['(address,bool,bytes)[]'], data[4:])[0]
+            results = [self.contract_call(Web3.to_checksum_address(t), d) for t, _, d in calls]
+            result = encode(['(bool,bytes)[]'], [results])
+        else:
+            success, result = self.contract_call(target, data)
+            if not success:
+                return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'error': {'code': -32000, 'message': 'execution reverted'}})
+        return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'result': '0x' + result.hex()})
+
+
+async def run_reader(node, check):
+    app = web.Application()
+    app.router.add_post('/', node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(f'http://127.0.0.1:{port}/'))
+    try:
+        await check(BalanceReader(w3))
+    finally:
+        await w3.provider.disconnect()
+        await runner.cleanup()
+
+
+class TestBalanceReader:
+    """Multicall-batched balance reads"""
+
+    def test_single_round_trip_and_cached_decimals(self):
+        node = FakeNode()
+
+        async def check(reader):
+            balances = await reader.read([WALLET], [USDT, CAKE, BROKEN])
+            assert balances[WALLET] == {'BNB': 2.0, USDT: 250.0, CAKE: 3.0}
+            assert node.methods.count('eth_call') == 1
+            assert reader.cached_decimals(CAKE) == 6
+
+            await reader.read([WALLET], [USDT, CAKE])
+            assert node.methods.count('eth_call') == 2  # Decimals were not refetched
+            assert reader.round_trips == 2
+
+        asyncio.run(run_reader(node, check))
+
+    def test_falls_back_to_individual_calls_without_multicall(self):
+        node = FakeNode(multicall=False)
+
+        async def check(reader):
+            balances = await reader.read([WALLET], [USDT])
+            assert balances[WALLET] == {'BNB': 2.0, USDT: 250.0}
+            assert 'eth_getBalance' in node.methods
+
+        asyncio.run(run_reader(node, check))
@@ -0,0 +1,108 @@
+"""
+Exchange Balance Tracker Tests
+Shared refresh loop, change events and increase waiters
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from balance_tracker import BalanceTracker
+
+
+class FakeExchange:
+    """REST venue whose balances the test changes directly"""
+
+    def __init__(self, **free):
+        self.free = dict(free)
+        self.calls = 0
+
+    async def fetch_balance(self):
+        self.calls += 1
+        return {'free': dict(self.free), 'used': {}, 'total': dict(self.free)}
+
+
+class FakeBalanceStream:
+    """ccxt.pro-style client pushing queued balance snapshots"""
+    has = {'watchBalance': True}
+
+    def __init__(self):
+        self.updates = asyncio.Queue()
+        self.closed = False
+
+    async def watch_balance(self):
+        free = await self.updates.get()
+        return {'free': free, 'used': {}, 'total': free}
+
+    async def close(self):
+        self.closed = True
+
+
+class TestBalanceTracker:
+    """Per-venue balance tracking"""
+
+    def test_waiters_share_one_refresh_loop(self):
+        exchange = FakeExchange(USDT=100.0, ETH=1.0)
+        tracker = BalanceTracker(interval=0.01)
+        events = []
+        tracker.add_listener(lambda exchange_name, asset, previous, current: events.append((asset, previous['free'], current['free'])))
+
+        async def run():
+            waiters = [
+                asyncio.create_task(tracker.wait_for_increase('binance', exchange, 'USDT', 50.0, baseline=100.0, timeout=2)),
+                asyncio.create_task(tracker.wait_for_increase('binance', exchange, 'USDT', 20.0, baseline=100.0, timeout=2)),
+                asyncio.create_task(tracker.wait_for_increase('binance', exchange, 'ETH', 0.5, baseline=1.0, timeout=2)),
+            ]
+            await asyncio.sleep(0.05)
+            calls_before = exchange.calls
+            await asyncio.sleep(0.05)
+            # One venue loop regardless of the number of waiters (~one fetch per interval)
+            assert exchange.calls - calls_before <= 8
+
+            exchange.free['USDT'] = 160.0
+            exchange.free['ETH'] = 1.6
+            increases = await asyncio.gather(*waiters)
+            assert increases == pytest.approx([60.0, 60.0, 0.6])
+            await tracker.stop()
+
+        asyncio.run(run())
+        assert ('USDT', 100.0, 160.0) in events
+        assert tracker.stats()['binance']['waiters'] == 0
+
+    def test_credit_before_waiting_is_not_missed_with_baseline(self):
+        exchange = FakeExchange(USDT=150.0)
+        tracker = BalanceTracker(interval=0.01)
+
+        async def run():
+            increase = await tracker.wait_for_increase('kucoin', exchange, 'USDT', 49.5, baseline=100.0, timeout=1)
+            assert increase == pytest.approx(50.0)
+            with pytest.raises(asyncio.TimeoutError):
+                await tracker.wait_for_increase('kucoin', exchange, 'USDT', 10.0, timeout=0.05)
+            await tracker.stop()
+
+        asyncio.run(run())
+
+    def test_uses_private_balance_stream_when_available(self):
+        exchange = FakeExchange(USDT=0.0)
+
+        async def run():
+            stream = FakeBalanceStream()
+
+            async def factory(exchange_name):
+                return stream
+
+            tracker = BalanceTracker(interval=0.01, stream_client_factory=factory)
+            waiter = asyncio.create_task(tracker.wait_for_increase('gate', exchange, 'USDT', 10.0, timeout=1))
+            await asyncio.sleep(0.02)
+            await stream.updates.put({'USDT': 25.0})
+            assert await waiter == pytest.approx(25.0)
+            assert exchange.calls == 1  # Only the baseline snapshot used REST
+            assert tracker.stats()['gate']['streaming']
+            await tracker.stop()
+            assert stream.closed
+
+        asyncio.run(run())
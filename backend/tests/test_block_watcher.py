@@ -0,0 +1,128 @@
+"""
+Block Watcher Tests
+Shared receipt resolution against a local stand-in JSON-RPC node
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+from web3 import AsyncWeb3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from block_watcher import BlockWatcher
+from rpc_pool import PooledAsyncProvider, RPCPool
+
+
+class ChainNode:
+    """Stand-in node: the test moves the head and decides which transactions are mined"""
+
+    def __init__(self):
+        self.block = 100
+        self.mined = {}
+        self.batches = []
+        self.block_polls = 0
+        self.failing_batches = 0
+
+    def answer(self, request):
+        if request['method'] == 'eth_blockNumber':
+            self.block_polls += 1
+            result = hex(self.block)
+        elif request['method'] == 'eth_chainId':
+            result = '0x38'
+        else:
+            tx_hash = request['params'][0]
+            block, status = self.mined.get(tx_hash, (None, None))
+            result = {'transactionHash': tx_hash, 'blockNumber': hex(block), 'status': hex(status)} if block else None
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': result}
+
+    async def handle(self, request):
+        body = await request.json()
+        if isinstance(body, list):
+            if self.failing_batches:
+                self.failing_batches -= 1
+                return web.json_response({'error': 'overloaded'}, status=503)
+            self.batches.append(len(body))
+            return web.json_response([self.answer(item) for item in body])
+        return web.json_response(self.answer(body))
+
+
+async def run_watcher(node, check):
+    app = web.Application()
+    app.router.add_post('/', node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    pool = RPCPool([f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"])
+    watcher = BlockWatcher(AsyncWeb3(PooledAsyncProvider(pool)), poll_interval=0.01)
+    try:
+        await check(watcher)
+    finally:
+        await watcher.stop()
+        await pool.close()
+        await runner.cleanup()
+
+
+def tx(n):
+    return '0x' + f'{n:064x}'
+
+
+class TestBlockWatcher:
+    """Batched receipt polling"""
+
+    def test_concurrent_waiters_share_one_batch_per_block(self):
+        node = ChainNode()
+
+        async def check(watcher):
+            waiters = [asyncio.create_task(watcher.wait_for_receipt(tx(n), confirmations=2, timeout=5)) for n in range(5)]
+            await asyncio.sleep(0.05)
+            assert not any(waiter.done() for waiter in waiters)
+            assert node.batches == [5]  # Unmined head polled once, all hashes in one batch
+
+            for n in range(5):
+                node.mined[tx(n)] = (101, 1)
+            node.block = 101
+            await asyncio.sleep(0.05)
+            assert not any(waiter.done() for waiter in waiters)  # One confirmation so far
+
+            node.block = 102
+            receipts = await asyncio.gather(*waiters)
+            assert [receipt['confirmations'] for receipt in receipts] == [2] * 5
+            assert node.batches == [5, 5]
+
+            await asyncio.sleep(0.05)
+            assert not watcher.stats()['running']  # Loop stops once nobody is waiting
+
+        asyncio.run(run_watcher(node, check))
+
+    def test_timeout_and_reverted_status(self):
+        node = ChainNode()
+        node.mined[tx(1)] = (100, 0)
+
+        async def check(watcher):
+            receipt = await watcher.wait_for_receipt(tx(1), timeout=5)
+            assert receipt['status'] == 0
+
+            with pytest.raises(asyncio.TimeoutError):
+                await watcher.wait_for_receipt(tx(2), timeout=0.05)
+            assert watcher.stats()['pending_transactions'] == 0
+
+        asyncio.run(run_watcher(node, check))
+
+    def test_failed_receipt_batch_is_retried_on_the_same_block(self):
+        node = ChainNode()
+        node.mined[tx(1)] = (100, 1)
+        node.failing_batches = 1
+
+        async def check(watcher):
+            receipt = await watcher.wait_for_receipt(tx(1), timeout=2)  # The head never moves past 100
+            assert receipt['confirmations'] == 1
+            assert watcher.stats()['errors'] == 1
+            assert watcher.stats()['block_number'] == 100
+
+        asyncio.run(run_watcher(node, check))
@@ -0,0 +1,191 @@
+"""
+BSC Wallet Tests
+AsyncWeb3 wallet paths in server.py - balance reads, signed transfers and receipt confirmation - against a stub provider
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+rlp = pytest.importorskip("rlp")
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_utils import keccak
+from web3 import AsyncWeb3, Web3
+from web3.providers.async_base import AsyncBaseProvider
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import server
+from balance_reader import AGGREGATE3_SELECTOR, MULTICALL3_ADDRESS
+from tx_manager import TRANSFER_MIN_GAS
+
+EXCHANGE = Web3.to_checksum_address('0x' + '33' * 20)
+GAS_PRICE = 3 * 10 ** 9
+
+
+class StubProvider(AsyncBaseProvider):
+    """
+    In-process BSC node: USDT balances through a fake Multicall3, a local mempool and a head the test moves.
+    Broadcast transactions are mined into `mined` only when the test says so.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.block = 100
+        self.balances = {}  # address -> (bnb wei, usdt units)
+        self.sent = []
+        self.mined = {}  # tx hash -> (block, status)
+        self.methods = []
+
+    def contract_call(self, target, data):
+        address = decode(['address'], data[4:])[0] if len(data) > 4 else None
+        bnb, usdt = self.balances.get(Web3.to_checksum_address(address), (0, 0)) if address else (0, 0)
+        if target == Web3.to_checksum_address(MULTICALL3_ADDRESS) and data[:4] == bytes.fromhex('4d2301cc'):
+            return True, encode(['uint256'], [bnb])
+        if target != Web3.to_checksum_address(server.USDT_MAINNET):
+            return False, b''
+        if data[:4] == bytes.fromhex('313ce567'):
+            return True, encode(['uint8'], [18])
+        return True, encode(['uint256'], [usdt])
+
+    def answer(self, method, params):
+        self.methods.append(method)
+        if method == 'eth_call':
+            data = bytes.fromhex((params[0].get('data') or params[0].get('input'))[2:])
+            calls = decode(['(address,bool,bytes)[]'], data[4:])[0] if data[:4] == AGGREGATE3_SELECTOR else []
+            results = [self.contract_call(Web3.to_checksum_address(target), call) for target, _, call in calls]
+            return '0x' + encode(['(bool,bytes)[]'], [results]).hex()
+        if method == 'eth_sendRawTransaction':
+            self.sent.append(params[0])
+            return '0x' + keccak(hexstr=params[0]).hex()
+        if method == 'eth_getTransactionReceipt':
+            block, status = self.mined.get(params[0], (None, None))
+            return {'transactionHash': params[0], 'blockNumber': hex(block), 'status': hex(status)} if block else None
+        return {
+            'eth_chainId': '0x38',
+            'eth_blockNumber': hex(self.block),
+            'eth_gasPrice': hex(GAS_PRICE),
+            'eth_estimateGas': hex(52000),
+            'eth_getTransactionCount': hex(len(self.sent)),
+        }[method]
+
+    async def make_request(self, method, params):
+        return {'jsonrpc': '2.0', 'id': 1, 'result': self.answer(method, params)}
+
+    async def make_batch_request(self, requests):
+        return [
+            {'jsonrpc': '2.0', 'id': request_id, 'result': self.answer(method, params)}
+            for request_id, (method, params) in enumerate(requests)
+        ]
+
+    async def is_connected(self, show_traceback=False):
+        return True
+
+
+class StubWalletService(server.BSCWalletService):
+    """BSCWalletService with both chains served by one stub provider"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        super().__init__()
+
+    def _init_connections(self):
+        self.mainnet_pool = self.testnet_pool = server.RPCPool(['http://127.0.0.1:9/'])
+        self.mainnet_w3 = self.testnet_w3 = AsyncWeb3(self.provider)
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Stub node, the wallet service wired to it, and the transaction log entries written"""
+    monkeypatch.setattr(server, 'BSC_BLOCK_POLL_INTERVAL', 0.01)
+    provider = StubProvider()
+    service = StubWalletService(provider)
+    logs = []
+
+    async def log_transaction(opportunity_id, step, status, details, is_live=False):
+        logs.append((step, status, details))
+
+    monkeypatch.setattr(server, 'bsc_service', service)
+    monkeypatch.setattr(server, 'log_transaction', log_transaction)
+    return provider, service, logs
+
+
+class TestBSCWallet:
+    """Chain paths of the wallet service"""
+
+    def test_wallet_balances_come_from_one_multicall(self, chain):
+        provider, service, _ = chain
+        wallet = Account.create().address
+        provider.balances[wallet] = (2 * 10 ** 18, 125 * 10 ** 18)
+
+        bnb, usdt = asyncio.run(service.get_wallet_balances(wallet.lower()))
+
+        assert (bnb, usdt) == (2.0, 125.0)
+        assert provider.methods.count('eth_call') == 1
+
+    def test_transfer_is_built_signed_and_broadcast(self, chain):
+        provider, service, logs = chain
+        account = Account.create()
+
+        tx_hash = asyncio.run(server.send_token_from_wallet_to_exchange(
+            service.mainnet_w3, account.key.hex(), server.USDT_MAINNET, EXCHANGE, 12.5, 'opp-1', 'send_usdt'
+        ))
+
+        (raw,) = provider.sent
+        assert tx_hash == '0x' + keccak(hexstr=raw).hex()
+        assert Account.recover_transaction(raw) == account.address
+        nonce, gas_price, gas, to, value, data, v, _, _ = rlp.decode(bytes.fromhex(raw[2:]))
+        assert int.from_bytes(nonce, 'big') == 0
+        assert int.from_bytes(gas_price, 'big') == GAS_PRICE
+        assert int.from_bytes(gas, 'big') == TRANSFER_MIN_GAS  # 52000 * 1.2 is below the floor
+        assert Web3.to_checksum_address(to) == server.USDT_MAINNET
+        assert value == b''
+        assert int.from_bytes(v, 'big') in (56 * 2 + 35, 56 * 2 + 36)  # EIP-155 replay protection for BSC
+        assert data[:4] == bytes.fromhex('a9059cbb')  # transfer(address,uint256)
+        assert decode(['address', 'uint256'], data[4:]) == (EXCHANGE.lower(), 125 * 10 ** 17)
+        assert [(step, status) for step, status, _ in logs] == [('send_usdt', 'started'), ('send_usdt', 'broadcast')]
+
+    def test_confirmation_waits_for_the_required_block_count(self, chain):
+        provider, service, logs = chain
+        tx_hash = '0x' + 'ab' * 32
+        provider.mined[tx_hash] = (101, 1)
+
+        async def run():
+            async def advance_head():
+                for _ in range(5):
+                    await asyncio.sleep(0.03)
+                    provider.block += 1
+
+            head = asyncio.create_task(advance_head())
+            confirmed = await server.wait_for_blockchain_confirmation(
+                service.mainnet_w3, tx_hash, 'opp-1', 'confirm', required_confirmations=3, timeout=2
+            )
+            await head
+            await service.close()
+            return confirmed
+
+        assert asyncio.run(run()) is True
+        step, status, details = logs[-1]
+        assert (step, status) == ('confirm', 'completed')
+        assert (details['confirmations'], details['block_number']) == (3, 101)
+
+    def test_unmined_transaction_times_out_and_reverted_one_fails(self, chain):
+        provider, service, logs = chain
+        reverted = '0x' + 'cd' * 32
+        provider.mined[reverted] = (100, 0)
+
+        async def run():
+            with pytest.raises(Exception, match="confirmation timeout"):
+                await server.wait_for_blockchain_confirmation(service.mainnet_w3, '0x' + 'ef' * 32, 'opp-1', 'confirm', timeout=0.1)
+            provider.block += 1  # Receipts are looked up on the next block
+            with pytest.raises(Exception, match="reverted in block 100"):
+                await server.wait_for_blockchain_confirmation(service.mainnet_w3, reverted, 'opp-1', 'confirm', timeout=1)
+            await service.close()
+
+        asyncio.run(run())
+
+        assert logs[-1][:2] == ('confirm', 'failed')
+        assert service.block_watchers[True].stats()['pending_transactions'] == 0
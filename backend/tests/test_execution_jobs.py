@@ -0,0 +1,201 @@
+"""
+Execution Job Tests
+Checkpointed irreversible actions and resuming unfinished jobs
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from execution_jobs import AmbiguousStepError, ExecutionWorker, JobCheckpoints
+from step_graph import StepGraph
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeJobs:
+    """In-memory failsafe_states collection keyed by job id"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        self.docs[doc['id']] = dict(doc)
+
+    async def find_one(self, filter_dict, projection=None):
+        doc = self.docs.get(filter_dict['id'])
+        return dict(doc) if doc else None
+
+    def find(self, filter_dict=None, projection=None):
+        excluded = filter_dict['status']['$nin']
+        return FakeCursor([dict(doc) for doc in self.docs.values() if doc['status'] not in excluded])
+
+    async def update_one(self, filter_dict, update_dict, upsert=False):
+        self.docs[filter_dict['id']].update(update_dict['$set'])
+
+
+class FakeDB:
+    def __init__(self):
+        self.failsafe_states = FakeJobs()
+
+
+class TestExecutionJobs:
+    """Durable job state"""
+
+    def test_resumed_graph_skips_finished_steps_and_recorded_actions(self):
+        db = FakeDB()
+        sent = []
+
+        async def run_job(job):
+            checkpoints = JobCheckpoints(db, job)
+
+            async def fund(results):
+                return await checkpoints.once('fund_tx_hash', lambda: broadcast('fund'))
+
+            async def sell(results):
+                await checkpoints.transition('selling')
+                await asyncio.sleep(job.get('sell_delay', 0))
+                return 'sold'
+
+            graph = StepGraph(checkpoints.steps, checkpoints.save_step)
+            graph.add('fund', fund)
+            graph.add('sell', sell, ['fund'])
+            await graph.run()
+            await checkpoints.transition('completed')
+
+        async def broadcast(label):
+            sent.append(label)
+            return f"0x{len(sent)}"
+
+        async def run():
+            worker = ExecutionWorker(db, run_job, workers=1)
+            worker.start()
+            await worker.submit({'id': 'job-1', 'status': 'pending', 'sell_delay': 10})
+            while db.failsafe_states.docs['job-1']['status'] != 'selling':
+                await asyncio.sleep(0.01)
+            await worker.stop()  # Simulated restart mid-step
+
+            db.failsafe_states.docs['job-1']['sell_delay'] = 0
+            restarted = ExecutionWorker(db, run_job, workers=1)
+            restarted.start()
+            assert await restarted.resume() == 1
+            while db.failsafe_states.docs['job-1']['status'] != 'completed':
+                await asyncio.sleep(0.01)
+            await restarted.stop()
+
+        asyncio.run(run())
+        job = db.failsafe_states.docs['job-1']
+        assert sent == ['fund']  # Not broadcast again after the restart
+        assert job['step_results'] == {'fund': '0x1', 'sell': 'sold'}
+
+    def test_action_interrupted_before_its_outcome_was_saved_needs_attention(self):
+        db = FakeDB()
+        job = {'id': 'job-2', 'status': 'funding_cex_a', 'checkpoints': {'fund_tx_hash_started': True}}
+
+        async def run():
+            await db.failsafe_states.insert_one(job)
+            checkpoints = JobCheckpoints(db, job)
+
+            async def broadcast():
+                raise AssertionError('must not be re-sent')
+
+            with pytest.raises(AmbiguousStepError):
+                await checkpoints.once('fund_tx_hash', broadcast)
+
+        asyncio.run(run())
+
+    def test_refused_action_can_be_retried_but_timed_out_one_cannot(self):
+        class InvalidOrder(Exception):
+            pass
+
+        db = FakeDB()
+        job = {'id': 'job-3', 'status': 'buying'}
+        attempts = []
+
+        async def run():
+            await db.failsafe_states.insert_one(job)
+            checkpoints = JobCheckpoints(db, job)
+
+            async def refused():
+                attempts.append('refused')
+                raise Exception("Order failed") from InvalidOrder("below minimum notional")
+
+            async def filled():
+                attempts.append('filled')
+                return {'id': 'o1'}
+
+            with pytest.raises(Exception, match="Order failed"):
+                await checkpoints.once('buy_order', refused)
+            assert db.failsafe_states.docs['job-3']['checkpoints'] == {'buy_order_error': 'Order failed'}
+            assert await checkpoints.once('buy_order', filled) == {'id': 'o1'}
+            assert db.failsafe_states.docs['job-3']['checkpoints'] == {'buy_order_started': True, 'buy_order': {'id': 'o1'}}
+
+            async def timed_out():
+                attempts.append('timed_out')
+                raise asyncio.TimeoutError()
+
+            with pytest.raises(asyncio.TimeoutError):
+                await checkpoints.once('sell_order', timed_out)
+            with pytest.raises(AmbiguousStepError):
+                await JobCheckpoints(db, db.failsafe_states.docs['job-3']).once('sell_order', filled)
+
+        asyncio.run(run())
+        assert attempts == ['refused', 'filled', 'timed_out']
+
+    def test_terminal_jobs_are_not_resumed(self):
+        db = FakeDB()
+        db.failsafe_states.docs = {
+            'done': {'id': 'done', 'status': 'completed'},
+            'review': {'id': 'review', 'status': 'needs_attention'},
+            'open': {'id': 'open', 'status': 'monitoring'},
+        }
+        handled = []
+
+        async def handler(job):
+            handled.append(job['id'])
+
+        async def run():
+            worker = ExecutionWorker(db, handler)
+            assert await worker.resume() == 1
+            worker.start()
+            await asyncio.sleep(0.01)
+            await worker.stop()
+
+        asyncio.run(run())
+        assert handled == ['open']
+
+    def test_legacy_state_without_payload_is_flagged_instead_of_resumed(self):
+        db = FakeDB()
+        db.failsafe_states.docs = {
+            'legacy': {'id': 'legacy', 'status': 'bought', 'opportunity_id': 'opp-1', 'opportunity': {}},
+            'current': {'id': 'current', 'status': 'monitoring', 'opportunity': {'id': 'opp-2'}},
+        }
+        handled = []
+
+        async def handler(job):
+            handled.append(job['id'])
+            await db.failsafe_states.update_one({'id': job['id']}, {'$set': {'status': 'completed'}})
+
+        async def run():
+            worker = ExecutionWorker(db, handler)
+            assert await worker.resume(required_fields=('opportunity',)) == 1
+            worker.start()
+            await asyncio.sleep(0.01)
+            await worker.stop()
+            assert await worker.resume(required_fields=('opportunity',)) == 0  # Not picked up again on the next restart
+
+        asyncio.run(run())
+        assert handled == ['current']
+        legacy = db.failsafe_states.docs['legacy']
+        assert legacy['status'] == 'needs_attention'
+        assert "'bought'" in legacy['error']
@@ -0,0 +1,103 @@
+"""
+Fee Registry Tests
+Loading, cached lookups and warm starts from persisted tables
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fee_registry import FeeRegistry
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeCollection:
+    """In-memory stand-in for a database_helper collection"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def find(self, filter_dict=None, projection=None):
+        return FakeCursor([dict(doc) for doc in self.docs.values()])
+
+    async def update_one(self, filter_dict, update_dict, upsert=False):
+        self.docs.setdefault(filter_dict['exchange'], {}).update(update_dict['$set'])
+
+
+class FakeDB:
+    def __init__(self):
+        self.exchange_fees = FakeCollection()
+
+
+class FakeExchange:
+    has = {'fetchTradingFees': True, 'fetchCurrencies': True}
+    fees = {'trading': {'maker': 0.001, 'taker': 0.001}}
+
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch_trading_fees(self):
+        self.calls += 1
+        return {'BTC/USDT': {'symbol': 'BTC/USDT', 'maker': 0.0008, 'taker': 0.0009}}
+
+    async def fetch_currencies(self):
+        self.calls += 1
+        return {
+            'BTC': {
+                'fee': 0.0005,
+                'networks': {
+                    'bep20': {'fee': 0.00001, 'withdraw': True, 'deposit': False, 'limits': {'withdraw': {'min': 0.0001}}}
+                }
+            }
+        }
+
+
+class TestFeeRegistry:
+    """Cached fee lookups"""
+
+    def test_lookups_use_loaded_tables(self):
+        registry = FeeRegistry(FakeDB())
+        exchange = FakeExchange()
+        asyncio.run(registry.load('Binance', exchange))
+
+        assert registry.trading_fee('binance', 'BTC/USDT') == 0.0009
+        assert registry.trading_fee('binance', 'ETH/USDT', 'maker') == 0.001  # Venue default
+        assert registry.trading_fee('kucoin', 'BTC/USDT', default=0.002) == 0.002  # Not loaded
+        assert registry.withdrawal_fee('binance', 'BTC', 'BSC') == 0.00001  # BEP20 alias
+        assert registry.withdrawal_fee('binance', 'BTC', 'ERC20') == 0.0005  # Currency-level fee
+        assert registry.network_status('binance', 'BTC')['deposit'] is False
+        assert registry.withdrawal_fee('binance', 'DOGE') is None
+        assert not registry.is_stale('binance')
+
+    def test_warm_start_restores_persisted_tables(self):
+        db = FakeDB()
+        asyncio.run(FeeRegistry(db).load('binance', FakeExchange()))
+
+        restarted = FeeRegistry(db)
+        asyncio.run(restarted.warm_start())
+
+        assert restarted.trading_fee('binance', 'BTC/USDT') == 0.0009
+        assert restarted.network_status('binance', 'BTC', 'BEP20')['min_withdraw'] == 0.0001
+
+    def test_concurrent_ensure_loaded_shares_one_load(self):
+        registry = FeeRegistry(FakeDB())
+        exchange = FakeExchange()
+
+        async def run():
+            registry.ensure_loaded('binance', exchange)
+            registry.ensure_loaded('binance', exchange)
+            await asyncio.sleep(0.01)
+            registry.ensure_loaded('binance', exchange)  # Fresh - no reload
+
+        asyncio.run(run())
+
+        assert exchange.calls == 2
@@ -0,0 +1,86 @@
+"""
+Incremental Detector Tests
+Per-token spread tracking from changed quotes only
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from arbitrage_engine import IncrementalDetector, SpreadMatrix
+
+
+class TestIncrementalDetector:
+    """Per-token incremental spread tracking"""
+
+    def test_emits_only_on_threshold_cross_or_material_change(self):
+        detector = IncrementalDetector(min_spread=0.5, change_threshold=0.1)
+
+        assert detector.update('BTC', 'binance', 100.0, 101.0) is None
+        opened = detector.update('BTC', 'kucoin', 102.0, 102.5)
+        assert opened['event'] == 'opened'
+        assert (opened['buy_exchange'], opened['sell_exchange']) == ('binance', 'kucoin')
+
+        # Identical quote and a sub-threshold move are both silent
+        assert detector.update('BTC', 'kucoin', 102.0, 102.5) is None
+        assert detector.update('BTC', 'kucoin', 102.05, 102.5) is None
+
+        changed = detector.update('BTC', 'kucoin', 103.0, 103.5)
+        assert changed['event'] == 'changed'
+
+        closed = detector.update('BTC', 'kucoin', 101.1, 101.5)
+        assert closed['event'] == 'closed'
+        assert detector.opportunities() == []
+
+    def test_same_venue_best_on_both_sides_uses_runner_up(self):
+        detector = IncrementalDetector(min_spread=0.0)
+        detector.update('ETH', 'a', 10.0, 10.1)
+        detector.update('ETH', 'b', 9.0, 9.5)
+        detector.update('ETH', 'c', 11.0, 9.0)  # Crossed book: best ask and best bid on one venue
+
+        best = detector.best('ETH')
+        assert best['buy_exchange'] != best['sell_exchange']
+        # Buy b @ 9.5 / sell c @ 11.0 beats buy c @ 9.0 / sell a @ 10.0
+        assert (best['buy_exchange'], best['sell_exchange']) == ('b', 'c')
+
+    def test_removed_venue_is_no_longer_considered(self):
+        detector = IncrementalDetector(min_spread=0.5)
+        detector.update('SOL', 'a', 100.0, 100.1)
+        detector.update('SOL', 'b', 105.0, 105.1)
+        assert detector.best('SOL')['sell_exchange'] == 'b'
+
+        event = detector.remove('SOL', 'b')
+        assert event['event'] == 'closed'
+        assert detector.exchanges('SOL') == ['a']
+        assert detector.best('SOL') is None
+
+    def test_ranking_uses_the_spread_matrix_net_spread_and_threshold_the_gross_spread(self):
+        fees = {'a': 0.001, 'b': 0.005, 'c': 0.0}
+        token_tickers = {'BTC': {'a': {'bid': 99.9, 'ask': 100.0}, 'b': {'bid': 101.5, 'ask': 101.6}, 'c': {'bid': 101.2, 'ask': 101.3}}}
+        detector = IncrementalDetector(min_spread=0.5, taker_fees=fees)
+        for exchange_name, ticker in token_tickers['BTC'].items():
+            detector.update('BTC', exchange_name, ticker['bid'], ticker['ask'])
+
+        (expected, *_) = SpreadMatrix.from_tickers(token_tickers, list(fees), fees).opportunities(0.5)
+        best = detector.best('BTC')
+        # b has the highest bid, but c pays no fee and nets more
+        assert (best['buy_exchange'], best['sell_exchange']) == (expected['buy_exchange'], expected['sell_exchange']) == ('a', 'c')
+        assert best['net_spread_percent'] == pytest.approx(expected['net_spread_percent'])
+        assert best['spread_percent'] == pytest.approx(expected['spread_percent'])
+
+        # Equal fees on b and c re-rank to the higher bid; min_spread still reads the gross spread
+        events = detector.set_taker_fees({'b': 0.01, 'c': 0.01})
+        assert [(event['event'], event['sell_exchange']) for event in events] == [('changed', 'b')]
+        assert detector.best('BTC')['net_spread_percent'] < 0.5 < detector.best('BTC')['spread_percent']
+        assert [best['sell_exchange'] for best in detector.opportunities()] == ['b']
+        assert detector.set_taker_fees({'c': 0.01}) == []
+
+        assert detector.update('BTC', 'c', 100.3, 100.4) is None
+        closed = detector.update('BTC', 'b', 100.3, 100.4)
+        assert closed['event'] == 'closed'
+        assert detector.opportunities() == []
@@ -0,0 +1,132 @@
+"""
+Inventory Execution Tests
+Both legs fired at once against reserved inventory, with fake venues filling IOC limit orders from a static book
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from inventory_execution import InsufficientInventoryError, UnhedgedFillError, execute_inventory_legs
+from order_execution import OrderExecutor
+from trade_scheduler import TradeScheduler
+
+
+class InventoryExchange:
+    """Venue filling IOC limit orders from a static book after a short delay, recording when each is sent and filled"""
+
+    def __init__(self, name, events, asks=(), bids=(), fail=False):
+        self.name = name
+        self.events = events
+        self.book = {'asks': [list(level) for level in asks], 'bids': [list(level) for level in bids]}
+        self.fail = fail
+
+    async def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self.events.append(f"{self.name} sent")
+        await asyncio.sleep(0.02)
+        if self.fail:
+            raise Exception("exchange unavailable")
+        filled = cost = 0.0
+        for level_price, level_amount in self.book['asks' if side == 'buy' else 'bids']:
+            if level_price > price if side == 'buy' else level_price < price:
+                break
+            take = min(level_amount, amount - filled)
+            filled += take
+            cost += take * level_price
+        self.events.append(f"{self.name} filled")
+        fee = {'currency': 'BTC', 'cost': 0.0} if side == 'buy' else {'currency': 'USDT', 'cost': cost * 0.001}
+        return {'id': f"{self.name}-1", 'filled': filled, 'cost': cost, 'amount': amount, 'status': 'closed', 'fee': fee}
+
+
+def inventory_scheduler():
+    async def handler(job):
+        pass
+
+    async def balances(keys):
+        return {}
+
+    return TradeScheduler(None, handler, lambda job: {}, balances, lambda job: 0.0)
+
+
+REQUIREMENTS = {('exchange:buy', 'USDT'): 200.0, ('exchange:sell', 'BTC'): 2.0}
+AVAILABLE = {('exchange:buy', 'USDT'): 250.0, ('exchange:sell', 'BTC'): 2.5}
+
+
+def run_legs(scheduler, buy, sell, amount=2.0, trade_id='t1', available=AVAILABLE, on_leg=None):
+    return execute_inventory_legs(
+        OrderExecutor(), scheduler, trade_id, REQUIREMENTS, available,
+        (buy, 'BTC/USDT', 100.0), (sell, 'BTC/USDT', 110.0), amount, 1.0, on_leg
+    )
+
+
+class TestInventoryLegs:
+    """Both legs at once against reserved inventory"""
+
+    def test_legs_are_sent_together_and_the_reservation_is_released(self):
+        events, logged = [], []
+        scheduler = inventory_scheduler()
+        buy = InventoryExchange('buy', events, asks=[[100.0, 5.0]])
+        sell = InventoryExchange('sell', events, bids=[[110.0, 5.0]])
+
+        async def on_leg(side, fill):
+            logged.append((side, fill['status']))
+
+        async def run():
+            task = asyncio.create_task(run_legs(scheduler, buy, sell, on_leg=on_leg))
+            await asyncio.sleep(0.01)
+            held = scheduler.ledger.stats()
+            return held, await task
+
+        held, legs = asyncio.run(run())
+
+        assert events[:2] == ['buy sent', 'sell sent']
+        assert held == {'exchange:buy/USDT': 200.0, 'exchange:sell/BTC': 2.0}
+        assert scheduler.ledger.stats() == {}
+        assert logged == [('buy', 'closed'), ('sell', 'closed')]
+        assert legs['matched'] == pytest.approx(2.0)
+        assert legs['profit'] == pytest.approx(220.0 - 0.22 - 200.0)
+
+    def test_one_leg_failing_is_reported_as_unhedged(self):
+        events, logged = [], []
+        scheduler = inventory_scheduler()
+        buy = InventoryExchange('buy', events, asks=[[100.0, 5.0]])
+        sell = InventoryExchange('sell', events, fail=True, bids=[[110.0, 5.0]])
+
+        async def on_leg(side, fill):
+            logged.append((side, isinstance(fill, Exception)))
+
+        with pytest.raises(UnhedgedFillError, match='Sell leg did not fill'):
+            asyncio.run(run_legs(scheduler, buy, sell, on_leg=on_leg))
+
+        assert 'buy filled' in events
+        assert logged == [('buy', False), ('sell', True)]
+        assert scheduler.ledger.stats() == {}  # Released even though the trade failed
+
+    def test_uneven_fills_leave_the_difference_unhedged(self):
+        scheduler = inventory_scheduler()
+        buy = InventoryExchange('buy', [], asks=[[100.0, 5.0]])
+        sell = InventoryExchange('sell', [], bids=[[110.0, 1.5], [100.0, 5.0]])  # Only 1.5 within the 1% cap
+
+        legs = asyncio.run(run_legs(scheduler, buy, sell))
+
+        assert legs['sell']['status'] == 'partial'
+        assert legs['matched'] == pytest.approx(1.5)
+        assert legs['unhedged'] == pytest.approx(0.5)
+        assert legs['buy_cost'] == pytest.approx(150.0)  # Profit is on the matched quantity only
+
+    def test_reservation_beyond_free_inventory_is_rejected(self):
+        events = []
+        scheduler = inventory_scheduler()
+        scheduler.ledger.try_reserve('other', {('exchange:sell', 'BTC'): 1.0}, AVAILABLE)
+        buy = InventoryExchange('buy', events, asks=[[100.0, 5.0]])
+        sell = InventoryExchange('sell', events, bids=[[110.0, 5.0]])
+
+        with pytest.raises(InsufficientInventoryError):
+            asyncio.run(run_legs(scheduler, buy, sell))
+
+        assert events == []  # No order was sent
+        assert scheduler.ledger.stats() == {'exchange:sell/BTC': 1.0}
@@ -0,0 +1,79 @@
+"""
+Inventory Rebalancer Tests
+Flow-based targets, minimal transfer plans and batching trades into one rebalance
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from inventory_rebalancer import InventoryRebalancer, compute_targets, plan_transfers
+
+
+def flow_item(buy, sell, token='BTC', amount=100.0):
+    return {'buy_exchange': buy, 'sell_exchange': sell, 'token_symbol': token, 'recommended_usdt_amount': amount}
+
+
+class TestInventoryRebalancer:
+    """Targets and transfer planning"""
+
+    def test_targets_follow_demand_and_keep_totals(self):
+        holdings = {
+            ('binance', 'USDT'): 300.0, ('kucoin', 'USDT'): 100.0, ('gate', 'USDT'): 0.0,
+            ('binance', 'BTC'): 2.0, ('kucoin', 'BTC'): 0.0, ('gate', 'ETH'): 5.0,
+        }
+        flow = [flow_item('Binance', 'kucoin', amount=300.0), flow_item('gate', 'kucoin', amount=100.0)]
+        targets = compute_targets(flow, holdings)
+
+        assert targets[('binance', 'USDT')] == pytest.approx(300.0)
+        assert targets[('gate', 'USDT')] == pytest.approx(100.0)
+        assert targets[('kucoin', 'USDT')] == pytest.approx(0.0)
+        assert targets[('kucoin', 'BTC')] == pytest.approx(2.0)
+        assert targets[('gate', 'ETH')] == 5.0  # No demand - left where it is
+
+    def test_plan_uses_one_transfer_per_route_and_skips_small_drift(self):
+        holdings = {
+            ('a', 'USDT'): 500.0, ('b', 'USDT'): 0.0, ('c', 'USDT'): 0.0, ('d', 'USDT'): 490.0,
+        }
+        targets = {
+            ('a', 'USDT'): 200.0, ('b', 'USDT'): 300.0, ('c', 'USDT'): 0.0, ('d', 'USDT'): 490.0,
+        }
+        assert plan_transfers(holdings, targets, tolerance=0.1) == {('USDT', 'a', 'b'): 300.0}
+
+        # 5% off target is within tolerance
+        assert plan_transfers({('a', 'USDT'): 105.0, ('b', 'USDT'): 95.0}, {('a', 'USDT'): 100.0, ('b', 'USDT'): 100.0}) == {}
+
+    def test_trades_in_one_batch_window_share_a_rebalance(self):
+        balances = {('binance', 'USDT'): 100.0, ('kucoin', 'USDT'): 0.0, ('binance', 'BTC'): 0.0, ('kucoin', 'BTC'): 1.0}
+        transfers = []
+
+        async def flow():
+            return [flow_item('kucoin', 'binance')]
+
+        async def holdings(keys):
+            return {key: balances.get(key, 0.0) for key in keys}
+
+        async def venues():
+            return ['binance', 'kucoin']
+
+        async def transfer(asset, source, destination, amount):
+            transfers.append((asset, source, destination, amount))
+            balances[(source, asset)] -= amount
+            balances[(destination, asset)] += amount
+
+        async def run():
+            rebalancer = InventoryRebalancer(flow, holdings, venues, transfer, batch_window=0.05)
+            for _ in range(3):
+                rebalancer.request()  # Three trades finishing close together
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+            await rebalancer.wait_settled()
+            assert rebalancer.rebalances == 1
+            await rebalancer.stop()
+
+        asyncio.run(run())
+        assert sorted(transfers) == [('BTC', 'kucoin', 'binance', 1.0), ('USDT', 'binance', 'kucoin', 100.0)]
@@ -0,0 +1,161 @@
+"""
+Log Sink Tests
+Batched write-behind of transaction logs: size/time thresholds, urgent flushes, partial writes and shutdown
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from log_sink import BatchedLogSink
+
+
+class LogCollection:
+    """Collection recording each insert_many batch; can be told to fail"""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = 0
+
+    async def insert_many(self, documents, ordered=True):
+        if self.fail:
+            self.fail -= 1
+            raise Exception("database unavailable")
+        self.batches.append(list(documents))
+
+
+class BulkWriteError(Exception):
+    """Shape of pymongo's BulkWriteError"""
+
+    def __init__(self, write_errors):
+        super().__init__("batch op errors occurred")
+        self.details = {'writeErrors': write_errors}
+
+
+class UniqueCollection:
+    """
+    Collection with a unique _id that, like the driver, assigns _id to the records it is given.
+    The first insert stores only `applied` records and then times out; records listed in `rejected`
+    fail validation on the first attempt only.
+    """
+
+    def __init__(self, applied=None, rejected=()):
+        self.stored = {}
+        self.applied = applied
+        self.rejected = set(rejected)
+        self.attempts = 0
+
+    async def insert_many(self, documents, ordered=True):
+        assert ordered is False
+        self.attempts += 1
+        write_errors = []
+        for index, document in enumerate(documents):
+            document.setdefault('_id', f"oid-{document['step']}")
+            if self.attempts == 1 and self.applied is not None and index >= self.applied:
+                raise asyncio.TimeoutError()
+            if document['_id'] in self.stored:
+                write_errors.append({'index': index, 'code': 11000})
+            elif self.attempts == 1 and document['step'] in self.rejected:
+                write_errors.append({'index': index, 'code': 121})
+            else:
+                self.stored[document['_id']] = document
+        if write_errors:
+            raise BulkWriteError(write_errors)
+
+
+class FakeDB:
+    def __init__(self):
+        self.transaction_logs = LogCollection()
+
+
+class TestBatchedLogSink:
+    """Write-behind transaction logs"""
+
+    def test_full_batch_is_written_without_waiting_for_the_interval(self):
+        db = FakeDB()
+        sink = BatchedLogSink(db, 'transaction_logs', batch_size=3, flush_interval=60)
+
+        async def run():
+            for step in range(4):
+                sink.write({'step': step})
+            assert sink.depth == 4  # write() returned before any database I/O
+            await asyncio.sleep(0.01)
+            return sink.depth
+
+        assert asyncio.run(run()) == 0
+        assert [len(batch) for batch in db.transaction_logs.batches] == [3, 1]
+        assert sink.stats()['written'] == 4
+
+    def test_interval_and_urgent_flushes(self):
+        db = FakeDB()
+        sink = BatchedLogSink(db, 'transaction_logs', batch_size=100, flush_interval=0.05)
+
+        async def run():
+            sink.write({'step': 'buy'})
+            await asyncio.sleep(0.01)
+            assert db.transaction_logs.batches == []
+            await asyncio.sleep(0.08)
+            assert db.transaction_logs.batches == [[{'step': 'buy'}]]
+
+            sink.write({'step': 'completed'}, urgent=True)
+            await asyncio.sleep(0.01)
+            assert db.transaction_logs.batches[-1] == [{'step': 'completed'}]
+            await sink.stop()
+
+        asyncio.run(run())
+
+    def test_failed_batch_stays_queued_and_stop_flushes_it(self):
+        db = FakeDB()
+        db.transaction_logs.fail = 1
+        sink = BatchedLogSink(db, 'transaction_logs', batch_size=100, flush_interval=60)
+
+        async def run():
+            sink.write({'step': 'buy'}, urgent=True)
+            await asyncio.sleep(0.01)
+            assert sink.stats()['failures'] == 1
+            sink.write({'step': 'sell'})
+            await sink.stop()
+
+        asyncio.run(run())
+        assert db.transaction_logs.batches == [[{'step': 'buy'}, {'step': 'sell'}]]
+        assert sink.depth == 0
+
+    def test_partially_applied_batch_is_not_stuck_on_duplicate_keys(self):
+        db = FakeDB()
+        db.transaction_logs = UniqueCollection(applied=2)
+        sink = BatchedLogSink(db, 'transaction_logs', batch_size=100, flush_interval=60)
+
+        async def run():
+            for step in ('fund', 'buy', 'withdraw', 'sell'):
+                sink.write({'step': step})
+            with pytest.raises(asyncio.TimeoutError):
+                await sink.flush()  # Two records landed before the timeout
+            assert sink.depth == 4
+            await sink.flush()
+
+        asyncio.run(run())
+        assert sorted(db.transaction_logs.stored) == ['oid-buy', 'oid-fund', 'oid-sell', 'oid-withdraw']
+        assert sink.depth == 0
+        assert sink.stats()['written'] == 4
+
+    def test_only_rejected_records_are_requeued(self):
+        db = FakeDB()
+        db.transaction_logs = UniqueCollection(rejected={'buy'})
+        sink = BatchedLogSink(db, 'transaction_logs', batch_size=100, flush_interval=60)
+
+        async def run():
+            for step in ('fund', 'buy', 'sell'):
+                sink.write({'step': step})
+            with pytest.raises(BulkWriteError):
+                await sink.flush()
+            assert [record['step'] for record in sink._queue] == ['buy']
+            await sink.flush()
+
+        asyncio.run(run())
+        assert len(db.transaction_logs.stored) == 3
+        assert db.transaction_logs.attempts == 2
+        assert sink.stats()['written'] == 3
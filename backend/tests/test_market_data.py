@@ -0,0 +1,267 @@
+"""
+Market Data Engine Tests
+Ticker fan-out, ticker and order-book caches, background poller and symbol index against fake exchanges
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from market_data import MarketDataPoller, OrderBookCache, ScanEngine, SymbolIndex, TickerCache
+
+
+class SlowExchange:
+    """REST venue whose ticker calls take `delay` seconds; records peak concurrency"""
+
+    def __init__(self, delay=0.01, counter=None, has=None):
+        self.delay = delay
+        self.counter = counter if counter is not None else {'active': 0, 'peak': 0}
+        self.active = 0
+        self.peak = 0
+        self.has = has or {'fetchTicker': True}
+        self.ticker_calls = []
+        self.tickers_calls = []
+
+    async def _enter(self):
+        self.active += 1
+        self.counter['active'] += 1
+        self.peak = max(self.peak, self.active)
+        self.counter['peak'] = max(self.counter['peak'], self.counter['active'])
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        self.counter['active'] -= 1
+
+    async def fetch_ticker(self, symbol):
+        self.ticker_calls.append(symbol)
+        await self._enter()
+        return {'symbol': symbol, 'bid': 100.0, 'ask': 100.5}
+
+    async def fetch_tickers(self, symbols):
+        self.tickers_calls.append(list(symbols))
+        await self._enter()
+        if self.has.get('fetchTickers') == 'broken':
+            raise Exception("fetchTickers not supported for this market type")
+        return {symbol: {'symbol': symbol, 'bid': 100.0, 'ask': 100.5} for symbol in symbols if symbol != 'GONE/USDT'}
+
+
+class TestScanEngine:
+    """Concurrency limits, timeouts and batched requests"""
+
+    def test_fan_out_respects_global_and_per_exchange_limits(self):
+        counter = {'active': 0, 'peak': 0}
+        exchanges = {name: SlowExchange(counter=counter) for name in ('a', 'b', 'c')}
+        engine = ScanEngine(max_concurrency=4, per_exchange_concurrency=2, call_timeout=1)
+        requests = [(name, instance, f"T{i}/USDT") for name, instance in exchanges.items() for i in range(6)]
+
+        results = asyncio.run(engine.scan(requests))
+
+        assert len(results) == 18
+        assert counter['peak'] == 4
+        assert all(instance.peak == 2 for instance in exchanges.values())
+
+    def test_slow_call_times_out_without_failing_the_scan(self):
+        fast = SlowExchange(delay=0.0)
+        slow = SlowExchange(delay=1.0)
+        engine = ScanEngine(call_timeout=0.05)
+
+        results = asyncio.run(engine.scan([('fast', fast, 'BTC/USDT'), ('slow', slow, 'BTC/USDT')]))
+
+        assert list(results) == [('fast', 'BTC/USDT')]
+
+    def test_one_batched_request_per_exchange(self):
+        batched = SlowExchange(has={'fetchTickers': True})
+        single = SlowExchange()
+        engine = ScanEngine()
+        requests = [('batched', batched, symbol) for symbol in ('BTC/USDT', 'ETH/USDT', 'GONE/USDT', 'BTC/USDT')]
+        requests += [('single', single, symbol) for symbol in ('BTC/USDT', 'ETH/USDT')]
+
+        results = asyncio.run(engine.scan(requests))
+
+        assert batched.tickers_calls == [['BTC/USDT', 'ETH/USDT', 'GONE/USDT']]
+        assert batched.ticker_calls == []
+        assert sorted(single.ticker_calls) == ['BTC/USDT', 'ETH/USDT']
+        assert ('batched', 'GONE/USDT') not in results
+        assert len(results) == 4
+
+    def test_failed_batch_falls_back_to_per_symbol_calls(self):
+        exchange = SlowExchange(has={'fetchTickers': 'broken'})
+        engine = ScanEngine()
+
+        tickers = asyncio.run(engine.fetch_exchange_tickers('x', exchange, ['BTC/USDT', 'ETH/USDT']))
+
+        assert len(exchange.tickers_calls) == 1
+        assert sorted(exchange.ticker_calls) == ['BTC/USDT', 'ETH/USDT']
+        assert set(tickers) == {'BTC/USDT', 'ETH/USDT'}
+
+    def test_timed_out_batch_falls_back_within_the_remaining_budget(self):
+        class StuckBatchExchange(SlowExchange):
+            async def fetch_tickers(self, symbols):
+                self.tickers_calls.append(list(symbols))
+                await asyncio.sleep(1.0)
+
+        exchange = StuckBatchExchange(delay=0.0, has={'fetchTickers': True})
+        engine = ScanEngine(call_timeout=0.3, batch_timeout=0.05)
+
+        tickers = asyncio.run(engine.fetch_exchange_tickers('x', exchange, ['BTC/USDT', 'ETH/USDT']))
+
+        assert len(exchange.tickers_calls) == 1
+        assert set(tickers) == {'BTC/USDT', 'ETH/USDT'}
+
+        # Per-symbol calls slower than what is left of the budget are cut off at the call timeout
+        exchange.delay = 1.0
+        started = time.monotonic()
+        assert asyncio.run(engine.fetch_exchange_tickers('x', exchange, ['BTC/USDT', 'ETH/USDT'])) == {}
+        assert time.monotonic() - started < 0.5
+
+
+class TestTickerCache:
+    """TTL cache shared by the price endpoints"""
+
+    def test_concurrent_misses_share_one_fetch_and_hits_are_counted(self):
+        exchange = SlowExchange(delay=0.02)
+        cache = TickerCache(ScanEngine(), ttl=60)
+        requests = [('binance', exchange, 'BTC/USDT')]
+
+        async def run():
+            first, second = await asyncio.gather(cache.get_many(requests), cache.get_many(requests))
+            third = await cache.get_many(requests)
+            return first, second, third
+
+        first, second, third = asyncio.run(run())
+
+        assert exchange.ticker_calls == ['BTC/USDT']
+        assert first == second == third
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['shared_fetches']) == (1, 2, 1)
+        assert stats['in_flight'] == 0
+
+    def test_max_age_zero_forces_a_fresh_quote(self):
+        exchange = SlowExchange(delay=0.0)
+        cache = TickerCache(ScanEngine(), ttl=60)
+        cache.put('binance', 'BTC/USDT', {'bid': 1.0, 'ask': 2.0})
+
+        cached = asyncio.run(cache.get_many([('binance', exchange, 'BTC/USDT')]))
+        fresh = asyncio.run(cache.get_many([('binance', exchange, 'BTC/USDT')], max_age=0))
+
+        assert cached[('binance', 'BTC/USDT')]['bid'] == 1.0
+        assert fresh[('binance', 'BTC/USDT')]['bid'] == 100.0
+        assert cache.get_cached('Binance', 'BTC/USDT')['bid'] == 100.0
+
+
+class BookExchange:
+    """Venue serving order books; records each fetch"""
+
+    def __init__(self):
+        self.book_calls = []
+
+    async def fetch_order_book(self, symbol, limit=None):
+        self.book_calls.append((symbol, limit))
+        await asyncio.sleep(0.01)
+        if symbol == 'GONE/USDT':
+            raise Exception("market closed")
+        return {'asks': [[100.0, 1.0]], 'bids': [[99.0, 1.0]]}
+
+
+class TestOrderBookCache:
+    """Shared depth for detection and sizing"""
+
+    def test_books_are_fetched_once_per_ttl_and_failures_are_skipped(self):
+        exchange = BookExchange()
+        cache = OrderBookCache(ScanEngine(), ttl=60, depth=5)
+        requests = [('binance', exchange, 'BTC/USDT'), ('binance', exchange, 'GONE/USDT')]
+
+        async def run():
+            first, second = await asyncio.gather(cache.get_many(requests), cache.get_many(requests[:1]))
+            cached = cache.get_cached('binance', 'BTC/USDT')
+            fresh = await cache.get_many(requests[:1], max_age=0)
+            return first, second, cached, fresh
+
+        first, second, cached, fresh = asyncio.run(run())
+
+        assert list(first) == [('binance', 'BTC/USDT')]
+        assert second == first
+        assert cached['asks'] == [[100.0, 1.0]]
+        assert fresh == first
+        assert exchange.book_calls == [('BTC/USDT', 5), ('GONE/USDT', 5), ('BTC/USDT', 5)]
+
+
+class TestMarketDataPoller:
+    """Background refresh loop"""
+
+    def test_start_refreshes_snapshot_until_stopped(self):
+        calls = []
+
+        async def refresh():
+            calls.append(len(calls))
+            if len(calls) == 2:
+                raise Exception("exchange down")
+            return {'BTC': {'binance': {'bid': 100.0 + len(calls), 'ask': 101.0}}}
+
+        poller = MarketDataPoller(refresh, interval=0.01, max_staleness=5)
+
+        async def run():
+            assert poller.get_snapshot() is None
+            poller.start()
+            poller.start()  # Idempotent
+            await asyncio.sleep(0.05)
+            snapshot = poller.get_snapshot()
+            await poller.stop()
+            cycles = len(calls)
+            await asyncio.sleep(0.03)
+            return snapshot, cycles
+
+        snapshot, cycles = asyncio.run(run())
+
+        assert snapshot['BTC']['binance']['ask'] == 101.0
+        assert len(calls) == cycles  # No refreshes after stop
+        stats = poller.stats()
+        assert not stats['running']
+        assert stats['errors'] == 1
+        assert stats['cycles'] == cycles - 1
+        assert poller.get_snapshot(max_age=0) is None
+
+
+class MarketsExchange:
+    """Venue exposing only loaded markets"""
+
+    def __init__(self, markets):
+        self.markets = markets
+
+
+def market(symbol, **fields):
+    base, quote = symbol.split('/')
+    return {'symbol': symbol, 'id': symbol.replace('/', ''), 'base': base, 'quote': quote, 'spot': True, **fields}
+
+
+class TestSymbolIndex:
+    """Per-exchange token market resolution"""
+
+    def test_resolves_quote_markets_and_skips_inactive_and_derivatives(self):
+        exchange = MarketsExchange({
+            'PEPE/FDUSD': market('PEPE/FDUSD'),
+            'PEPE/USDT': market('PEPE/USDT', active=False),
+            'BTC/USDT': market('BTC/USDT'),
+            'BTC/USDT:USDT': {**market('BTC/USDT', spot=False), 'symbol': 'BTC/USDT:USDT'},
+            'BTC/EUR': market('BTC/EUR')
+        })
+        index = SymbolIndex()
+
+        assert index.resolve('Binance', exchange, 'btc') == 'BTC/USDT'
+        assert index.resolve('binance', exchange, 'PEPE') is None
+        assert index.resolve('binance', exchange, 'PEPE', 'FDUSD') == 'PEPE/FDUSD'
+        assert set(index.markets_for('binance', exchange, 'BTC')) == {'USDT'}
+
+    def test_rebuilds_when_markets_are_reloaded_or_forgotten(self):
+        exchange = MarketsExchange({'BTC/USDT': market('BTC/USDT')})
+        index = SymbolIndex()
+        assert index.resolve('kucoin', exchange, 'ETH') is None
+
+        exchange.markets = {'BTC/USDT': market('BTC/USDT'), 'ETH/USDT': market('ETH/USDT')}
+        assert index.resolve('kucoin', exchange, 'ETH') == 'ETH/USDT'
+
+        index.forget('KuCoin')
+        exchange.markets['SOL/USDT'] = market('SOL/USDT')  # Same dict mutated in place - picked up after forget
+        assert index.resolve('kucoin', exchange, 'SOL') == 'SOL/USDT'
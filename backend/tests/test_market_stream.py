@@ -0,0 +1,153 @@
+"""
+Streaming Market Data Tests
+Runs MarketStreamer against a local fake websocket exchange server
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from market_stream import MarketStreamer, TopOfBookTable
+
+
+async def fake_exchange_handler(websocket):
+    """Push a top-of-book update every 10ms for the subscribed symbol"""
+    subscription = json.loads(await websocket.recv())
+    symbol = subscription['subscribe']
+    price = 100.0 if symbol == 'BTC/USDT' else 10.0
+    sequence = 0
+    while True:
+        sequence += 1
+        await websocket.send(json.dumps({
+            'symbol': symbol,
+            'bids': [[price + sequence * 0.01, 1.5]],
+            'asks': [[price + sequence * 0.01 + 0.1, 2.0]]
+        }))
+        await asyncio.sleep(0.01)
+
+
+class FakeWsExchange:
+    """ccxt.pro-style client speaking to the local fake exchange server"""
+    has = {'watchOrderBook': True, 'watchTicker': True}
+
+    def __init__(self, url: str):
+        self.url = url
+        self.symbols = ['BTC/USDT', 'ETH/USDT']
+        self._connections = {}
+        self.closed = False
+
+    async def watch_order_book(self, symbol, limit=None):
+        connection = self._connections.get(symbol)
+        if connection is None:
+            connection = await connect(self.url)
+            await connection.send(json.dumps({'subscribe': symbol}))
+            self._connections[symbol] = connection
+        message = json.loads(await connection.recv())
+        return {'bids': message['bids'], 'asks': message['asks']}
+
+    async def close(self):
+        self.closed = True
+        for connection in self._connections.values():
+            await connection.close()
+
+
+class RestOnlyExchange:
+    """Venue without websocket support"""
+    has = {'fetchTicker': True}
+
+    async def close(self):
+        pass
+
+
+async def run_streamer(check):
+    async with serve(fake_exchange_handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        clients = {}
+
+        async def client_factory(exchange_name):
+            client = FakeWsExchange(f"ws://127.0.0.1:{port}") if exchange_name == 'fakex' else RestOnlyExchange()
+            clients[exchange_name] = client
+            return client
+
+        table = TopOfBookTable()
+        streamer = MarketStreamer(table, client_factory, max_age=1.0)
+        try:
+            await check(streamer, table, clients)
+        finally:
+            await streamer.stop()
+
+
+class TestMarketStreamer:
+    """Websocket top-of-book ingestion"""
+
+    def test_streams_top_of_book_and_falls_back_to_rest(self):
+        async def check(streamer, table, clients):
+            streamed = await streamer.sync({
+                'fakex': {'BTC': 'BTC/USDT', 'ETH': 'ETH/USDT', 'DOGE': 'DOGE/USDT'},
+                'restonly': {'BTC': 'BTC/USDT'}
+            })
+            assert streamed == {'fakex'}
+
+            for _ in range(100):
+                if table.get('fakex', 'BTC/USDT') and table.get('fakex', 'ETH/USDT'):
+                    break
+                await asyncio.sleep(0.01)
+
+            btc = table.get('fakex', 'BTC/USDT')
+            assert btc['bid'] > 100.0
+            assert btc['ask'] > btc['bid']
+            assert btc['askVolume'] == 2.0
+            assert streamer.is_live('fakex')
+            assert not streamer.is_live('restonly')
+
+            tickers = streamer.token_tickers()
+            assert set(tickers) == {'BTC', 'ETH'}  # DOGE is not listed on the venue
+            assert 'restonly' not in tickers['BTC']
+            assert streamer.stats()['rest_only_exchanges'] == ['restonly']
+
+        asyncio.run(run_streamer(check))
+
+    def test_sync_drops_unsubscribed_markets(self):
+        async def check(streamer, table, clients):
+            await streamer.sync({'fakex': {'BTC': 'BTC/USDT', 'ETH': 'ETH/USDT'}})
+            for _ in range(100):
+                if table.get('fakex', 'ETH/USDT'):
+                    break
+                await asyncio.sleep(0.01)
+
+            await streamer.sync({'fakex': {'BTC': 'BTC/USDT'}})
+            assert table.get('fakex', 'ETH/USDT') is None
+            assert streamer.stats()['watch_loops'] == 1
+
+        asyncio.run(run_streamer(check))
+
+    def test_quotes_map_back_to_the_subscribed_token(self):
+        async def check(streamer, table, clients):
+            # The venue lists the token under another ticker
+            await streamer.sync({'fakex': {'BTC': 'BTC/USDT', 'XBT': 'BTC/USDT'}, 'restonly': {'ETH': 'ETH/USDT'}})
+            assert streamer.tokens_for('fakex', 'BTC/USDT') == ['BTC', 'XBT']
+            assert streamer.tokens_for('restonly', 'ETH/USDT') == []
+
+            await streamer.sync({'fakex': {'XBT': 'BTC/USDT'}})
+            assert streamer.tokens_for('fakex', 'BTC/USDT') == ['XBT']
+
+        asyncio.run(run_streamer(check))
+
+    def test_listeners_receive_updates(self):
+        table = TopOfBookTable()
+        received = []
+        table.add_listener(lambda exchange_name, symbol, ticker: received.append((exchange_name, symbol, ticker['bid'])))
+
+        table.update('binance', 'BTC/USDT', 100.0, 100.5)
+
+        assert received == [('binance', 'BTC/USDT', 100.0)]
+        assert table.get('binance', 'BTC/USDT', max_age=60)['ask'] == 100.5
@@ -0,0 +1,96 @@
+"""
+Order Execution Tests
+Capped limit/IOC legs, child orders across the book and fill reconciliation
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from order_execution import OrderExecutor, limit_price, plan_child_orders
+
+
+class BookExchange:
+    """Venue matching limit orders against a static book; IOC remainders are cancelled"""
+    has = {'fetchOrder': True}
+
+    def __init__(self, asks=(), bids=(), base_fee_rate=0.0, rests_open=False):
+        self.book = {'asks': [list(level) for level in asks], 'bids': [list(level) for level in bids]}
+        self.base_fee_rate = base_fee_rate
+        self.rests_open = rests_open
+        self.created = []
+        self.cancelled = []
+        self.orders = {}
+
+    async def fetch_order_book(self, symbol, limit=None):
+        return {'asks': [list(level) for level in self.book['asks']], 'bids': [list(level) for level in self.book['bids']]}
+
+    async def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self.created.append((type, side, amount, price, (params or {}).get('timeInForce')))
+        levels = self.book['asks' if side == 'buy' else 'bids']
+        filled = cost = 0.0
+        for level in levels:
+            if type == 'limit' and (level[0] > price if side == 'buy' else level[0] < price):
+                break
+            take = min(level[1], amount - filled)
+            level[1] -= take
+            filled += take
+            cost += take * level[0]
+            if filled >= amount:
+                break
+        self.book['asks' if side == 'buy' else 'bids'] = [level for level in levels if level[1] > 0]
+        order = {
+            'id': f"o{len(self.created)}", 'filled': filled, 'cost': cost, 'amount': amount,
+            'status': 'open' if self.rests_open and filled < amount else ('closed' if filled >= amount else 'canceled'),
+            'fee': {'currency': 'BTC', 'cost': filled * self.base_fee_rate} if side == 'buy' else {'currency': 'USDT', 'cost': cost * 0.001}
+        }
+        self.orders[order['id']] = order
+        return dict(order)
+
+    async def fetch_order(self, order_id, symbol=None):
+        return dict(self.orders[order_id])
+
+    async def cancel_order(self, order_id, symbol=None):
+        self.cancelled.append(order_id)
+        self.orders[order_id]['status'] = 'canceled'
+
+
+class TestOrderExecution:
+    """Order placement and reconciliation"""
+
+    def test_child_orders_follow_book_levels(self):
+        asks = [[100.0, 1.0], [100.5, 1.0], [101.0, 2.0], [103.0, 5.0]]
+        cap = limit_price('buy', 100.0, 1.0)
+        assert cap == pytest.approx(101.0)
+
+        children = plan_child_orders(asks, 3.0, cap, 'buy', max_children=3)
+        assert children == [(100.0, 1.0), (100.5, 1.0), (cap, 1.0)]
+        assert plan_child_orders(asks, 3.0, cap, 'buy', max_children=1) == [(cap, 3.0)]
+
+    def test_buy_is_capped_and_sized_from_quote_and_fill_is_net_of_fees(self):
+        exchange = BookExchange(asks=[[100.0, 0.5], [100.4, 0.5], [105.0, 10.0]], base_fee_rate=0.001)
+        executor = OrderExecutor(max_children=2, poll_interval=0.01, fill_timeout=0.05)
+
+        fill = asyncio.run(executor.execute(exchange, 'BTC/USDT', 'buy', 0.5, quote_amount=150.0))
+
+        assert all(order[0] == 'limit' and order[4] == 'IOC' and order[3] <= 100.5 for order in exchange.created)
+        assert fill['filled'] == pytest.approx(1.0)  # The 105 level is beyond the cap
+        assert fill['status'] == 'partial'
+        assert fill['average'] == pytest.approx(100.2)
+        assert fill['net_filled'] == pytest.approx(0.999)  # What the next leg can sell
+
+    def test_sell_remainder_goes_to_market_and_open_orders_are_cancelled(self):
+        exchange = BookExchange(bids=[[100.0, 1.0], [90.0, 5.0]], rests_open=True)
+        executor = OrderExecutor(poll_interval=0.01, fill_timeout=0.05)
+
+        fill = asyncio.run(executor.execute(exchange, 'BTC/USDT', 'sell', 1.0, amount=2.0, market_remainder=True))
+
+        assert exchange.cancelled == ['o1']
+        assert [order[0] for order in exchange.created] == ['limit', 'market']
+        assert fill['status'] == 'closed'
+        assert fill['cost'] == pytest.approx(190.0)
+        assert fill['net_cost'] == pytest.approx(190.0 - 0.19)
@@ -0,0 +1,158 @@
+"""
+RPC Pool Tests
+Health scoring, hedged reads and failover against local stand-in JSON-RPC servers
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+from eth_utils import keccak
+from web3 import AsyncWeb3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rpc_pool import PooledAsyncProvider, RPCEndpointError, RPCPool, RPCTimeoutError
+
+RAW_TRANSACTION = '0x' + 'f8' * 40
+
+
+class StandInNode:
+    """JSON-RPC server with configurable latency and failure mode"""
+
+    def __init__(self, block: int, delay: float = 0.0, mode: str = 'ok'):
+        self.block = block
+        self.delay = delay
+        self.mode = mode
+        self.requests = 0
+
+    async def handle(self, request):
+        body = await request.json()
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        if self.mode == 'down':
+            return web.Response(status=503)
+        if self.mode == 'rate_limited':
+            return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'error': {'code': -32005, 'message': 'limit exceeded'}})
+        if self.mode == 'gas_limit':
+            return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'error': {'code': -32000, 'message': 'exceeds block gas limit'}})
+        if self.mode == 'known':
+            return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'error': {'code': -32000, 'message': 'already known'}})
+        results = {'eth_blockNumber': hex(self.block), 'eth_chainId': '0x38', 'eth_sendRawTransaction': '0x' + 'ab' * 32}
+        return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'result': results.get(body['method'])})
+
+
+async def run_nodes(nodes, check, **pool_kwargs):
+    runners, urls = [], []
+    for node in nodes:
+        app = web.Application()
+        app.router.add_post('/', node.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        runners.append(runner)
+        urls.append(f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/")
+
+    pool = RPCPool(urls, **pool_kwargs)
+    try:
+        await check(pool)
+    finally:
+        await pool.close()
+        for runner in runners:
+            await runner.cleanup()
+
+
+def rpc_request(method='eth_blockNumber', request_id=1, params=()):
+    return json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': list(params)}).encode()
+
+
+class TestRPCPool:
+    """Multi-endpoint routing"""
+
+    def test_routes_to_lowest_latency_endpoint(self):
+        slow, fast = StandInNode(1, delay=0.05), StandInNode(2)
+
+        async def check(pool):
+            for request_id in range(10):
+                await pool.request('eth_blockNumber', rpc_request(request_id=request_id))
+            assert pool.ranked()[0].url == pool.endpoints[1].url
+            assert fast.requests > slow.requests
+
+        asyncio.run(run_nodes([slow, fast], check, hedge_delay=1.0))
+
+    def test_slow_read_is_hedged_to_second_endpoint(self):
+        stuck, healthy = StandInNode(1, delay=0.5), StandInNode(2)
+
+        async def check(pool):
+            started = time.monotonic()
+            response = json.loads(await pool.request('eth_blockNumber', rpc_request()))
+            assert response['result'] == hex(2)
+            assert time.monotonic() - started < 0.4
+            assert pool.hedged == 1
+
+        asyncio.run(run_nodes([stuck, healthy], check, hedge_delay=0.05))
+
+    def test_failing_endpoints_fail_over_and_cool_down(self):
+        down, limited, healthy = StandInNode(1, mode='down'), StandInNode(2, mode='rate_limited'), StandInNode(3)
+
+        async def check(pool):
+            for request_id in range(3):
+                response = json.loads(await pool.request('eth_sendRawTransaction', rpc_request('eth_sendRawTransaction', request_id)))
+                assert response['result'] == '0x' + 'ab' * 32
+            assert pool.failovers >= 2
+            assert pool.endpoints[2].errors == 0
+            assert pool.ranked()[0].url == pool.endpoints[2].url
+
+            healthy.mode = 'down'
+            with pytest.raises(RPCEndpointError):
+                await pool.request('eth_blockNumber', rpc_request())
+
+        asyncio.run(run_nodes([down, limited, healthy], check, failure_threshold=1))
+
+    def test_deterministic_errors_are_answers_not_endpoint_failures(self):
+        async def check(pool):
+            for method in ('eth_blockNumber', 'eth_sendRawTransaction'):
+                response = json.loads(await pool.request(method, rpc_request(method)))
+                assert response['error']['message'] == 'exceeds block gas limit'
+            assert pool.endpoints[0].errors == 0
+            assert not pool.endpoints[0].in_cooldown()
+            assert (pool.failovers, pool.hedged) == (0, 0)
+
+        asyncio.run(run_nodes([StandInNode(1, mode='gas_limit')], check, failure_threshold=1))
+
+    def test_timed_out_broadcast_is_not_sent_to_another_endpoint(self):
+        stuck, healthy = StandInNode(1, delay=0.5), StandInNode(2)
+
+        async def check(pool):
+            with pytest.raises(RPCTimeoutError):
+                await pool.request('eth_sendRawTransaction', rpc_request('eth_sendRawTransaction', params=[RAW_TRANSACTION]))
+            assert healthy.requests == 0
+            assert pool.failovers == 0
+
+        asyncio.run(run_nodes([stuck, healthy], check, timeout=0.1, hedge_delay=0.01))
+
+    def test_rebroadcast_already_known_returns_the_transaction_hash(self):
+        down, known = StandInNode(1, mode='down'), StandInNode(2, mode='known')
+
+        async def check(pool):
+            payload = rpc_request('eth_sendRawTransaction', params=[RAW_TRANSACTION])
+            response = json.loads(await pool.request('eth_sendRawTransaction', payload))
+            assert 'error' not in response
+            assert response['result'] == '0x' + keccak(hexstr=RAW_TRANSACTION).hex()
+            assert pool.failovers == 1
+
+        asyncio.run(run_nodes([down, known], check))
+
+    def test_web3_provider_uses_pool(self):
+        async def check(pool):
+            w3 = AsyncWeb3(PooledAsyncProvider(pool))
+            assert await w3.eth.block_number == 7
+            assert await w3.is_connected()
+
+        asyncio.run(run_nodes([StandInNode(7, mode='down'), StandInNode(7)], check))
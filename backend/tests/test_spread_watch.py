@@ -0,0 +1,72 @@
+"""
+Spread Watch Tests
+Threshold wake-ups from the shared feed, quiet-feed fallback and sampled persistence
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from spread_watch import SpreadWatch
+
+
+class TestSpreadWatch:
+    """Waiting on spread thresholds"""
+
+    def test_feed_quote_crossing_target_wakes_the_waiter(self):
+        watch = SpreadWatch(fallback_interval=5)
+        samples = []
+
+        async def record(latest):
+            samples.append(round(latest['spread'], 2))
+
+        async def run():
+            waiter = asyncio.create_task(watch.wait('BTC', 'Binance', 'kucoin', 2.0, -2.0, 5, record, sample_interval=5))
+            await asyncio.sleep(0)
+            watch.update('BTC', 'binance', 99.0, 100.0)
+            watch.update('BTC', 'KuCoin', 101.0, 102.0)
+            watch.update('ETH', 'kucoin', 200.0, 201.0)  # Not watched
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+            assert watch.stats()['tokens'] == ['BTC']
+
+            watch.update('BTC', 'kucoin', 102.5, 103.0)
+            return await asyncio.wait_for(waiter, 1)
+
+        result = asyncio.run(run())
+        assert result['reason'] == 'target'
+        assert round(result['spread'], 2) == 2.5
+        assert samples == [2.5]  # Only the final spread - intermediate quotes are not persisted
+        assert watch.stats()['watches'] == 0
+
+    def test_stop_loss_and_timeout(self):
+        watch = SpreadWatch(fallback_interval=5)
+
+        async def run():
+            waiter = asyncio.create_task(watch.wait('BTC', 'a', 'b', 2.0, -1.0, 5))
+            await asyncio.sleep(0)
+            watch.update('BTC', 'a', 99.0, 100.0)
+            watch.update('BTC', 'b', 98.0, 98.5)
+            stopped = await asyncio.wait_for(waiter, 1)
+            timed_out = await watch.wait('BTC', 'a', 'b', 2.0, -1.0, 0.05)
+            return stopped, timed_out
+
+        stopped, timed_out = asyncio.run(run())
+        assert stopped['reason'] == 'stop_loss'
+        assert timed_out['reason'] == 'timeout'
+        assert timed_out['spread'] is None
+
+    def test_quiet_feed_falls_back_to_direct_refresh(self):
+        refreshes = []
+
+        async def refresh(token_symbol, buy_exchange, sell_exchange):
+            refreshes.append(token_symbol)
+            watch.update(token_symbol, buy_exchange, 99.0, 100.0)
+            watch.update(token_symbol, sell_exchange, 100.0 + len(refreshes), 101.0 + len(refreshes))
+
+        watch = SpreadWatch(refresh, fallback_interval=0.02)
+        result = asyncio.run(watch.wait('BTC', 'a', 'b', 3.0, -5.0, 2))
+        assert result['reason'] == 'target'
+        assert refreshes == ['BTC', 'BTC', 'BTC']
@@ -0,0 +1,76 @@
+"""
+Execution Step Graph Tests
+Concurrent independent steps, failure propagation and critical-path timing
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from step_graph import StepGraph
+
+
+def sleeper(seconds, value=None):
+    async def step(results):
+        await asyncio.sleep(seconds)
+        return value
+    return step
+
+
+class TestStepGraph:
+    """Dependency-ordered step execution"""
+
+    def test_independent_steps_overlap_and_critical_path_is_reported(self):
+        graph = StepGraph()
+        graph.add('address_a', sleeper(0.1, 'A'))
+        graph.add('address_b', sleeper(0.1, 'B'))
+        graph.add('baseline', sleeper(0.01, 5))
+        graph.add('fund', lambda results: sleeper(0.05, results['address_a'] + '!')(results), ['address_a', 'baseline'])
+        graph.add('send', sleeper(0.05, 'sent'), ['fund', 'address_b'])
+
+        started = time.perf_counter()
+        results = asyncio.run(graph.run())
+        elapsed = time.perf_counter() - started
+
+        assert results['fund'] == 'A!'
+        assert elapsed < 0.3  # 0.1 + 0.05 + 0.05 on the longest chain, not the 0.31 sum
+        assert graph.critical_path()[-2:] == ['fund', 'send']
+        assert graph.critical_path()[0] in ('address_a', 'address_b')
+
+        timings = graph.timings()
+        assert not timings['baseline']['critical']
+        assert timings['fund']['start'] >= timings['address_a']['end']
+        assert timings['send']['end'] == pytest.approx(elapsed, abs=0.05)
+
+    def test_failure_cancels_running_steps_and_skips_dependents(self):
+        graph = StepGraph()
+        ran = []
+
+        async def fail(results):
+            await asyncio.sleep(0.01)
+            raise RuntimeError('not profitable')
+
+        async def record(results):
+            ran.append('fund')
+
+        graph.add('profitability', fail)
+        graph.add('address', sleeper(5))
+        graph.add('fund', record, ['profitability', 'address'])
+
+        with pytest.raises(RuntimeError, match='not profitable'):
+            asyncio.run(graph.run())
+        assert ran == []
+        assert graph.failed_step == 'profitability'
+        timings = graph.timings()
+        assert timings['address']['status'] == 'cancelled'
+        assert timings['fund']['status'] == 'pending'
+
+    def test_unknown_dependency_is_rejected(self):
+        graph = StepGraph()
+        with pytest.raises(ValueError):
+            graph.add('fund', sleeper(0), ['missing'])
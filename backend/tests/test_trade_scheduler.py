@@ -0,0 +1,171 @@
+"""
+Trade Scheduler Tests
+Capital reservations, queueing unfunded trades, profit-rate priority and transfer timings
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from trade_scheduler import CapitalLedger, TradeScheduler, TransferTimings, exchange_account, wallet_account
+
+WALLET = wallet_account('0xABC')
+
+
+class FakeJobs:
+    """In-memory failsafe_states collection keyed by job id"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        self.docs[doc['id']] = dict(doc)
+
+    async def find_one(self, filter_dict, projection=None):
+        doc = self.docs.get(filter_dict['id'])
+        return dict(doc) if doc else None
+
+    async def update_one(self, filter_dict, update_dict, upsert=False):
+        self.docs[filter_dict['id']].update(update_dict['$set'])
+
+
+class FakeTimings:
+    """transfer_timings collection supporting upserts and a full read"""
+
+    def __init__(self):
+        self.docs = []
+
+    def find(self, filter_dict, projection=None):
+        docs = [dict(doc) for doc in self.docs]
+
+        class Cursor:
+            async def to_list(self, length):
+                return docs[:length]
+
+        return Cursor()
+
+    async def update_one(self, filter_dict, update_dict, upsert=False):
+        for doc in self.docs:
+            if all(doc.get(field) == value for field, value in filter_dict.items()):
+                doc.update(update_dict['$set'])
+                return
+        self.docs.append(dict(update_dict['$set']))
+
+
+class FakeDB:
+    def __init__(self):
+        self.failsafe_states = FakeJobs()
+        self.transfer_timings = FakeTimings()
+
+
+def make_scheduler(db, handler, wallet_balance, workers=4):
+    async def balances(keys):
+        return {key: wallet_balance['USDT'] for key in keys}
+
+    return TradeScheduler(
+        db, handler,
+        requirements=lambda job: {(WALLET, 'USDT'): job['usdt_invested']},
+        balances=balances,
+        priority=lambda job: job['expected_profit_per_minute'],
+        workers=workers,
+        recheck_interval=5
+    )
+
+
+class TestTradeScheduler:
+    """Capital-aware job dispatch"""
+
+    def test_ledger_reserves_all_or_nothing(self):
+        ledger = CapitalLedger()
+        balances = {(WALLET, 'USDT'): 150.0, (exchange_account('Binance'), 'BTC'): 1.0}
+        assert ledger.try_reserve('a', {(WALLET, 'USDT'): 100.0}, balances)
+        assert not ledger.try_reserve('b', {(WALLET, 'USDT'): 100.0, (exchange_account('binance'), 'BTC'): 0.5}, balances)
+        assert ledger.reserved((exchange_account('binance'), 'BTC')) == 0.0
+        assert ledger.try_reserve('c', {(WALLET, 'USDT'): 50.0}, balances)
+        ledger.release('a')
+        assert ledger.stats() == {f"{WALLET}/USDT": 50.0}
+
+    def test_unfunded_trades_wait_and_run_by_profit_per_minute(self):
+        db = FakeDB()
+        wallet = {'USDT': 100.0}
+        started = []
+        gates = {}
+
+        async def handler(job):
+            started.append(job['id'])
+            await gates[job['id']].wait()
+
+        async def run():
+            scheduler = make_scheduler(db, handler, wallet)
+            for job_id in ('first', 'low', 'high'):
+                gates[job_id] = asyncio.Event()
+            await scheduler.submit({'id': 'first', 'status': 'pending', 'usdt_invested': 100.0, 'expected_profit_per_minute': 0.5})
+            scheduler.start()
+            await asyncio.sleep(0.02)
+            await scheduler.submit({'id': 'low', 'status': 'pending', 'usdt_invested': 100.0, 'expected_profit_per_minute': 0.1})
+            await scheduler.submit({'id': 'high', 'status': 'pending', 'usdt_invested': 100.0, 'expected_profit_per_minute': 2.0})
+            await asyncio.sleep(0.02)
+            assert started == ['first']  # Wallet capital is reserved by the running trade
+            assert scheduler.stats()['waiting_for_capital'] == 2
+
+            gates['first'].set()
+            await asyncio.sleep(0.02)
+            assert started == ['first', 'high']
+
+            gates['high'].set()
+            gates['low'].set()
+            await asyncio.sleep(0.02)
+            assert started == ['first', 'high', 'low']
+            await scheduler.stop()
+
+        asyncio.run(run())
+
+    def test_released_capital_lets_queued_trades_start_while_job_runs(self):
+        db = FakeDB()
+        wallet = {'USDT': 100.0}
+        started = []
+
+        async def run():
+            gate = asyncio.Event()
+
+            async def handler(job):
+                started.append(job['id'])
+                if job['id'] == 'a':
+                    wallet['USDT'] -= 100.0  # Funds sent to the exchange
+                    scheduler.release('a', [(WALLET, 'USDT')])
+                    wallet['USDT'] += 100.0  # ...and another deposit arrives
+                    await gate.wait()
+
+            scheduler = make_scheduler(db, handler, wallet)
+            scheduler.start()
+            await scheduler.submit({'id': 'a', 'status': 'pending', 'usdt_invested': 100.0, 'expected_profit_per_minute': 2.0})
+            await scheduler.submit({'id': 'b', 'status': 'pending', 'usdt_invested': 100.0, 'expected_profit_per_minute': 1.0})
+            await asyncio.sleep(0.05)
+            assert started == ['a', 'b']
+            gate.set()
+            await scheduler.stop()
+
+        asyncio.run(run())
+
+    def test_transfer_timings_average_observations_and_survive_restart(self):
+        db = FakeDB()
+        timings = TransferTimings(db, weight=0.5)
+        transfers = [('binance', 'BTC', 'withdrawal'), ('kucoin', 'BTC', 'deposit')]
+
+        async def run():
+            assert timings.estimate_minutes(transfers, default_minutes=30) == 30
+            await timings.record('Binance', 'btc', 'withdrawal', 600)
+            await timings.record('binance', 'BTC', 'withdrawal', 200)
+
+        asyncio.run(run())
+        assert timings.seconds('binance', 'BTC', 'withdrawal') == 400
+        # Observed withdrawal plus half of the default for the unobserved deposit
+        assert timings.estimate_minutes(transfers, default_minutes=30) == (400 + 900) / 60
+        assert len(db.transfer_timings.docs) == 1
+
+        restarted = TransferTimings(db)
+        asyncio.run(restarted.warm_start())
+        assert restarted.seconds('BINANCE', 'btc', 'withdrawal') == 400
+        assert restarted.estimate_minutes([('binance', 'BTC', 'withdrawal')], default_minutes=30) == 400 / 60
@@ -0,0 +1,134 @@
+"""
+Exchange Transfer Tracker Tests
+Batched withdrawal/deposit status polling and tx hash matching
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from transfer_tracker import TransferFailed, TransferTracker
+
+
+class FakeExchange:
+    """Venue whose withdrawal/deposit history the test edits directly"""
+    has = {'fetchWithdrawals': True, 'fetchDeposits': True}
+
+    def __init__(self):
+        self.withdrawals = []
+        self.deposits = []
+        self.calls = []
+
+    async def fetch_withdrawals(self, code=None, since=None):
+        self.calls.append(('withdrawals', code))
+        return [dict(record) for record in self.withdrawals]
+
+    async def fetch_deposits(self, code=None, since=None):
+        self.calls.append(('deposits', code))
+        return [dict(record) for record in self.deposits]
+
+
+class TestTransferTracker:
+    """Pending transfer resolution"""
+
+    def test_one_history_call_per_cycle_serves_every_withdrawal(self):
+        exchange = FakeExchange()
+        exchange.withdrawals = [
+            {'id': 'w1', 'status': 'pending', 'txid': None},
+            {'id': 'w2', 'status': 'pending', 'txid': None},
+        ]
+        tracker = TransferTracker(fast_interval=0.01, slow_interval=0.02)
+
+        async def run():
+            waiters = [
+                asyncio.create_task(tracker.wait_for_withdrawal('binance', exchange, 'USDT', withdrawal_id, timeout=2))
+                for withdrawal_id in ('w1', 'w2')
+            ]
+            await asyncio.sleep(0.05)
+            cycles = len(exchange.calls)
+            assert cycles >= 1
+            assert all(call == ('withdrawals', 'USDT') for call in exchange.calls)
+
+            # Completed without a tx hash is not done yet
+            exchange.withdrawals[0].update(status='ok')
+            await asyncio.sleep(0.05)
+            assert not waiters[0].done()
+
+            exchange.withdrawals[0].update(txid='0xAA')
+            exchange.withdrawals[1].update(status='ok', txid='0xBB')
+            records = await asyncio.gather(*waiters)
+            assert [record['txid'] for record in records] == ['0xAA', '0xBB']
+            await tracker.stop()
+
+        asyncio.run(run())
+        assert tracker.stats()['binance']['pending_withdrawals'] == 0
+
+    def test_failed_withdrawal_raises(self):
+        exchange = FakeExchange()
+        exchange.withdrawals = [{'id': 'w1', 'status': 'canceled', 'txid': None}]
+        tracker = TransferTracker(fast_interval=0.01)
+
+        async def run():
+            with pytest.raises(TransferFailed):
+                await tracker.wait_for_withdrawal('gate', exchange, 'ETH', 'w1', timeout=1)
+            await tracker.stop()
+
+        asyncio.run(run())
+
+    def test_deposit_matched_by_tx_hash_and_backoff_grows(self):
+        exchange = FakeExchange()
+        exchange.deposits = [{'id': 'd0', 'status': 'ok', 'txid': '0x' + '11' * 32, 'amount': 5.0}]
+        tracker = TransferTracker(fast_interval=0.01, slow_interval=1.0, backoff=2.0)
+
+        async def run():
+            tx_hash = '0x' + 'AB' * 32
+            waiter = asyncio.create_task(tracker.wait_for_deposit('kucoin', exchange, 'USDT', tx_hash, timeout=2))
+            await asyncio.sleep(0.05)
+            assert not waiter.done()  # Other deposits don't match
+            assert tracker.current_interval('kucoin') > 0.01
+
+            # Exchanges may report the hash without 0x and in another case
+            exchange.deposits.append({'id': 'd1', 'status': 'ok', 'txid': 'ab' * 32, 'amount': 100.0})
+            record = await waiter
+            assert record['amount'] == 100.0
+            await tracker.stop()
+
+        asyncio.run(run())
+
+    def test_mixed_currencies_are_polled_per_code_where_the_venue_requires_one(self):
+        class CodeRequiredExchange(FakeExchange):
+            async def fetch_withdrawals(self, code=None, since=None):
+                if code is None:
+                    self.calls.append(('withdrawals', code))
+                    raise Exception("fetchWithdrawals() requires a code argument")
+                return [record for record in await super().fetch_withdrawals(code, since) if record['currency'] == code]
+
+        exchange = CodeRequiredExchange()
+        exchange.withdrawals = [
+            {'id': 'w1', 'currency': 'USDT', 'status': 'pending', 'txid': None},
+            {'id': 'w2', 'currency': 'BNB', 'status': 'ok', 'txid': '0xBB'},
+        ]
+        tracker = TransferTracker(fast_interval=0.01, slow_interval=0.02)
+
+        async def run():
+            usdt = asyncio.create_task(tracker.wait_for_withdrawal('mexc', exchange, 'USDT', 'w1', timeout=2))
+            bnb = asyncio.create_task(tracker.wait_for_withdrawal('mexc', exchange, 'BNB', 'w2', timeout=2))
+            assert (await bnb)['txid'] == '0xBB'
+            calls = len(exchange.calls)
+
+            exchange.withdrawals.append({'id': 'w3', 'currency': 'ETH', 'status': 'ok', 'txid': '0xCC'})
+            eth = asyncio.create_task(tracker.wait_for_withdrawal('mexc', exchange, 'ETH', 'w3', timeout=2))
+            assert (await eth)['txid'] == '0xCC'
+            exchange.withdrawals[0].update(status='ok', txid='0xAA')
+            assert (await usdt)['txid'] == '0xAA'
+            await tracker.stop()
+            return calls
+
+        calls = asyncio.run(run())
+        # Rejected once, then grouped by currency from then on
+        assert exchange.calls[:calls] == [('withdrawals', None), ('withdrawals', 'BNB'), ('withdrawals', 'USDT')]
+        assert exchange.calls.count(('withdrawals', None)) == 1
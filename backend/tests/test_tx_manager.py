@@ -0,0 +1,115 @@
+"""
+Wallet Transaction Manager Tests
+Nonce tracking and cached gas data against a local stand-in JSON-RPC node
+"""
+
+import asyncio
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+from eth_account import Account
+from web3 import AsyncWeb3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rpc_pool import PooledAsyncProvider, RPCPool
+from tx_manager import TRANSFER_MIN_GAS, WalletTransactionManager
+
+TOKEN = '0x' + '55' * 20
+EXCHANGE = '0x' + '33' * 20
+
+
+class WalletNode:
+    """Stand-in node tracking which RPC methods were called"""
+
+    def __init__(self):
+        self.methods = Counter()
+        self.pending_nonce = 5
+        self.reject_sends = False
+        self.sent = []
+
+    async def handle(self, request):
+        body = await request.json()
+        method = body['method']
+        self.methods[method] += 1
+        results = {
+            'eth_chainId': '0x38',
+            'eth_gasPrice': hex(3 * 10 ** 9),
+            'eth_estimateGas': hex(60000),
+            'eth_getTransactionCount': hex(self.pending_nonce),
+        }
+        if method == 'eth_sendRawTransaction':
+            if self.reject_sends:
+                return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'error': {'code': -32000, 'message': 'insufficient funds'}})
+            self.sent.append(body['params'][0])
+            self.pending_nonce += 1
+            return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'result': '0x' + f'{len(self.sent):064x}'})
+        return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'result': results.get(method)})
+
+
+async def run_manager(node, check):
+    app = web.Application()
+    app.router.add_post('/', node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    pool = RPCPool([f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"])
+    try:
+        await check(WalletTransactionManager(AsyncWeb3(PooledAsyncProvider(pool)), gas_price_ttl=60))
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+
+class TestWalletTransactionManager:
+    """Nonce and gas caching"""
+
+    def test_concurrent_transfers_get_distinct_nonces_and_one_rpc_each(self):
+        node = WalletNode()
+        account = Account.create()
+
+        async def check(manager):
+            first = await asyncio.gather(*[
+                manager.send_token_transfer(account, TOKEN, EXCHANGE, 10 ** 18) for _ in range(3)
+            ])
+            assert sorted(sent['nonce'] for sent in first) == [5, 6, 7]
+            assert first[0]['gas_limit'] == 72000  # 60000 estimate + 20% buffer
+
+            before = sum(node.methods.values())
+            sent = await manager.send_token_transfer(account, TOKEN, EXCHANGE, 10 ** 18)
+            assert sent['nonce'] == 8
+            assert sum(node.methods.values()) - before == 1  # Only eth_sendRawTransaction
+            assert node.methods['eth_getTransactionCount'] == 1
+
+        asyncio.run(run_manager(node, check))
+
+    def test_failed_broadcast_resyncs_nonce(self):
+        node = WalletNode()
+        account = Account.create()
+
+        async def check(manager):
+            await manager.send_token_transfer(account, TOKEN, EXCHANGE, 1)
+            node.reject_sends = True
+            with pytest.raises(Exception):
+                await manager.send_token_transfer(account, TOKEN, EXCHANGE, 1)
+            node.reject_sends = False
+
+            sent = await manager.send_token_transfer(account, TOKEN, EXCHANGE, 1)
+            assert sent['nonce'] == 6  # The rejected nonce is reused, no gap
+
+        asyncio.run(run_manager(node, check))
+
+    def test_gas_limit_never_below_transfer_floor(self):
+        node = WalletNode()
+
+        async def check(manager):
+            manager._gas_estimates[(AsyncWeb3.to_checksum_address(TOKEN), 'transfer')] = 30000
+            sent = await manager.send_token_transfer(Account.create(), TOKEN, EXCHANGE, 1)
+            assert sent['gas_limit'] == TRANSFER_MIN_GAS
+
+        asyncio.run(run_manager(node, check))
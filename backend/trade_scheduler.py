@@ -0,0 +1,216 @@
+"""
+Trade Scheduler for Crypto Arbitrage Bot
+Concurrent arbitrage jobs with per-wallet/per-exchange capital reservations, profit-rate priority
+and observed transfer durations for estimating how long a job runs
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from execution_jobs import TERMINAL_STATUSES, ExecutionWorker
+
+logger = logging.getLogger(__name__)
+
+# (account, asset) - account is "wallet:<address>" or "exchange:<name>"
+CapitalKey = Tuple[str, str]
+
+
+def wallet_account(address: str) -> str:
+    return f"wallet:{address.lower()}"
+
+
+def exchange_account(exchange_name: str) -> str:
+    return f"exchange:{exchange_name.lower()}"
+
+
+class CapitalLedger:
+    """Capital reserved by running trades, per (account, asset)"""
+
+    def __init__(self):
+        self._reservations: Dict[str, Dict[CapitalKey, float]] = {}
+
+    def reserved(self, key: CapitalKey, exclude: Optional[str] = None) -> float:
+        return sum(
+            amounts.get(key, 0.0)
+            for job_id, amounts in self._reservations.items()
+            if job_id != exclude
+        )
+
+    def try_reserve(self, job_id: str, requirements: Dict[CapitalKey, float], balances: Dict[CapitalKey, float]) -> bool:
+        """Reserve every requirement or nothing; balances are free balances including other reservations"""
+        for key, amount in requirements.items():
+            if balances.get(key, 0.0) - self.reserved(key, exclude=job_id) < amount:
+                return False
+        self._reservations[job_id] = dict(requirements)
+        return True
+
+    def release(self, job_id: str, keys: Optional[Iterable[CapitalKey]] = None):
+        """Release a job's reservation - all of it, or only keys whose funds have already left the account"""
+        if keys is None:
+            self._reservations.pop(job_id, None)
+            return
+        amounts = self._reservations.get(job_id)
+        if amounts is not None:
+            for key in keys:
+                amounts.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for amounts in self._reservations.values():
+            for (account, asset), amount in amounts.items():
+                label = f"{account}/{asset}"
+                totals[label] = totals.get(label, 0.0) + amount
+        return totals
+
+
+class TransferTimings:
+    """
+    Moving averages of observed withdrawal and deposit durations per (exchange, currency, kind),
+    persisted so a restart keeps them
+    """
+
+    def __init__(self, db: Any, weight: float = 0.3):
+        self.db = db
+        self.weight = weight
+        self._seconds: Dict[Tuple[str, str, str], float] = {}
+
+    async def warm_start(self):
+        try:
+            docs = await self.db.transfer_timings.find({}, {'_id': 0}).to_list(10000)
+        except Exception as e:
+            logger.warning(f"Could not load transfer timings: {e}")
+            return
+        for doc in docs:
+            self._seconds[(doc['exchange'], doc['code'], doc['kind'])] = float(doc['seconds'])
+
+    async def record(self, exchange_name: str, code: str, kind: str, seconds: float):
+        """Fold an observed 'withdrawal' or 'deposit' duration into the average and persist it"""
+        key = (exchange_name.lower(), code.upper(), kind)
+        previous = self._seconds.get(key)
+        self._seconds[key] = seconds if previous is None else previous + self.weight * (seconds - previous)
+        try:
+            await self.db.transfer_timings.update_one(
+                {'exchange': key[0], 'code': key[1], 'kind': kind},
+                {'$set': {'exchange': key[0], 'code': key[1], 'kind': kind, 'seconds': self._seconds[key]}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Could not persist transfer timing for {exchange_name} {code} {kind}: {e}")
+
+    def seconds(self, exchange_name: str, code: str, kind: str) -> Optional[float]:
+        return self._seconds.get((exchange_name.lower(), code.upper(), kind))
+
+    def estimate_minutes(self, transfers: List[Tuple[str, str, str]], default_minutes: float) -> float:
+        """
+        Expected duration of a job making the (exchange, currency, kind) transfers; transfers never
+        observed take an even share of default_minutes. At least one minute.
+        """
+        seconds = 0.0
+        for exchange_name, code, kind in transfers:
+            observed = self.seconds(exchange_name, code, kind)
+            seconds += observed if observed is not None else default_minutes * 60 / len(transfers)
+        return max(seconds / 60, 1.0)
+
+    def stats(self) -> dict:
+        return {'tracked_transfers': len(self._seconds)}
+
+
+class TradeScheduler(ExecutionWorker):
+    """
+    Execution worker that starts a queued job only once its capital can be reserved. Whenever a worker
+    is free, queued jobs are tried in order of expected net profit per minute; jobs that cannot be
+    funded stay queued and are retried when capital is released, a job is submitted, or every
+    recheck_interval seconds (balances can also change outside the bot).
+
+    requirements(job) -> {(account, asset): amount} still needed by the job
+    balances(keys) -> {(account, asset): free balance}
+    priority(job) -> expected net profit per minute
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        handler: Callable[[dict], Awaitable[Any]],
+        requirements: Callable[[dict], Dict[CapitalKey, float]],
+        balances: Callable[[Iterable[CapitalKey]], Awaitable[Dict[CapitalKey, float]]],
+        priority: Callable[[dict], float],
+        workers: int = 4,
+        recheck_interval: float = 30.0
+    ):
+        super().__init__(db, handler, workers)
+        self.requirements = requirements
+        self.balances = balances
+        self.priority = priority
+        self.recheck_interval = recheck_interval
+        self.ledger = CapitalLedger()
+        self._dispatch_lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self._unfunded: set = set()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._queued and job_id not in self._running:
+            self._queued.add(job_id)
+            self._notify()
+
+    def release(self, job_id: str, keys: Optional[Iterable[CapitalKey]] = None):
+        """Release capital (e.g. once it has been sent on) and let queued jobs retry"""
+        self.ledger.release(job_id, keys)
+        self._notify()
+
+    async def _pick(self) -> Optional[dict]:
+        """Reserve capital for the most valuable fundable queued job"""
+        jobs = []
+        for job_id in list(self._queued):
+            job = await self.db.failsafe_states.find_one({'id': job_id}, {'_id': 0})
+            if not job or job.get('status') in TERMINAL_STATUSES:
+                self._queued.discard(job_id)
+                self._unfunded.discard(job_id)
+                continue
+            jobs.append((job, self.requirements(job)))
+        if not jobs:
+            return None
+
+        keys = {key for _, requirements in jobs for key in requirements}
+        balances = await self.balances(keys) if keys else {}
+        jobs.sort(key=lambda entry: self.priority(entry[0]), reverse=True)
+        for job, requirements in jobs:
+            if self.ledger.try_reserve(job['id'], requirements, balances):
+                self._queued.discard(job['id'])
+                self._unfunded.discard(job['id'])
+                return job
+            if job['id'] not in self._unfunded:
+                logger.info(f"Arbitrage job {job['id']} queued until capital is available: {requirements}")
+                self._unfunded.add(job['id'])
+        return None
+
+    async def _next_job(self) -> Optional[dict]:
+        while True:
+            changed = self._changed
+            async with self._dispatch_lock:
+                try:
+                    job = await self._pick()
+                except Exception as e:
+                    logger.warning(f"Trade scheduling failed: {e}")
+                    job = None
+            if job is not None:
+                return job
+            try:
+                await asyncio.wait_for(changed.wait(), self.recheck_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _job_finished(self, job: dict):
+        self.release(job['id'])
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({
+            'waiting_for_capital': len(self._unfunded),
+            'reserved': self.ledger.stats()
+        })
+        return stats
@@ -0,0 +1,199 @@
+"""
+Exchange Transfer Tracker for Crypto Arbitrage Bot
+Batched withdrawal/deposit status polling per exchange with adaptive backoff
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATUSES = {'ok', 'complete', 'completed', 'success'}
+FAILED_STATUSES = {'failed', 'canceled', 'cancelled'}
+
+
+def normalize_txid(txid: Optional[str]) -> Optional[str]:
+    """Exchanges report hashes with or without 0x and in either case"""
+    if not txid:
+        return None
+    txid = str(txid).lower()
+    return txid[2:] if txid.startswith('0x') else txid
+
+
+class TransferFailed(Exception):
+    """The exchange reported a pending transfer as failed or cancelled"""
+
+
+class _Pending:
+    def __init__(self, kind: str, currency: str, withdrawal_id: Optional[str], tx_hash: Optional[str]):
+        self.kind = kind
+        self.currency = currency
+        self.withdrawal_id = withdrawal_id
+        self.tx_hash = normalize_txid(tx_hash)
+        self.submitted_at = time.time()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def matches(self, record: dict) -> bool:
+        if self.withdrawal_id is not None and str(record.get('id')) == str(self.withdrawal_id):
+            return True
+        if self.tx_hash and normalize_txid(record.get('txid')) == self.tx_hash:
+            return True
+        return False
+
+
+class _Venue:
+    def __init__(self, instance: Any):
+        self.instance = instance
+        self.pending: List[_Pending] = []
+        self.task: Optional[asyncio.Task] = None
+        self.polls_since_submit = 0
+        self.api_calls = 0
+        self.code_required = False  # Set once the venue rejects a history call without a currency
+        self.wake = asyncio.Event()
+
+
+class TransferTracker:
+    """
+    One status loop per exchange, running only while transfers are pending. Each cycle makes one
+    fetch_withdrawals and one fetch_deposits call for the venue (one per pending currency on venues that
+    require a currency code) and matches the records to every pending transfer by withdrawal id or tx hash. Polling starts at fast_interval after a submission and backs off
+    by `backoff` per cycle up to slow_interval.
+    """
+
+    def __init__(self, fast_interval: float = 3.0, slow_interval: float = 60.0, backoff: float = 1.5):
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.backoff = backoff
+        self._venues: Dict[str, _Venue] = {}
+
+    @staticmethod
+    def supports_deposits(instance: Any) -> bool:
+        return bool((getattr(instance, 'has', None) or {}).get('fetchDeposits'))
+
+    def _venue(self, exchange_name: str, instance: Any) -> _Venue:
+        key = exchange_name.lower()
+        venue = self._venues.get(key)
+        if venue is None:
+            venue = self._venues[key] = _Venue(instance)
+        elif instance is not None:
+            venue.instance = instance
+        return venue
+
+    def current_interval(self, exchange_name: str) -> float:
+        venue = self._venues.get(exchange_name.lower())
+        polls = venue.polls_since_submit if venue else 0
+        return min(self.fast_interval * self.backoff ** polls, self.slow_interval)
+
+    async def wait_for_withdrawal(self, exchange_name: str, instance: Any, currency: str, withdrawal_id: str, timeout: Optional[float] = None) -> dict:
+        """Wait until a withdrawal is completed (and has a tx hash); returns the exchange's record"""
+        return await self._wait(exchange_name, instance, _Pending('withdrawal', currency, withdrawal_id, None), timeout)
+
+    async def wait_for_deposit(self, exchange_name: str, instance: Any, currency: str, tx_hash: str, timeout: Optional[float] = None) -> dict:
+        """Wait until the deposit made by tx_hash is credited; returns the exchange's record"""
+        return await self._wait(exchange_name, instance, _Pending('deposit', currency, None, tx_hash), timeout)
+
+    async def _wait(self, exchange_name: str, instance: Any, pending: _Pending, timeout: Optional[float]) -> dict:
+        venue = self._venue(exchange_name, instance)
+        venue.pending.append(pending)
+        venue.polls_since_submit = 0  # New submission - poll fast again
+        venue.wake.set()
+        if venue.task is None or venue.task.done():
+            venue.task = asyncio.create_task(self._run(exchange_name.lower(), venue))
+        try:
+            return await asyncio.wait_for(pending.future, timeout)
+        finally:
+            venue.pending.remove(pending)
+
+    async def _run(self, exchange_name: str, venue: _Venue):
+        while venue.pending:
+            venue.wake.clear()
+            try:
+                await self._poll(exchange_name, venue)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Transfer status poll failed for {exchange_name}: {e}")
+            venue.polls_since_submit += 1
+            try:
+                await asyncio.wait_for(venue.wake.wait(), self.current_interval(exchange_name))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fetch_history(self, venue: _Venue, kind: str, code: Optional[str], since: int) -> List[dict]:
+        venue.api_calls += 1
+        if kind == 'withdrawal':
+            return await venue.instance.fetch_withdrawals(code, since) or []
+        return await venue.instance.fetch_deposits(code, since) or []
+
+    async def _fetch(self, exchange_name: str, venue: _Venue, kind: str, pending: List[_Pending]) -> List[dict]:
+        """
+        One history call for every pending currency where the venue accepts code=None, else one call per
+        currency. A rejected code=None call is retried grouped by currency and the venue is remembered.
+        """
+        currencies = sorted({item.currency for item in pending})
+        since = int((min(item.submitted_at for item in pending) - 600) * 1000)  # Allow for clock skew
+        if len(currencies) > 1 and not venue.code_required:
+            try:
+                return await self._fetch_history(venue, kind, None, since)
+            except Exception as e:
+                logger.info(f"{exchange_name} rejected {kind} history without a currency, polling per currency: {e}")
+            records = await self._fetch_per_currency(venue, kind, currencies, since)
+            venue.code_required = True
+            return records
+        return await self._fetch_per_currency(venue, kind, currencies, since)
+
+    async def _fetch_per_currency(self, venue: _Venue, kind: str, currencies: List[str], since: int) -> List[dict]:
+        results = await asyncio.gather(*[self._fetch_history(venue, kind, code, since) for code in currencies])
+        return [record for records in results for record in records]
+
+    async def _poll(self, exchange_name: str, venue: _Venue):
+        for kind in ('withdrawal', 'deposit'):
+            pending = [item for item in venue.pending if item.kind == kind and not item.future.done()]
+            if not pending:
+                continue
+
+            has = getattr(venue.instance, 'has', None) or {}
+            if kind == 'withdrawal' and not has.get('fetchWithdrawals'):
+                # No batch endpoint - fall back to one fetch_withdrawal per pending id
+                records = []
+                for item in pending:
+                    venue.api_calls += 1
+                    try:
+                        records.append(await venue.instance.fetch_withdrawal(item.withdrawal_id, item.currency))
+                    except Exception as e:
+                        logger.warning(f"fetch_withdrawal {item.withdrawal_id} failed on {exchange_name}: {e}")
+            else:
+                records = await self._fetch(exchange_name, venue, kind, pending)
+
+            for record in records or []:
+                for item in pending:
+                    if item.future.done() or not item.matches(record):
+                        continue
+                    status = str(record.get('status') or '').lower()
+                    if status in FAILED_STATUSES:
+                        item.future.set_exception(TransferFailed(f"{kind.capitalize()} {status}: {record.get('info', {})}"))
+                    elif status in COMPLETED_STATUSES and (kind == 'deposit' or record.get('txid')):
+                        item.future.set_result(record)
+
+    async def stop(self):
+        for venue in self._venues.values():
+            if venue.task:
+                venue.task.cancel()
+                try:
+                    await venue.task
+                except asyncio.CancelledError:
+                    pass
+                venue.task = None
+
+    def stats(self) -> dict:
+        return {
+            exchange_name: {
+                'pending_withdrawals': sum(1 for item in venue.pending if item.kind == 'withdrawal'),
+                'pending_deposits': sum(1 for item in venue.pending if item.kind == 'deposit'),
+                'poll_interval': round(self.current_interval(exchange_name), 1),
+                'api_calls': venue.api_calls
+            }
+            for exchange_name, venue in self._venues.items()
+        }
@@ -0,0 +1,155 @@
+"""
+Wallet Transaction Manager for Crypto Arbitrage Bot
+Local nonce tracking, per-block gas price and cached gas estimates for BEP20 transfers
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from web3 import AsyncWeb3, Web3
+
+logger = logging.getLogger(__name__)
+
+# A cached transfer estimate may come from a recipient that already held the token; paying a
+# fresh (zero-balance) address costs ~20k more gas, so transfers never go below this limit
+TRANSFER_MIN_GAS = 65000
+
+ERC20_TRANSFER_ABI = [{
+    "constant": False,
+    "inputs": [{"name": "_to", "type": "address"}, {"name": "_value", "type": "uint256"}],
+    "name": "transfer",
+    "outputs": [{"name": "", "type": "bool"}],
+    "type": "function"
+}]
+
+
+class WalletTransactionManager:
+    """
+    Signs and broadcasts transfers with a single RPC call in steady state:
+    - nonces are handed out locally per account (seeded from the pending count, resynced after a failed send)
+    - the gas price is fetched at most once per block and at least every gas_price_ttl seconds
+    - gas estimates are cached per (contract, method)
+    Concurrent transfers from the same account get consecutive nonces and can be broadcast in parallel.
+    """
+
+    def __init__(self, w3: AsyncWeb3, block_watcher: Any = None, gas_price_ttl: float = 3.0, gas_buffer: float = 1.2):
+        self.w3 = w3
+        self.block_watcher = block_watcher
+        self.gas_price_ttl = gas_price_ttl
+        self.gas_buffer = gas_buffer
+        self._nonces: Dict[str, int] = {}
+        self._nonce_locks: Dict[str, asyncio.Lock] = {}
+        self._gas_price: Optional[Tuple[Optional[int], float, int]] = None  # (block, fetched_at, wei)
+        self._gas_price_lock = asyncio.Lock()
+        self._gas_estimates: Dict[Tuple[str, str], int] = {}
+        self._chain_id: Optional[int] = None
+        self.rpc_calls = 0
+
+    # ---------- nonces ----------
+
+    def _lock(self, address: str) -> asyncio.Lock:
+        return self._nonce_locks.setdefault(address, asyncio.Lock())
+
+    async def reserve_nonce(self, address: str) -> int:
+        """Next nonce for an account; only the first call per account goes to the node"""
+        address = Web3.to_checksum_address(address)
+        async with self._lock(address):
+            if address not in self._nonces:
+                self.rpc_calls += 1
+                self._nonces[address] = await self.w3.eth.get_transaction_count(address, 'pending')
+            nonce = self._nonces[address]
+            self._nonces[address] += 1
+            return nonce
+
+    async def reconcile_nonce(self, address: str) -> int:
+        """Reset the local nonce to the node's pending count (after a failed broadcast or an external send)"""
+        address = Web3.to_checksum_address(address)
+        async with self._lock(address):
+            self.rpc_calls += 1
+            self._nonces[address] = await self.w3.eth.get_transaction_count(address, 'pending')
+            return self._nonces[address]
+
+    # ---------- gas ----------
+
+    async def get_gas_price(self) -> int:
+        """Gas price, refetched on a new block or once gas_price_ttl has passed"""
+        async with self._gas_price_lock:
+            block = getattr(self.block_watcher, 'block_number', None)
+            if self._gas_price:
+                cached_block, fetched_at, price = self._gas_price
+                # The watcher only follows the head while receipts are pending, so age out as well
+                if cached_block == block and time.monotonic() - fetched_at < self.gas_price_ttl:
+                    return price
+            self.rpc_calls += 1
+            price = await self.w3.eth.gas_price
+            self._gas_price = (block, time.monotonic(), price)
+            return price
+
+    async def get_chain_id(self) -> int:
+        if self._chain_id is None:
+            self.rpc_calls += 1
+            self._chain_id = await self.w3.eth.chain_id
+        return self._chain_id
+
+    async def estimate_gas(self, contract_function: Any, sender: str, contract_address: str, method: str, min_gas: int = 0) -> int:
+        """Gas limit for a call, estimated once per (contract, method), padded by gas_buffer and floored at min_gas"""
+        key = (Web3.to_checksum_address(contract_address), method)
+        if key not in self._gas_estimates:
+            self.rpc_calls += 1
+            self._gas_estimates[key] = await contract_function.estimate_gas({'from': sender})
+        return max(int(self._gas_estimates[key] * self.gas_buffer), min_gas)
+
+    # ---------- transfers ----------
+
+    async def send_token_transfer(self, account: Any, token_address: str, to_address: str, amount_wei: int) -> dict:
+        """Sign and broadcast a BEP20 transfer; returns tx hash, nonce, gas limit and gas price"""
+        token_address = Web3.to_checksum_address(token_address)
+        to_address = Web3.to_checksum_address(to_address)
+        contract = self.w3.eth.contract(address=token_address, abi=ERC20_TRANSFER_ABI)
+        transfer = contract.functions.transfer(to_address, amount_wei)
+
+        gas_limit, gas_price, chain_id = await asyncio.gather(
+            self.estimate_gas(transfer, account.address, token_address, 'transfer', TRANSFER_MIN_GAS),
+            self.get_gas_price(),
+            self.get_chain_id()
+        )
+        nonce = await self.reserve_nonce(account.address)
+
+        transaction = {
+            'to': token_address,
+            'data': contract.encode_abi('transfer', args=[to_address, amount_wei]),
+            'value': 0,
+            'gas': gas_limit,
+            'gasPrice': gas_price,
+            'nonce': nonce,
+            'chainId': chain_id
+        }
+        signed = account.sign_transaction(transaction)
+
+        try:
+            self.rpc_calls += 1
+            tx_hash = await self.w3.eth.send_raw_transaction(signed.raw_transaction)
+        except Exception:
+            # The nonce may not have been consumed - resync so later sends don't leave a gap
+            try:
+                await self.reconcile_nonce(account.address)
+            except Exception as e:
+                logger.warning(f"Nonce reconcile failed for {account.address}: {e}")
+            raise
+
+        return {
+            'tx_hash': self.w3.to_hex(tx_hash),
+            'nonce': nonce,
+            'gas_limit': gas_limit,
+            'gas_price': gas_price
+        }
+
+    def stats(self) -> dict:
+        return {
+            'tracked_accounts': len(self._nonces),
+            'cached_gas_estimates': len(self._gas_estimates),
+            'gas_price_wei': self._gas_price[2] if self._gas_price else None,
+            'rpc_calls': self.rpc_calls
+        }
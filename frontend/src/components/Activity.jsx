@@ -80,6 +80,7 @@ export default function Activity() {
       completed: "text-success border-success/30 bg-success/10",
       failed: "text-destructive border-destructive/30 bg-destructive/10",
       executing: "text-warning border-warning/30 bg-warning/10",
+      needs_attention: "text-warning border-warning/30 bg-warning/10",
       detected: "text-info border-info/30 bg-info/10",
       manual: "text-purple-400 border-purple-400/30 bg-purple-400/10"
     };
@@ -59,7 +59,15 @@ export default function ArbitrageCard({ opportunity, index, setOpportunities, fe
         usdt_amount: amount,
         confirmed: isLiveMode ? confirmed : true
       });
-      
+
+      // Live trades with wallet transfers run as a background job
+      if (response.data.status === "queued") {
+        toast.success(`🔴 LIVE Arbitrage queued (job ${response.data.job_id})`);
+        resetModal();
+        fetchData();
+        return;
+      }
+
       setExecutionResult(response.data);
       const modeLabel = response.data.is_live ? "🔴 LIVE" : "🟡 TEST";
       toast.success(`${modeLabel} Arbitrage executed! Profit: $${response.data.profit.toFixed(4)}`);
@@ -171,7 +179,7 @@ export default function ArbitrageCard({ opportunity, index, setOpportunities, fe
           <Button
             data-testid={`execute-btn-${opportunity.id}`}
             onClick={() => setShowExecuteModal(true)}
-            disabled={opportunity.status === 'executing' || opportunity.status === 'completed'}
+            disabled={['executing', 'completed', 'needs_attention'].includes(opportunity.status)}
             className={`
               h-10 px-6 rounded-sm uppercase font-semibold
               ${opportunity.status === 'completed' 
@@ -28,6 +28,13 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
+import {
+  Select,
+  SelectContent,
+  SelectItem,
+  SelectTrigger,
+  SelectValue,
+} from "@/components/ui/select";
 import { toast } from "sonner";
 import axios from "axios";
 import { API } from "@/App";
@@ -172,7 +179,7 @@ export default function SettingsModal({ open, onOpenChange, settings, updateSett
                       className="bg-background border-border"
                     />
                     <p className="text-xs text-muted-foreground">
-                      Minimum spread % to detect opportunity
+                      Minimum spread % (before trading fees) to detect opportunity
                     </p>
                   </div>
 
@@ -228,6 +235,25 @@ export default function SettingsModal({ open, onOpenChange, settings, updateSett
                       Min BNB required for gas fees
                     </p>
                   </div>
+
+                  <div className="space-y-2 col-span-2">
+                    <Label className="text-xs text-muted-foreground">Execution Mode</Label>
+                    <Select
+                      value={localSettings.execution_mode || "transfer"}
+                      onValueChange={(value) => setLocalSettings(prev => ({ ...prev, execution_mode: value }))}
+                    >
+                      <SelectTrigger className="bg-background border-border">
+                        <SelectValue />
+                      </SelectTrigger>
+                      <SelectContent>
+                        <SelectItem value="transfer">Transfer (buy, move tokens via wallet, sell)</SelectItem>
+                        <SelectItem value="inventory">Inventory (both legs at once from pre-funded exchanges)</SelectItem>
+                      </SelectContent>
+                    </Select>
+                    <p className="text-xs text-muted-foreground">
+                      Inventory mode needs USDT on buy exchanges and tokens on sell exchanges
+                    </p>
+                  </div>
                 </div>
               </div>
             </TabsContent>
@@ -304,7 +330,7 @@ export default function SettingsModal({ open, onOpenChange, settings, updateSett
                         className="bg-background border-border"
                       />
                       <p className="text-xs text-muted-foreground">
-                        How often to check spread
+                        Direct spread check when no live quotes arrive
                       </p>
                     </div>
 